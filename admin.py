@@ -1,15 +1,24 @@
 from models import (
     db, Admin, ShowerType, GlassType, Finish, HardwareType, GlassThickness, SealType,
-    HardwarePricing, SealPricing, GlassPricing, Model, ModelGlassComponent, ModelHardwareComponent, ModelSealComponent
+    HardwarePricing, SealPricing, GlassPricing, Model, ModelGlassComponent, ModelHardwareComponent, ModelSealComponent,
+    Addon, GalleryImage, bump_catalog_version
 )
+from database import configure_database
+from price_summary import mark_dependencies
+from changelog import reset_change_log
 from flask import Flask
 from dotenv import load_dotenv
+import argparse
+import json
 import os
+import random
+import time
 
 load_dotenv()
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///shower_quote.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app)
 db.init_app(app)
 
 def create_admin_user(username, password):
@@ -161,7 +170,213 @@ def seed_demo_model_with_components():
         db.session.commit()
         print("Demo Model 1 components seeded successfully!")
 
+# =======================
+# Bulk seeding: set-based existence checks and batched executemany inserts,
+# all in one transaction. Fixture format (every key optional):
+#   {"shower_types": [{"name", "description", "profit_margin", "vat_rate", "needs_custom_quote", "image_path"}],
+#    "glass_types": [names], "thicknesses": [mm], "finishes": [names],
+#    "hardware_types": [names], "seal_types": [names],
+#    "glass_pricing": [{"glass_type", "thickness_mm", "price_per_m2"}],
+#    "hardware_pricing": [{"hardware_type", "finish", "unit_price"}],
+#    "seal_pricing": [{"seal_type", "unit_price", "quantity"}],
+#    "models": [{"name", "shower_type", "description", "image_path",
+#                "glass_components": [{"glass_type", "thickness_mm", "quantity"}],
+#                "hardware_components": [{"hardware_type", "finish", "quantity"}],
+#                "seal_components": [{"seal_type", "quantity"}],
+#                "addons": [{"name", "price"}]}],
+#    "gallery": [{"image_path", "description"}]}
+# Rows that already exist (by name, or by their unique key) are left alone;
+# components and addons are only added for newly inserted models.
+# =======================
+BULK_BATCH_SIZE = 5000
+
+def _insert_batched(conn, model, rows):
+    table = model.__table__
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        conn.execute(table.insert(), rows[start:start + BULK_BATCH_SIZE])
+    return len(rows)
+
+def _seed_lookup(conn, model, column, values, extra_fields=None):
+    """Insert the values of a unique lookup column that are missing; return value -> id for all of them."""
+    existing = dict(db.session.query(getattr(model, column), model.id))
+    missing = list(dict.fromkeys(v for v in values if v not in existing))
+    _insert_batched(conn, model, [{column: v, **(extra_fields or {})} for v in missing])
+    if missing:
+        existing = dict(db.session.query(getattr(model, column), model.id))
+    return existing, len(missing)
+
+def bulk_seed(data):
+    """Load a fixture dict in a single transaction; run inside an app context. Returns rows inserted per table."""
+    conn = db.session.connection()
+    counts = {}
+
+    shower_type_rows = {row["name"]: row for row in data.get("shower_types", [])}
+    for model_row in data.get("models", []):
+        shower_type_rows.setdefault(model_row["shower_type"], {"name": model_row["shower_type"]})
+    shower_types = dict(db.session.query(ShowerType.name, ShowerType.id))
+    new_shower_types = [
+        {"description": "", "profit_margin": 0.2, "vat_rate": 0.18, "needs_custom_quote": False, "image_path": None, **row}
+        for name, row in shower_type_rows.items() if name not in shower_types
+    ]
+    counts["shower_types"] = _insert_batched(conn, ShowerType, new_shower_types)
+    if new_shower_types:
+        shower_types = dict(db.session.query(ShowerType.name, ShowerType.id))
+
+    def names(key, *sources):
+        values = list(data.get(key, []))
+        for source, field in sources:
+            values += [row[field] for row in source]
+        return values
+
+    all_glass = list(data.get("glass_pricing", [])) + [c for m in data.get("models", []) for c in m.get("glass_components", [])]
+    all_hardware = list(data.get("hardware_pricing", [])) + [c for m in data.get("models", []) for c in m.get("hardware_components", [])]
+    all_seal = list(data.get("seal_pricing", [])) + [c for m in data.get("models", []) for c in m.get("seal_components", [])]
+    glass_types, counts["glass_types"] = _seed_lookup(conn, GlassType, "name", names("glass_types", (all_glass, "glass_type")))
+    thicknesses, counts["thicknesses"] = _seed_lookup(conn, GlassThickness, "thickness_mm", names("thicknesses", (all_glass, "thickness_mm")))
+    finishes, counts["finishes"] = _seed_lookup(conn, Finish, "name", names("finishes", (all_hardware, "finish")))
+    hardware_types, counts["hardware_types"] = _seed_lookup(conn, HardwareType, "name", names("hardware_types", (all_hardware, "hardware_type")))
+    seal_types, counts["seal_types"] = _seed_lookup(conn, SealType, "name", names("seal_types", (all_seal, "seal_type")))
+
+    existing = set(db.session.query(GlassPricing.glass_type_id, GlassPricing.thickness_id))
+    rows = {}
+    for row in data.get("glass_pricing", []):
+        key = (glass_types[row["glass_type"]], thicknesses[row["thickness_mm"]])
+        if key not in existing:
+            rows[key] = {"glass_type_id": key[0], "thickness_id": key[1], "price_per_m2": row["price_per_m2"]}
+    counts["glass_pricing"] = _insert_batched(conn, GlassPricing, list(rows.values()))
+
+    existing = set(db.session.query(HardwarePricing.hardware_type_id, HardwarePricing.finish_id))
+    rows = {}
+    for row in data.get("hardware_pricing", []):
+        key = (hardware_types[row["hardware_type"]], finishes[row["finish"]])
+        if key not in existing:
+            rows[key] = {"hardware_type_id": key[0], "finish_id": key[1], "unit_price": row["unit_price"]}
+    counts["hardware_pricing"] = _insert_batched(conn, HardwarePricing, list(rows.values()))
+
+    existing = {st for (st,) in db.session.query(SealPricing.seal_type_id)}
+    rows = {}
+    for row in data.get("seal_pricing", []):
+        st = seal_types[row["seal_type"]]
+        if st not in existing:
+            rows[st] = {"seal_type_id": st, "unit_price": row["unit_price"], "quantity": row.get("quantity", 1)}
+    counts["seal_pricing"] = _insert_batched(conn, SealPricing, list(rows.values()))
+
+    # Models are keyed by (shower type, name); only new ones get components
+    existing = set(db.session.query(Model.shower_type_id, Model.name))
+    new_models = {}
+    for row in data.get("models", []):
+        key = (shower_types[row["shower_type"]], row["name"])
+        if key not in existing and key not in new_models:
+            new_models[key] = row
+    counts["models"] = _insert_batched(conn, Model, [
+        {"name": name, "shower_type_id": st, "description": row.get("description"), "image_path": row.get("image_path")}
+        for (st, name), row in new_models.items()
+    ])
+    if new_models:
+        model_ids = {(st, name): id for id, st, name in db.session.query(Model.id, Model.shower_type_id, Model.name)}
+        glass, hardware, seal, addons = [], [], [], []
+        for key, row in new_models.items():
+            model_id = model_ids[key]
+            for c in row.get("glass_components", []):
+                glass.append({"model_id": model_id, "glass_type_id": glass_types[c["glass_type"]],
+                              "thickness_id": thicknesses[c["thickness_mm"]], "quantity": c.get("quantity", 1)})
+            for c in row.get("hardware_components", []):
+                hardware.append({"model_id": model_id, "hardware_type_id": hardware_types[c["hardware_type"]],
+                                 "finish_id": finishes[c["finish"]], "quantity": c.get("quantity", 1)})
+            for c in row.get("seal_components", []):
+                seal.append({"model_id": model_id, "seal_type_id": seal_types[c["seal_type"]], "quantity": c.get("quantity", 1)})
+            for a in row.get("addons", []):
+                addons.append({"model_id": model_id, "name": a["name"], "price": a["price"]})
+        counts["model_glass_components"] = _insert_batched(conn, ModelGlassComponent, glass)
+        counts["model_hardware_components"] = _insert_batched(conn, ModelHardwareComponent, hardware)
+        counts["model_seal_components"] = _insert_batched(conn, ModelSealComponent, seal)
+        counts["addons"] = _insert_batched(conn, Addon, addons)
+
+    existing = {path for (path,) in db.session.query(GalleryImage.image_path)}
+    gallery = {row["image_path"]: row for row in data.get("gallery", []) if row["image_path"] not in existing}
+    counts["gallery"] = _insert_batched(conn, GalleryImage, [
+        {"image_path": path, "description": row.get("description")} for path, row in gallery.items()
+    ])
+
+    if any(counts.values()):
+        bump_catalog_version(conn)
+        reset_change_log(conn)  # too many rows to log one by one; change feed clients reload instead
+        mark_dependencies(db.session, "all", ())
+    db.session.commit()
+    return counts
+
+def generate_fixture(shower_types=50, models=10000, components=100000, gallery=5000, seed=1):
+    """A synthetic fixture of the given size, for staging refreshes and load tests."""
+    rng = random.Random(seed)
+    glass_types = [f"Glass {i}" for i in range(1, 11)]
+    thicknesses = [4, 6, 8, 10, 12]
+    finishes = [f"Finish {i}" for i in range(1, 16)]
+    hardware_types = [f"Hardware {i}" for i in range(1, 41)]
+    seal_types = [f"Seal {i}" for i in range(1, 21)]
+    model_rows = [
+        {"name": f"Model {i}", "shower_type": f"Shower Type {rng.randint(1, shower_types)}",
+         "description": f"Synthetic model {i}", "image_path": f"/static/uploads/model_{i}.jpg",
+         "glass_components": [], "hardware_components": [], "seal_components": [], "addons": []}
+        for i in range(1, models + 1)
+    ]
+    for n in range(components):
+        model = model_rows[n % models]
+        kind = n % 10
+        if kind < 3:
+            model["glass_components"].append({"glass_type": rng.choice(glass_types), "thickness_mm": rng.choice(thicknesses),
+                                              "quantity": rng.randint(1, 3)})
+        elif kind < 8:
+            model["hardware_components"].append({"hardware_type": rng.choice(hardware_types), "finish": rng.choice(finishes),
+                                                 "quantity": rng.randint(1, 6)})
+        else:
+            model["seal_components"].append({"seal_type": rng.choice(seal_types), "quantity": rng.randint(1, 4)})
+    for i in range(1, models // 2 + 1):
+        rng.choice(model_rows)["addons"].append({"name": f"Addon {i}", "price": round(rng.uniform(10, 200), 2)})
+    return {
+        "shower_types": [{"name": f"Shower Type {i}"} for i in range(1, shower_types + 1)],
+        "glass_types": glass_types, "thicknesses": thicknesses, "finishes": finishes,
+        "hardware_types": hardware_types, "seal_types": seal_types,
+        "glass_pricing": [{"glass_type": g, "thickness_mm": t, "price_per_m2": round(rng.uniform(60, 250), 2)}
+                          for g in glass_types for t in thicknesses],
+        "hardware_pricing": [{"hardware_type": h, "finish": f, "unit_price": round(rng.uniform(5, 150), 2)}
+                             for h in hardware_types for f in finishes],
+        "seal_pricing": [{"seal_type": s, "unit_price": round(rng.uniform(2, 40), 2)} for s in seal_types],
+        "models": model_rows,
+        "gallery": [{"image_path": f"/static/uploads/gallery_{i}.jpg", "description": f"Gallery image {i}"}
+                    for i in range(1, gallery + 1)],
+    }
+
+def run_bulk_seed(data):
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        counts = bulk_seed(data)
+        for table, count in counts.items():
+            print(f"{table}: {count} inserted")
+        print(f"Bulk seed finished in {time.perf_counter() - started:.2f}s")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create the admin user and seed reference data.")
+    parser.add_argument("--bulk", metavar="FIXTURE.json", help="bulk-load a fixture file instead of the demo seed")
+    parser.add_argument("--generate", type=int, metavar="MODELS", help="bulk-load a generated catalog with this many models")
+    parser.add_argument("--components", type=int, help="component rows for --generate (default: 10 per model)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for --generate")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.bulk or args.generate:
+        if args.bulk:
+            with open(args.bulk) as f:
+                run_bulk_seed(json.load(f))
+        else:
+            components = args.components if args.components is not None else args.generate * 10
+            run_bulk_seed(generate_fixture(
+                shower_types=50, models=args.generate, components=components,
+                gallery=args.generate // 2, seed=args.seed
+            ))
+        raise SystemExit(0)
+
     admin_username = os.getenv('ADMIN_USERNAME', 'admin')
     admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')
     create_admin_user(admin_username, admin_password)
@@ -1,17 +1,42 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (
+    JWTManager, create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity, jwt_required
+)
+from jwt.exceptions import PyJWTError
 from models import (
     db, ShowerType, Model, GlassType, Finish, Addon, GalleryImage, Admin,
     GlassThickness, GlassPricing,
     HardwareType, HardwarePricing,
     SealType, SealPricing, 
-    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent, Quote,
+    MODEL_LOAD_OPTIONS,
+    GLASS_COMPONENT_LOAD_OPTIONS, HARDWARE_COMPONENT_LOAD_OPTIONS, SEAL_COMPONENT_LOAD_OPTIONS
 )
-from werkzeug.utils import secure_filename
+from cache import cached_response, response_cache
+from catalog import get_catalog_bundle
+from changelog import ChangeLogCompacted, changes_since, compact_change_log
+from database import configure_database, init_read_engine, retry_on_locked
+from chunked_uploads import UploadSessionError, create_session, load_session, session_dir
+from images import schedule_image_derivatives
+from migrations import prepare_database
+from auth import AuthBusyError, is_token_revoked, login_throttle, revoke_token, verify_password
+from metrics import PROMETHEUS_CONTENT_TYPE, init_metrics, registry as metrics_registry
+from listing import ListArgsError, list_response
+from readers import read_dicts, read_list_response
+from json_provider import init_json
+from facets import get_facet_index, search_models
+from batch import BatchError, run_batch
+from bom import BomError, apply_bom
+from price_matrix import PriceMatrixError, export_csv, export_json, import_matrix, parse_csv
+from storage import send_stored_file, store_content_addressed
+from quotes import QuoteQueueFull, build_quote_record, quote_writer, replay_dead_letters, export_csv as export_quotes_csv
+from pricing import QuoteError, RepricingError, compute_quote, get_price_tables, np, what_if
+from werkzeug.datastructures import FileStorage
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
+from datetime import timedelta
 import os
-import uuid
 
 load_dotenv()
 
@@ -20,22 +45,44 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///sho
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key-change-me')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key')
+app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15)))
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 30)))
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 4 * 1024 * 1024))  # Default to 4MB
+app.config['CHUNKED_UPLOAD_MAX_SIZE'] = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 200 * 1024 * 1024))
+app.config['UPLOAD_CACHE_MAX_AGE'] = int(os.getenv('UPLOAD_CACHE_MAX_AGE', 365 * 24 * 3600))
+app.config['UPLOAD_SENDFILE'] = os.getenv('UPLOAD_SENDFILE', '').lower()  # '', 'x-sendfile' or 'x-accel-redirect'
+app.config['UPLOAD_ACCEL_PREFIX'] = os.getenv('UPLOAD_ACCEL_PREFIX', '/_uploads_internal')
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512))
+app.config['TRUSTED_PROXY_HOPS'] = int(os.getenv('TRUSTED_PROXY_HOPS', 1))  # proxies in front (nginx); 0 when exposed directly
 app.debug = os.getenv('DEBUG', 'False').lower() == 'true'
 
+if app.config['TRUSTED_PROXY_HOPS']:
+    # remote_addr (login throttling) and the URL scheme come from the proxy's X-Forwarded-* headers
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
+configure_database(app)
 db.init_app(app)
 CORS(app, supports_credentials=True)
 jwt = JWTManager(app)
+jwt.token_in_blocklist_loader(lambda jwt_header, jwt_payload: is_token_revoked(jwt_payload))
+init_json(app)  # before init_metrics, which wraps app.json
+init_metrics(app)
+response_cache.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+
+with app.app_context():
+    init_read_engine(db)
 
 from functools import wraps
 
 def admin_required(fn):
     @wraps(fn)
     @jwt_required()
+    @retry_on_locked
     def wrapper(*args, **kwargs):
         admin_id = get_jwt_identity()
         if not admin_id:
@@ -53,25 +100,56 @@ def login():
     data = request.get_json()
     username = data.get("username")
     password = data.get("password")
+    ip = request.remote_addr
+    retry_after = login_throttle.retry_after(username, ip)
+    if retry_after:
+        return jsonify({"success": False, "error": "Too many failed logins, try again later"}), 429, {"Retry-After": str(retry_after)}
     admin = Admin.query.filter_by(username=username).first()
-    if admin and admin.check_password(password):
-        access_token = create_access_token(
-            identity=str(admin.id),
-            additional_claims={"role": "admin"}
-        )
-        return jsonify({"success": True, "access_token": access_token})
+    try:
+        valid = admin is not None and verify_password(admin.password_hash, password)
+    except AuthBusyError as e:
+        return jsonify({"success": False, "error": str(e)}), 503, {"Retry-After": "1"}
+    if valid:
+        login_throttle.succeeded(username)
+        claims = {"role": "admin"}
+        return jsonify({
+            "success": True,
+            "access_token": create_access_token(identity=str(admin.id), additional_claims=claims),
+            "refresh_token": create_refresh_token(identity=str(admin.id), additional_claims=claims),
+        })
+    login_throttle.failed(username, ip)
     return jsonify({"success": False, "error": "Invalid credentials"}), 401
 
+@app.route("/api/token/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh_token():
+    # No password check: the refresh token itself (unless revoked) is the credential
+    access_token = create_access_token(identity=get_jwt_identity(), additional_claims={"role": get_jwt().get("role")})
+    return jsonify({"success": True, "access_token": access_token})
+
 @app.route("/api/logout", methods=["POST"])
-@jwt_required()
+@jwt_required(verify_type=False)
 def logout():
-    return jsonify({"success": True, "message": "Logged out (client should discard JWT token)."})
+    """Revoke the refresh token, sent either as the bearer token or as "refresh_token" in the body."""
+    payload = get_jwt()
+    if payload["type"] != "refresh":
+        token = (request.get_json(silent=True) or {}).get("refresh_token")
+        if not token:
+            return jsonify({"success": True, "message": "Logged out (client should discard JWT token)."})
+        try:
+            payload = decode_token(token)
+        except PyJWTError:
+            return jsonify({"error": "Invalid refresh token"}), 400
+        if payload["type"] != "refresh" or payload["sub"] != get_jwt_identity():
+            return jsonify({"error": "Invalid refresh token"}), 400
+    revoke_token(payload)
+    return jsonify({"success": True, "message": "Logged out; refresh token revoked."})
 
 # ==== SHOWER TYPES CRUD ====
 @app.route("/api/shower-types", methods=["GET"])
+@cached_response
 def get_shower_types():
-    types = ShowerType.query.all()
-    return jsonify([t.to_dict() for t in types])
+    return jsonify(read_dicts(ShowerType))
 
 @app.route("/api/shower-types", methods=["POST"])
 @admin_required
@@ -87,6 +165,7 @@ def create_shower_type():
     )
     db.session.add(t)
     db.session.commit()
+    schedule_image_derivatives(t.image_path)
     return jsonify(t.to_dict()), 201
 
 @app.route("/api/shower-types/<int:id>", methods=["PUT"])
@@ -100,8 +179,9 @@ def update_shower_type(id):
     t.vat_rate = data.get("vat_rate", t.vat_rate)
     t.needs_custom_quote = data.get("needs_custom_quote", t.needs_custom_quote)
     if "image_path" in data:
-        t.image_path = data["image_path"]
+        t.set_image_path(data["image_path"])
     db.session.commit()
+    schedule_image_derivatives(t.image_path)
     return jsonify(t.to_dict())
 
 @app.route("/api/shower-types/<int:id>", methods=["DELETE"])
@@ -120,15 +200,28 @@ def upload_shower_type_image(id):
     if not image_file:
         return jsonify({"error": "No file uploaded"}), 400
     image_path = save_image(image_file)
-    t.image_path = image_path
+    t.set_image_path(image_path)
     db.session.commit()
+    schedule_image_derivatives(t.image_path)
     return jsonify(t.to_dict())
 
 # ==== MODELS CRUD ====
+# ?sort=price / ?sort=-price and ?min_price= / ?max_price= use the indexed from_price
+MODEL_SORTS = {"price": "from_price"}
+
 @app.route("/api/models", methods=["GET"])
+@cached_response
 def get_models():
-    models = Model.query.all()
-    return jsonify([m.to_dict() for m in models])
+    return read_list_response(Model, filters=("shower_type_id",), sorts=MODEL_SORTS)
+
+@app.route("/api/models/search", methods=["GET"])
+@cached_response
+def search_catalog_models():
+    """Faceted model search over the in-memory facet bitmaps; see facets.search_models."""
+    try:
+        return jsonify(search_models(get_facet_index(), request.args))
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
 
 @app.route("/api/models", methods=["POST"])
 @admin_required
@@ -147,6 +240,7 @@ def add_model():
         )
         db.session.add(model)
         db.session.commit()
+        schedule_image_derivatives(model.image_path)
         return jsonify(model.to_dict())
     else:
         data = request.get_json()
@@ -158,6 +252,7 @@ def add_model():
         )
         db.session.add(model)
         db.session.commit()
+        schedule_image_derivatives(model.image_path)
         return jsonify(model.to_dict())
 
 @app.route("/api/models/<int:model_id>", methods=["PUT"])
@@ -173,14 +268,15 @@ def update_model(model_id):
         if description: model.description = description
         if shower_type_id: model.shower_type_id = shower_type_id
         if image_file:
-            model.image_path = save_image(image_file)
+            model.set_image_path(save_image(image_file))
     else:
         data = request.get_json()
         if "name" in data: model.name = data.get("name")
         if "description" in data: model.description = data.get("description")
-        if "image_path" in data: model.image_path = data.get("image_path")
+        if "image_path" in data: model.set_image_path(data.get("image_path"))
         if "shower_type_id" in data: model.shower_type_id = data.get("shower_type_id")
     db.session.commit()
+    schedule_image_derivatives(model.image_path)
     return jsonify(model.to_dict())
 
 @app.route("/api/models/<int:model_id>", methods=["DELETE"])
@@ -195,6 +291,20 @@ def delete_model(model_id):
     db.session.commit()
     return jsonify({"success": True})
 
+@app.route("/api/models/<int:model_id>/bom", methods=["PUT"])
+@admin_required
+def replace_model_bom(model_id):
+    """Replace the model's components and addons in one transaction."""
+    model = Model.query.options(*MODEL_LOAD_OPTIONS).get_or_404(model_id)
+    try:
+        apply_bom(model, request.get_json(silent=True))
+    except BomError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "errors": e.errors}), 400
+    db.session.commit()
+    model = Model.query.options(*MODEL_LOAD_OPTIONS).get(model_id)
+    return jsonify(model.to_dict())
+
 @app.route("/api/models/<int:model_id>/upload-image", methods=["POST"])
 @admin_required
 def upload_model_image(model_id):
@@ -203,24 +313,22 @@ def upload_model_image(model_id):
     if not image_file:
         return jsonify({"error": "No file uploaded"}), 400
     image_path = save_image(image_file)
-    model.image_path = image_path
+    model.set_image_path(image_path)
     db.session.commit()
+    schedule_image_derivatives(model.image_path)
     return jsonify(model.to_dict())
 
 def save_image(file):
     if not file: return None
-    filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
     upload_dir = os.path.join(app.root_path, "static", "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-    filepath = os.path.join(upload_dir, filename)
-    file.save(filepath)
+    filename = store_content_addressed(file.stream, upload_dir, file.filename)
     return f"/static/uploads/{filename}"
 
 # ==== GLASS TYPES CRUD ====
 @app.route("/api/glass-types", methods=["GET"])
+@cached_response
 def get_glass_types():
-    glass_types = GlassType.query.all()
-    return jsonify([g.to_dict() for g in glass_types])
+    return jsonify(read_dicts(GlassType))
 
 @app.route("/api/glass-types", methods=["POST"])
 @admin_required
@@ -254,9 +362,9 @@ def delete_glass_type(glass_type_id):
 # ==== GLASS THICKNESS CRUD ====
 @app.route("/api/glass-thickness", methods=["GET"])
 @app.route("/api/glass-thicknesses", methods=["GET"])
+@cached_response
 def get_glass_thickness():
-    thicknesses = GlassThickness.query.all()
-    return jsonify([t.to_dict() for t in thicknesses])
+    return jsonify(read_dicts(GlassThickness))
 
 @app.route("/api/glass-thickness", methods=["POST"])
 @admin_required
@@ -286,9 +394,9 @@ def delete_glass_thickness(thickness_id):
 
 # ==== GLASS PRICING CRUD ====
 @app.route("/api/glass-pricing", methods=["GET"])
+@cached_response
 def get_glass_pricing():
-    glass_pricing = GlassPricing.query.all()
-    return jsonify([p.to_dict() for p in glass_pricing])
+    return read_list_response(GlassPricing, filters=("glass_type_id", "thickness_id"))
 
 @app.route("/api/glass-pricing", methods=["POST"])
 @admin_required
@@ -324,9 +432,9 @@ def delete_glass_pricing(price_id):
 
 # ==== FINISH CRUD ====
 @app.route("/api/finishes", methods=["GET"])
+@cached_response
 def get_finishes():
-    finishes = Finish.query.all()
-    return jsonify([f.to_dict() for f in finishes])
+    return jsonify(read_dicts(Finish))
 
 @app.route("/api/finishes", methods=["POST"])
 @admin_required
@@ -356,9 +464,9 @@ def delete_finish(finish_id):
 
 # ==== HARDWARE TYPES CRUD ====
 @app.route("/api/hardware-types", methods=["GET"])
+@cached_response
 def get_hardware_types():
-    types = HardwareType.query.all()
-    return jsonify([t.to_dict() for t in types])
+    return jsonify(read_dicts(HardwareType))
 
 @app.route("/api/hardware-types", methods=["POST"])
 @admin_required
@@ -388,9 +496,9 @@ def delete_hardware_type(type_id):
 
 # ==== HARDWARE PRICING CRUD ====
 @app.route("/api/hardware-pricing", methods=["GET"])
+@cached_response
 def get_hardware_pricing():
-    pricing = HardwarePricing.query.all()
-    return jsonify([p.to_dict() for p in pricing])
+    return read_list_response(HardwarePricing, filters=("hardware_type_id", "finish_id"))
 
 @app.route("/api/hardware-pricing", methods=["POST"])
 @admin_required
@@ -426,9 +534,9 @@ def delete_hardware_pricing(price_id):
 
 # ==== SEAL TYPES CRUD ====
 @app.route("/api/seal-types", methods=["GET"])
+@cached_response
 def get_seal_types():
-    types = SealType.query.all()
-    return jsonify([t.to_dict() for t in types])
+    return jsonify(read_dicts(SealType))
 
 @app.route("/api/seal-types", methods=["POST"])
 @admin_required
@@ -458,9 +566,9 @@ def delete_seal_type(type_id):
 
 # ==== SEAL PRICING CRUD ====
 @app.route("/api/seal-pricing", methods=["GET"])
+@cached_response
 def get_seal_pricing():
-    pricing = SealPricing.query.all()
-    return jsonify([p.to_dict() for p in pricing])
+    return read_list_response(SealPricing, filters=("seal_type_id",))
 
 @app.route("/api/seal-pricing", methods=["POST"])
 @admin_required
@@ -524,8 +632,9 @@ def delete_seal_pricing(price_id):
 
 # ==== MODEL COMPONENTS: GLASS, HARDWARE, SEAL ====
 @app.route("/api/model-glass-components/<int:model_id>", methods=["GET"])
+@cached_response
 def get_model_glass_components(model_id):
-    components = ModelGlassComponent.query.filter_by(model_id=model_id).all()
+    components = ModelGlassComponent.query.options(*GLASS_COMPONENT_LOAD_OPTIONS).filter_by(model_id=model_id).all()
     return jsonify([c.to_dict() for c in components])
 
 @app.route("/api/model-glass-components", methods=["POST"])
@@ -562,8 +671,9 @@ def delete_model_glass_component(comp_id):
     return jsonify({"success": True})
 
 @app.route("/api/model-hardware-components/<int:model_id>", methods=["GET"])
+@cached_response
 def get_model_hardware_components(model_id):
-    components = ModelHardwareComponent.query.filter_by(model_id=model_id).all()
+    components = ModelHardwareComponent.query.options(*HARDWARE_COMPONENT_LOAD_OPTIONS).filter_by(model_id=model_id).all()
     return jsonify([c.to_dict() for c in components])
 
 @app.route("/api/model-hardware-components", methods=["POST"])
@@ -601,8 +711,9 @@ def delete_model_hardware_component(comp_id):
 # ==== MODEL SEAL COMPONENTS CRUD ====
 
 @app.route("/api/model-seal-components/<int:model_id>", methods=["GET"])
+@cached_response
 def get_model_seal_components(model_id):
-    components = ModelSealComponent.query.filter_by(model_id=model_id).all()
+    components = ModelSealComponent.query.options(*SEAL_COMPONENT_LOAD_OPTIONS).filter_by(model_id=model_id).all()
     return jsonify([c.to_dict() for c in components])
 
 @app.route("/api/model-seal-components", methods=["POST"])
@@ -638,13 +749,9 @@ def delete_model_seal_component(comp_id):
 
 # ==== ADDONS CRUD ====
 @app.route("/api/addons", methods=["GET"])
+@cached_response
 def get_addons():
-    model_id = request.args.get('model_id')
-    if model_id:
-        addons = Addon.query.filter_by(model_id=model_id).all()
-    else:
-        addons = Addon.query.all()
-    return jsonify([a.to_dict() for a in addons])
+    return read_list_response(Addon, filters=("model_id",))
 
 @app.route("/api/addons", methods=["POST"])
 @admin_required
@@ -680,9 +787,9 @@ def delete_addon(addon_id):
 
 # ==== GALLERY CRUD ====
 @app.route("/api/gallery", methods=["GET"])
+@cached_response
 def get_gallery():
-    images = GalleryImage.query.all()
-    return jsonify([img.to_dict() for img in images])
+    return read_list_response(GalleryImage)
 
 @app.route("/api/gallery", methods=["POST"])
 @admin_required
@@ -694,6 +801,7 @@ def add_gallery_image():
     )
     db.session.add(image)
     db.session.commit()
+    schedule_image_derivatives(image.image_path)
     return jsonify({"success": True, "id": image.id})
 
 @app.route("/api/gallery/<int:image_id>", methods=["PUT"])
@@ -701,9 +809,10 @@ def add_gallery_image():
 def update_gallery_image(image_id):
     data = request.get_json()
     image = GalleryImage.query.get_or_404(image_id)
-    image.image_path = data.get("image_path", image.image_path)
+    image.set_image_path(data.get("image_path", image.image_path))
     image.description = data.get("description", image.description)
     db.session.commit()
+    schedule_image_derivatives(image.image_path)
     return jsonify({"success": True})
 
 @app.route("/api/gallery/<int:image_id>", methods=["DELETE"])
@@ -728,27 +837,287 @@ def upload_image():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
     if file and allowed_file(file.filename):
-        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        filename = store_content_addressed(file.stream, app.config['UPLOAD_FOLDER'], file.filename)
         image_path = f"/uploads/{filename}"
+        schedule_image_derivatives(image_path)
         return jsonify({"success": True, "image_path": image_path})
     return jsonify({"error": "Invalid file type"}), 400
 
-@app.route('/uploads/<filename>')
+# ==== RESUMABLE CHUNKED UPLOADS ====
+# POST /api/uploads {filename, size, sha256}   -> session with offset 0
+# PUT  /api/uploads/<id>  raw bytes, Content-Range: bytes <start>-<end>/<size> (or ?offset=)
+# GET  /api/uploads/<id>                       -> current offset, to resume after a drop
+# POST /api/uploads/<id>/finalize              -> checksum verified, stored via save_image
+def upload_session_error(e):
+    return jsonify({"error": str(e), **e.extra}), e.status
+
+def chunk_offset():
+    content_range = request.headers.get("Content-Range", "")
+    if content_range.startswith("bytes "):
+        return int(content_range[len("bytes "):].split("-", 1)[0])
+    return int(request.args.get("offset", 0))
+
+@app.route("/api/uploads", methods=["POST"])
+@admin_required
+def create_chunked_upload():
+    data = request.get_json() or {}
+    filename = data.get("filename") or ""
+    if not allowed_file(filename):
+        return jsonify({"error": "Invalid file type"}), 400
+    try:
+        session = create_session(
+            session_dir(app.config['UPLOAD_FOLDER']), filename, data.get("size"),
+            data.get("sha256"), app.config['CHUNKED_UPLOAD_MAX_SIZE']
+        )
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    return jsonify(session.to_dict()), 201
+
+@app.route("/api/uploads/<upload_id>", methods=["GET"])
+@admin_required
+def get_chunked_upload(upload_id):
+    try:
+        session = load_session(session_dir(app.config['UPLOAD_FOLDER']), upload_id)
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    return jsonify(session.to_dict())
+
+@app.route("/api/uploads/<upload_id>", methods=["PUT"])
+@admin_required
+def put_chunked_upload(upload_id):
+    try:
+        offset = chunk_offset()
+    except ValueError:
+        return jsonify({"error": "Invalid offset"}), 400
+    try:
+        session = load_session(session_dir(app.config['UPLOAD_FOLDER']), upload_id)
+        session.append(request.stream, offset)
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    return jsonify(session.to_dict())
+
+@app.route("/api/uploads/<upload_id>/finalize", methods=["POST"])
+@admin_required
+def finalize_chunked_upload(upload_id):
+    try:
+        session = load_session(session_dir(app.config['UPLOAD_FOLDER']), upload_id)
+        with session.locked():
+            session.verify()
+            with open(session.part_path, "rb") as part:
+                image_path = save_image(FileStorage(stream=part, filename=session.meta["filename"]))
+            session.discard()
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    schedule_image_derivatives(image_path)
+    return jsonify({"success": True, "image_path": image_path})
+
+@app.route("/api/uploads/<upload_id>", methods=["DELETE"])
+@admin_required
+def delete_chunked_upload(upload_id):
+    try:
+        session = load_session(session_dir(app.config['UPLOAD_FOLDER']), upload_id)
+        with session.locked():
+            session.discard()
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    return jsonify({"success": True})
+
+@app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    directory = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+    return send_stored_file(directory, filename, f"/uploads/{filename}")
+
+@app.route('/static/uploads/<path:filename>')
+def static_uploaded_file(filename):
+    directory = os.path.join(app.root_path, "static", "uploads")
+    return send_stored_file(directory, filename, f"/static/uploads/{filename}")
 
 # ==== PRICES ENDPOINT ====
 @app.route("/api/prices", methods=["GET"])
+@cached_response
 def get_all_prices():
     prices = {
-        "glass": [p.to_dict() for p in GlassPricing.query.all()],
-        "hardware": [p.to_dict() for p in HardwarePricing.query.all()],
-        "seal": [p.to_dict() for p in SealPricing.query.all()]
+        "glass": read_dicts(GlassPricing),
+        "hardware": read_dicts(HardwarePricing),
+        "seal": read_dicts(SealPricing),
     }
     return jsonify(prices)
 
+# ==== BULK PRICING MATRIX ====
+@app.route("/api/pricing/import", methods=["POST"])
+@admin_required
+def import_pricing_matrix():
+    try:
+        upload = request.files.get("file")
+        if upload:
+            matrix = parse_csv(upload.read().decode("utf-8-sig"))
+        elif request.mimetype == "text/csv":
+            matrix = parse_csv(request.get_data(as_text=True))
+        else:
+            matrix = request.get_json(silent=True)
+        result = import_matrix(matrix)
+    except PriceMatrixError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "errors": e.errors}), 400
+    db.session.commit()
+    return jsonify({"success": True, **result})
+
+@app.route("/api/pricing/export", methods=["GET"])
+@admin_required
+def export_pricing_matrix():
+    if request.args.get("format", "csv") == "json":
+        body = export_json(lambda row: app.json.dumps(row, separators=(",", ":")))
+        return Response(stream_with_context(body), mimetype="application/json")
+    return Response(
+        stream_with_context(export_csv()), mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=price_matrix.csv"}
+    )
+
+# ==== CATALOG BOOTSTRAP ====
+@app.route("/api/catalog", methods=["GET"])
+def get_catalog():
+    return get_catalog_bundle().to_response()
+
+# ==== CHANGE FEED ====
+@app.route("/api/changes", methods=["GET"])
+@cached_response
+def get_changes():
+    """Catalog rows written after ?since=<seq>, for clients mirroring the catalog.
+
+    Start from the change_seq of /api/catalog and pass next_since back until
+    has_more is false. 410 means the cursor predates compaction: reload /api/catalog.
+    """
+    try:
+        return jsonify(changes_since(db.session, request.args))
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
+    except ChangeLogCompacted as e:
+        return jsonify({"error": str(e), "resync": True, "horizon": e.horizon, "latest": e.latest}), 410
+
+# ==== QUOTE ENGINE ====
+@app.route("/api/quote", methods=["POST"])
+def quote():
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({"error": "JSON body required"}), 400
+    tables = get_price_tables()
+    if isinstance(data, list):
+        results = []
+        for config in data:
+            try:
+                results.append(compute_quote(tables, config))
+            except QuoteError as e:
+                results.append({"error": str(e)})
+        return jsonify(results)
+    try:
+        return jsonify(compute_quote(tables, data))
+    except QuoteError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/api/pricing/what-if", methods=["POST"])
+@admin_required
+def pricing_what_if():
+    """Every model's old and new price under hypothetical pricing changes; nothing is saved."""
+    if np is None:
+        return jsonify({"error": "What-if repricing needs numpy installed"}), 501
+    only_changed = request.args.get("all", "false").lower() != "true"
+    try:
+        return jsonify(what_if(get_price_tables(), request.get_json(silent=True), only_changed=only_changed))
+    except RepricingError as e:
+        return jsonify({"success": False, "errors": e.errors}), 400
+
+# ==== CUSTOMER QUOTES ====
+# Submissions are priced and queued; the write-behind writer in quotes.py
+# saves them in batches, so the 202 does not wait on a database commit
+@app.route("/api/quotes", methods=["POST"])
+def submit_quote():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "JSON object required"}), 400
+    try:
+        breakdown = compute_quote(get_price_tables(), data)
+        record = build_quote_record(breakdown, data)
+    except QuoteError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        quote_writer.submit(app, record)
+    except QuoteQueueFull as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+    return jsonify({"reference": record["quote"]["reference"], "status": "queued", "quote": breakdown}), 202
+
+@app.route("/api/quotes", methods=["GET"])
+@admin_required
+def get_quotes():
+    return list_response(Quote.query, Quote, Quote.to_dict, filters=("model_id",))
+
+@app.route("/api/quotes/<int:quote_id>", methods=["GET"])
+@admin_required
+def get_quote(quote_id):
+    quote = Quote.query.get_or_404(quote_id)
+    return jsonify(quote.to_dict(with_lines=True))
+
+@app.route("/api/quotes/export", methods=["GET"])
+@admin_required
+def export_quotes():
+    return Response(
+        stream_with_context(export_quotes_csv()), mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=quotes.csv"}
+    )
+
+# ==== BATCH ====
+@app.route("/api/batch", methods=["POST"])
+@admin_required
+def batch_operations():
+    data = request.get_json(silent=True)
+    operations = data.get("operations") if isinstance(data, dict) else data
+    try:
+        status, results = run_batch(app, operations)
+    except BatchError as e:
+        return jsonify({"success": False, "error": str(e), "failed": e.index}), 400
+    if status != 200:
+        return jsonify({"success": False, "failed": len(results) - 1, "results": results}), status
+    return jsonify({"success": True, "results": results})
+
+# ==== METRICS ====
+@app.route("/api/metrics", methods=["GET"])
+@admin_required
+def get_metrics():
+    return Response(metrics_registry.render(db.engines), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+# ==== CLI ====
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations; run once per deploy."""
+    applied = prepare_database()
+    print("Applied: " + ", ".join(applied) if applied else "Database is up to date.")
+
+@app.cli.command("replay-quotes")
+def replay_quotes_command():
+    """Save the customer quotes the write-behind queue could not, from the dead-letter file."""
+    saved, skipped, failed = replay_dead_letters(app)
+    print(f"Saved {saved} quotes, skipped {skipped} already stored, {failed} still failing.")
+    if failed:
+        raise SystemExit(1)
+
+@app.cli.command("compact-changes")
+def compact_changes_command():
+    """Drop superseded change log entries and expired tombstones."""
+    removed = compact_change_log(db.session.connection())
+    db.session.commit()
+    print(f"Removed {removed} change log entries.")
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    """Fail if an indexed endpoint's SQL fully scans a large table."""
+    from query_plans import check_query_plans
+    failures = check_query_plans(app)
+    for url, statement, detail in failures:
+        print(f"{url}: {detail}\n    {' '.join(statement.split())}")
+    if failures:
+        raise SystemExit(1)
+    print("No full table scans on large tables.")
+
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        prepare_database()  # single dev process; deployments run flask db-upgrade
     app.run(debug=app.debug)
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Optional ASGI deployment: async public reads, everything else via Flask.
+
+The catalog read endpoints below run as coroutines over an async driver
+(aiosqlite, or asyncpg/aiomysql for server databases) using the same
+models.py mappings. Every other route, including all admin writes, is
+served by the unchanged Flask app on a thread pool behind a WSGI adapter.
+
+    uvicorn asgi:app --workers 4
+
+Responses share the Flask process's response cache, ETags and JSON
+encoding, so both paths return identical bytes for the same URL.
+"""
+import contextlib
+import os
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event, select
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import MODEL_SORTS, app as flask_app
+from cache import CachedResponse, response_cache
+from database import READ_BIND, sqlite_pragmas
+from listing import ListArgsError, list_payload, narrow, parse_list_args
+from models import (
+    db, CatalogVersion, ShowerType, Model, GlassType, GlassThickness, Finish, HardwareType, SealType,
+    GlassPricing, HardwarePricing, SealPricing, Addon, GalleryImage
+)
+from readers import READERS
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "mysql": "mysql+aiomysql"}
+
+
+def async_database_uri(uri):
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+def create_read_engine():
+    """Async engine for reads: ASYNC_DATABASE_URI, else the Flask read engine's database with an async driver."""
+    uri = os.getenv("ASYNC_DATABASE_URI")
+    if not uri:
+        # The resolved engine URL, not the config: Flask-SQLAlchemy moves relative SQLite paths into instance/
+        with flask_app.app_context():
+            uri = async_database_uri(db.engines.get(READ_BIND, db.engine).url)
+    engine = create_async_engine(uri, pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", 20)),
+                                 max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20)), pool_pre_ping=True)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine.sync_engine, "connect")
+        def _sqlite_read_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in sqlite_pragmas() + ["PRAGMA query_only=ON"]:
+                cursor.execute(pragma)
+            cursor.close()
+    return engine
+
+engine = create_read_engine()
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+# =======================
+# Responses: bodies are encoded by the Flask app's JSON provider and stored
+# in the shared response cache under Flask's full_path key
+# =======================
+def encode(data):
+    return flask_app.json.response(data).get_data()
+
+def _with_cors(request, response):
+    # Same headers flask_cors adds for CORS(app, supports_credentials=True)
+    origin = request.headers.get("origin")
+    if origin:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.headers.append("Vary", "Origin")
+    return response
+
+def conditional_response(request, entry):
+    headers = {"ETag": f'"{entry.etag}"', "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or f'"{entry.etag}"' in (t.strip().removeprefix("W/") for t in if_none_match.split(",")):
+        return _with_cors(request, Response(status_code=304, headers=headers))
+    return _with_cors(request, Response(entry.body, media_type=entry.mimetype, headers=headers))
+
+def cached_endpoint(handler):
+    """Async counterpart of cache.cached_response; handler(request, session) returns data or an error Response."""
+    async def endpoint(request):
+        async with Session() as session:
+            version = await session.scalar(select(CatalogVersion.version).filter_by(id=1)) or 0
+            key = f"{request.url.path}?{request.url.query}"
+            entry = response_cache.get(version, key)
+            if entry is None:
+                data = await handler(request, session)
+                if isinstance(data, Response):
+                    return _with_cors(request, data)
+                entry = CachedResponse(encode(data), "application/json")
+                response_cache.put(version, key, entry)
+        return conditional_response(request, entry)
+    return endpoint
+
+
+# =======================
+# Handlers: the same RowReader statements as the Flask routes, on the
+# async session
+# =======================
+async def read_rows(session, reader, stmt, fields=None, limit=None):
+    """(rows, per-row serializer) for stmt, loading the child rows of the first limit rows (all when None)."""
+    rows = (await session.execute(stmt)).all()
+    children = [(key, (await session.execute(child)).all())
+                for key, child in reader.child_statements(rows[:limit], stmt, fields)]
+    return rows, reader.serializer(children, fields)
+
+def all_rows(model):
+    reader = READERS[model]
+    async def handler(request, session):
+        rows, serialize = await read_rows(session, reader, reader.select().order_by(model.id))
+        return [serialize(row) for row in rows]
+    return handler
+
+def paged_list(model, filters=(), sorts=None):
+    """Async counterpart of readers.read_list_response."""
+    reader = READERS[model]
+    async def handler(request, session):
+        try:
+            list_args = parse_list_args(request.query_params, filters, sorts)
+        except ListArgsError as e:
+            return Response(encode({"error": str(e)}), status_code=400, media_type="application/json")
+        rows, serialize = await read_rows(session, reader, narrow(reader.select(), model, list_args),
+                                          list_args.fields, list_args.limit)
+        return list_payload(rows, list_args, serialize)
+    return handler
+
+async def all_prices(request, session):
+    return {key: await all_rows(model)(request, session)
+            for key, model in (("glass", GlassPricing), ("hardware", HardwarePricing), ("seal", SealPricing))}
+
+ASYNC_ROUTES = [
+    ("/api/shower-types", all_rows(ShowerType)),
+    ("/api/models", paged_list(Model, ("shower_type_id",), MODEL_SORTS)),
+    ("/api/glass-types", all_rows(GlassType)),
+    ("/api/glass-thicknesses", all_rows(GlassThickness)),
+    ("/api/finishes", all_rows(Finish)),
+    ("/api/hardware-types", all_rows(HardwareType)),
+    ("/api/seal-types", all_rows(SealType)),
+    ("/api/glass-pricing", paged_list(GlassPricing, ("glass_type_id", "thickness_id"))),
+    ("/api/hardware-pricing", paged_list(HardwarePricing, ("hardware_type_id", "finish_id"))),
+    ("/api/seal-pricing", paged_list(SealPricing, ("seal_type_id",))),
+    ("/api/addons", paged_list(Addon, ("model_id",))),
+    ("/api/gallery", paged_list(GalleryImage)),
+    ("/api/prices", all_prices),
+]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+# Other methods on these paths (POST/PUT/DELETE, CORS preflight) fall
+# through to the Flask mount
+app = Starlette(
+    routes=[Route(path, cached_endpoint(handler), methods=["GET"]) for path, handler in ASYNC_ROUTES] + [
+        Mount("/", app=WSGIMiddleware(flask_app, workers=int(os.getenv("WSGI_THREADS", 10)))),
+    ],
+    lifespan=lifespan,
+)
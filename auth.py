@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from flask_bcrypt import check_password_hash
+from sqlalchemy.exc import IntegrityError
+
+from models import db, RevokedToken
+
+
+class AuthBusyError(Exception):
+    pass
+
+
+# =======================
+# Password verification: bcrypt runs on a small dedicated pool, so a burst
+# of logins uses at most PASSWORD_HASH_WORKERS cores and the rest keep
+# serving the catalog. Beyond PASSWORD_HASH_QUEUE waiting checks, logins
+# are refused outright instead of queueing.
+# =======================
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 16))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+def verify_password(password_hash, password):
+    if not _hash_slots.acquire(blocking=False):
+        raise AuthBusyError("Too many concurrent logins, retry shortly")
+    try:
+        return _hash_executor.submit(check_password_hash, password_hash, password).result()
+    finally:
+        _hash_slots.release()
+
+
+# =======================
+# LoginThrottle: failed logins per username and per client IP over a
+# sliding window, checked before any hashing. In memory, so limits apply
+# per worker process. Client IPs come from request.remote_addr, which
+# ProxyFix (TRUSTED_PROXY_HOPS in app.py) sets from X-Forwarded-For.
+#
+# Memory is bounded: each key keeps only its last `limit` failures, expired
+# keys are swept once per window, and beyond max_keys (e.g. a flood of
+# random usernames) the keys idle longest are dropped.
+# =======================
+class LoginThrottle:
+    def __init__(self, max_per_user=5, max_per_ip=20, window=300, max_keys=10000):
+        self.max_per_user = max_per_user
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._next_sweep = 0.0
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, username, ip, now=None):
+        """Seconds until this username/IP may try again, or 0 if allowed."""
+        now = now or time.monotonic()
+        wait = 0
+        with self._lock:
+            for key, limit in ((("user", username), self.max_per_user), (("ip", ip), self.max_per_ip)):
+                failures = self._recent(key, now)
+                if failures is not None and len(failures) >= limit:
+                    wait = max(wait, failures[0] + self.window - now)
+        return int(wait) + 1 if wait else 0
+
+    def _sweep(self, now):
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.window
+            for key in list(self._failures):
+                self._recent(key, now)
+        while len(self._failures) > self.max_keys:
+            del self._failures[next(iter(self._failures))]
+
+    def failed(self, username, ip, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            for key, limit in ((("user", username), self.max_per_user), (("ip", ip), self.max_per_ip)):
+                failures = self._failures.pop(key, None) or deque(maxlen=limit)
+                failures.append(now)
+                self._failures[key] = failures  # most recently failed last, so eviction takes idle keys
+            self._sweep(now)
+
+    def succeeded(self, username):
+        with self._lock:
+            self._failures.pop(("user", username), None)
+
+
+login_throttle = LoginThrottle(
+    max_per_user=int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", 5)),
+    max_per_ip=int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", 20)),
+    window=int(os.getenv("LOGIN_FAILURE_WINDOW", 300)),
+    max_keys=int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", 10000)),
+)
+
+
+# =======================
+# Refresh token denylist: revoked jtis live in SQLite until the token would
+# have expired anyway. Revocation is permanent, so a jti once found revoked
+# is remembered in memory and later checks skip the query.
+# =======================
+_revoked_cache = set()
+_revoked_lock = threading.Lock()
+
+def revoke_token(payload):
+    jti = payload["jti"]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+    RevokedToken.query.filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+    db.session.add(RevokedToken(jti=jti, expires_at=expires_at))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+    with _revoked_lock:
+        _revoked_cache.add(jti)
+
+def is_token_revoked(payload):
+    """Only refresh tokens are checked; access tokens are short-lived and simply expire."""
+    if payload.get("type") != "refresh":
+        return False
+    jti = payload["jti"]
+    if jti in _revoked_cache:
+        return True
+    if db.session.get(RevokedToken, jti) is None:
+        return False
+    with _revoked_lock:
+        _revoked_cache.add(jti)
+    return True
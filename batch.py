@@ -0,0 +1,103 @@
+import re
+
+from flask import request
+from sqlalchemy.exc import OperationalError
+from werkzeug.exceptions import HTTPException
+
+from database import DEFER_COMMIT, _is_locked_error
+from models import db
+
+MAX_BATCH_OPERATIONS = 500
+WRITE_METHODS = ("POST", "PUT", "DELETE")
+
+# Catalog resources whose JSON write routes may run inside a batch
+BATCH_RESOURCES = (
+    "/api/shower-types", "/api/models", "/api/glass-types", "/api/glass-thickness", "/api/glass-pricing",
+    "/api/finishes", "/api/hardware-types", "/api/hardware-pricing", "/api/seal-types", "/api/seal-pricing",
+    "/api/model-glass-components", "/api/model-hardware-components", "/api/model-seal-components",
+    "/api/addons", "/api/gallery",
+)
+
+# "$2.id" refers to field "id" of the JSON result of operation 2
+_REFERENCE = re.compile(r"\$(\d+)\.(\w+)")
+
+
+class BatchError(ValueError):
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+def _lookup(results, index, match):
+    n, field = int(match.group(1)), match.group(2)
+    if n >= index:
+        raise BatchError(f"'{match.group(0)}' refers to an operation that has not run yet", index)
+    body = results[n]["body"]
+    if not isinstance(body, dict) or field not in body:
+        raise BatchError(f"'{match.group(0)}': operation {n} returned no '{field}'", index)
+    return body[field]
+
+def _resolve(value, results, index):
+    """Replace "$n.field" strings in an operation body, keeping the referenced value's type."""
+    if isinstance(value, str):
+        match = _REFERENCE.fullmatch(value)
+        return _lookup(results, index, match) if match else value
+    if isinstance(value, list):
+        return [_resolve(v, results, index) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, results, index) for k, v in value.items()}
+    return value
+
+def _allowed(rule):
+    return (rule is not None and rule.rule.startswith(BATCH_RESOURCES)
+            and not rule.rule.endswith("/upload-image"))
+
+def run_batch(app, operations):
+    """Run operations through the app's own write routes in one transaction.
+
+    Each operation is {"method", "path", "body"}; paths and bodies may use
+    "$n.field" references to earlier results. The routes run unchanged (same
+    auth and validation), but their commits only flush, so their rows get ids
+    while the transaction stays open. Stops at the first response that is not
+    2xx and rolls everything back. Returns (status, results) where results
+    holds {"status", "body"} for each operation that ran.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("'operations' must be a non-empty list")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise BatchError(f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    auth = request.headers.get("Authorization")
+    results = []
+    db.session.info[DEFER_COMMIT] = True
+    try:
+        for index, op in enumerate(operations):
+            method = op.get("method") if isinstance(op, dict) else None
+            if not isinstance(method, str) or method.upper() not in WRITE_METHODS \
+                    or not isinstance(op.get("path"), str):
+                raise BatchError("Each operation needs a 'method' (POST, PUT or DELETE) and a 'path'", index)
+            path = _REFERENCE.sub(lambda m: str(_lookup(results, index, m)), op["path"])
+            body = _resolve(op.get("body"), results, index)
+            with app.test_request_context(path, method=method.upper(), json=body,
+                                          headers={"Authorization": auth} if auth else {}):
+                if request.routing_exception is None and not _allowed(request.url_rule):
+                    raise BatchError(f"{method.upper()} {path} is not allowed in a batch", index)
+                try:
+                    response = app.make_response(app.dispatch_request())
+                except HTTPException as e:
+                    response = app.make_response(({"error": e.description}, e.code))
+                except Exception as e:
+                    if isinstance(e, OperationalError) and _is_locked_error(e):
+                        raise  # retry_on_locked re-runs the whole batch
+                    app.logger.exception("Batch operation %d (%s %s) failed", index, method.upper(), path)
+                    raise BatchError(f"{method.upper()} {path} failed", index) from e
+            results.append({"status": response.status_code, "body": response.get_json(silent=True)})
+            if not 200 <= response.status_code < 300:
+                db.session.rollback()
+                return (response.status_code if response.status_code < 500 else 500), results
+    except BatchError:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop(DEFER_COMMIT, None)
+    db.session.commit()
+    return 200, results
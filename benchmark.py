@@ -0,0 +1,215 @@
+"""Endpoint benchmarks over a synthetic catalog.
+
+Builds a throwaway SQLite database of the requested size, then drives every
+public GET and a set of admin writes through the real WSGI app with
+concurrent clients, reporting throughput, latency percentiles and SQL
+statements per request. Results are saved as JSON so runs can be compared:
+
+    python benchmark.py --models 10000 --components 100000 --output bench.json
+    python benchmark.py --cold --requests 20      # bypass the response cache
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shower-types", type=int, default=50)
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--components", type=int, default=100000, help="total Model*Component rows")
+    parser.add_argument("--gallery", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint")
+    parser.add_argument("--cold", action="store_true", help="clear the response cache before every request")
+    parser.add_argument("--only", help="comma-separated substrings; run only matching endpoints")
+    parser.add_argument("--db", help="SQLite file to build (default: a temp file)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+# =======================
+# Synthetic catalog
+# =======================
+def build_synthetic_catalog(args):
+    from admin import bulk_seed, generate_fixture
+    from models import db, Admin
+    bulk_seed(generate_fixture(
+        shower_types=args.shower_types, models=args.models, components=args.components,
+        gallery=args.gallery, seed=args.seed
+    ))
+    admin = Admin(username="bench")
+    admin.set_password("bench")
+    db.session.add(admin)
+    db.session.commit()
+
+
+# =======================
+# Scenarios
+# =======================
+def scenarios(args):
+    """(name, method, url, json body factory or None, needs auth)."""
+    mid = lambda: random.randint(1, args.models)
+    public = [
+        ("GET /api/shower-types", "GET", lambda: "/api/shower-types"),
+        ("GET /api/models", "GET", lambda: "/api/models"),
+        ("GET /api/models?limit=50", "GET", lambda: "/api/models?limit=50"),
+        ("GET /api/models?limit=50&cursor", "GET", lambda: f"/api/models?limit=50&cursor={mid()}"),
+        ("GET /api/models?shower_type_id", "GET", lambda: f"/api/models?shower_type_id={random.randint(1, args.shower_types)}"),
+        ("GET /api/models?fields=id,name,image_path", "GET", lambda: "/api/models?fields=id,name,image_path"),
+        ("GET /api/glass-types", "GET", lambda: "/api/glass-types"),
+        ("GET /api/glass-thicknesses", "GET", lambda: "/api/glass-thicknesses"),
+        ("GET /api/finishes", "GET", lambda: "/api/finishes"),
+        ("GET /api/hardware-types", "GET", lambda: "/api/hardware-types"),
+        ("GET /api/seal-types", "GET", lambda: "/api/seal-types"),
+        ("GET /api/glass-pricing", "GET", lambda: "/api/glass-pricing"),
+        ("GET /api/hardware-pricing", "GET", lambda: "/api/hardware-pricing"),
+        ("GET /api/seal-pricing", "GET", lambda: "/api/seal-pricing"),
+        ("GET /api/prices", "GET", lambda: "/api/prices"),
+        ("GET /api/model-glass-components/<id>", "GET", lambda: f"/api/model-glass-components/{mid()}"),
+        ("GET /api/model-hardware-components/<id>", "GET", lambda: f"/api/model-hardware-components/{mid()}"),
+        ("GET /api/model-seal-components/<id>", "GET", lambda: f"/api/model-seal-components/{mid()}"),
+        ("GET /api/addons", "GET", lambda: "/api/addons"),
+        ("GET /api/addons?model_id", "GET", lambda: f"/api/addons?model_id={mid()}"),
+        ("GET /api/gallery", "GET", lambda: "/api/gallery"),
+        ("GET /api/gallery?limit=50", "GET", lambda: "/api/gallery?limit=50"),
+        ("GET /api/catalog", "GET", lambda: "/api/catalog"),
+    ]
+    result = [(name, method, url, None, False) for name, method, url in public]
+    result += [
+        ("POST /api/quote", "POST", lambda: "/api/quote",
+         lambda: {"model_id": mid(), "width_mm": 900, "height_mm": 2000}, False),
+        ("PUT /api/glass-pricing/<id>", "PUT", lambda: f"/api/glass-pricing/{random.randint(1, 50)}",
+         lambda: {"price_per_m2": round(random.uniform(60, 250), 2)}, True),
+        ("PUT /api/models/<id>", "PUT", lambda: f"/api/models/{mid()}",
+         lambda: {"description": f"Edited {time.time()}"}, True),
+        ("POST /api/addons", "POST", lambda: "/api/addons",
+         lambda: {"name": "Bench addon", "price": 10, "model_id": mid()}, True),
+    ]
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",")]
+        result = [s for s in result if any(w in s[0] for w in wanted)]
+    return result
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def run_scenario(app, scenario, args, token, counter):
+    from cache import response_cache
+    name, method, url, body, needs_auth = scenario
+    headers = {"Authorization": f"Bearer {token}"} if needs_auth else {}
+    local = threading.local()
+
+    def one(_):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        if args.cold:
+            response_cache.clear()
+        counter.reset()
+        start = time.perf_counter()
+        response = client.open(url(), method=method, json=body() if body else None, headers=headers)
+        elapsed = time.perf_counter() - start
+        return elapsed, counter.value, response.status_code, len(response.get_data())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        samples = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - started
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        "endpoint": name,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s[2] >= 400),
+        "throughput_rps": round(len(samples) / wall, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.mean(latencies), 3),
+        },
+        "sql_per_request": round(statistics.mean(s[1] for s in samples), 2),
+        "response_bytes": round(statistics.mean(s[3] for s in samples)),
+    }
+
+
+class QueryCounter:
+    """Counts SQL statements per thread, so concurrent clients do not mix their counts."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.value = 0
+
+    @property
+    def value(self):
+        return getattr(self._local, "value", 0)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.value = self.value + 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="shower-bench-"), "bench.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.abspath(db_path)}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from sqlalchemy import event
+    import app as application
+    from migrations import prepare_database
+    from models import db
+    app = application.app
+
+    with app.app_context():
+        prepare_database()
+        started = time.perf_counter()
+        build_synthetic_catalog(args)
+        print(f"Built synthetic catalog in {time.perf_counter() - started:.1f}s at {db_path}")
+        counter = QueryCounter()
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", counter)
+
+    token = app.test_client().post("/api/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+    results = []
+    for scenario in scenarios(args):
+        result = run_scenario(app, scenario, args, token, counter)
+        results.append(result)
+        lat = result["latency_ms"]
+        print(f"{result['endpoint']:<45} {result['throughput_rps']:>9.1f} rps  "
+              f"p50 {lat['p50']:>8.2f}  p95 {lat['p95']:>8.2f}  p99 {lat['p99']:>8.2f} ms  "
+              f"{result['sql_per_request']:>6.1f} sql/req  {result['errors']} errors")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
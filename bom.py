@@ -0,0 +1,155 @@
+import math
+
+from models import (
+    db, GlassType, GlassThickness, HardwareType, Finish, SealType,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent, Addon
+)
+
+# One entry per bill-of-materials section of a Model:
+#   relationship/payload key -> (row class, natural key, referenced tables, other fields)
+# A payload row matches a stored row by "id" if given, else by its natural key.
+BOM_SECTIONS = {
+    "glass_components": (
+        ModelGlassComponent, ("glass_type_id", "thickness_id"),
+        {"glass_type_id": GlassType, "thickness_id": GlassThickness}, ("quantity",),
+    ),
+    "hardware_components": (
+        ModelHardwareComponent, ("hardware_type_id", "finish_id"),
+        {"hardware_type_id": HardwareType, "finish_id": Finish}, ("quantity",),
+    ),
+    "seal_components": (
+        ModelSealComponent, ("seal_type_id",), {"seal_type_id": SealType}, ("quantity",),
+    ),
+    "addons": (Addon, ("name",), {}, ("price",)),
+}
+
+
+class BomError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _clean_row(section, index, row, errors):
+    """Validate one payload row; returns the column values to store, or None."""
+    _, key, _, other = BOM_SECTIONS[section]
+    where = f"{section}[{index}]"
+    if not isinstance(row, dict):
+        errors.append(f"{where}: must be an object")
+        return None
+    values = {}
+    for field in key + other:
+        value = row.get(field)
+        if field == "name":
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f"{where}: 'name' is required")
+                continue
+            value = value.strip()
+        elif field == "price":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+                errors.append(f"{where}: 'price' must be a non-negative number")
+                continue
+        elif field == "quantity":
+            value = 1 if value is None else value
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                errors.append(f"{where}: 'quantity' must be a positive integer")
+                continue
+        elif isinstance(value, bool) or not isinstance(value, int):
+            errors.append(f"{where}: '{field}' must be an integer id")
+            continue
+        values[field] = value
+    if "id" in row and (isinstance(row["id"], bool) or not isinstance(row["id"], int)):
+        errors.append(f"{where}: 'id' must be an integer")
+        return None
+    return values if len(values) == len(key) + len(other) else None
+
+def _check_references(plan, errors):
+    """One IN query per referenced table for every id the payload mentions."""
+    wanted = {}
+    for section, rows in plan.items():
+        for field, ref in BOM_SECTIONS[section][2].items():
+            wanted.setdefault(ref, set()).update(values[field] for _, values in rows)
+    for ref, ids in wanted.items():
+        found = {id for (id,) in db.session.query(ref.id).filter(ref.id.in_(ids))} if ids else set()
+        for missing in sorted(ids - found):
+            errors.append(f"{ref.__tablename__} {missing} does not exist")
+
+def apply_bom(model, bom):
+    """Replace the components and addons of model with the lists in bom.
+
+    Each section present in bom is the complete new list for that section;
+    absent sections are left alone. Stored rows are matched by id or natural
+    key and updated in place, unmatched ones deleted and the rest inserted.
+    Everything is validated before the session is touched; the caller
+    commits. Returns {"inserted", "updated", "deleted"} counts.
+    """
+    if not isinstance(bom, dict):
+        raise BomError(["Body must be a JSON object"])
+    unknown = sorted(set(bom) - set(BOM_SECTIONS))
+    if unknown:
+        raise BomError([f"Unknown section(s): {', '.join(unknown)}"])
+    errors = []
+    plan = {}
+    for section, rows in bom.items():
+        if not isinstance(rows, list):
+            errors.append(f"{section}: must be a list")
+            continue
+        plan[section] = []
+        for index, row in enumerate(rows):
+            values = _clean_row(section, index, row, errors)
+            if values is not None:
+                plan[section].append((row.get("id"), values))
+    _check_references(plan, errors)
+
+    # Pair payload rows with stored rows: explicit ids first, then natural keys
+    matches = {}
+    for section, rows in plan.items():
+        key = BOM_SECTIONS[section][1]
+        stored = getattr(model, section)
+        by_id = {obj.id: obj for obj in stored}
+        claimed = set()
+        pairs = []
+        seen_keys = set()
+        for index, (row_id, values) in enumerate(rows):
+            natural = tuple(values[f] for f in key)
+            if natural in seen_keys:
+                errors.append(f"{section}[{index}]: duplicate {'/'.join(key)} {', '.join(map(str, natural))}")
+            seen_keys.add(natural)
+            if row_id is None:
+                continue
+            if row_id not in by_id:
+                errors.append(f"{section}[{index}]: id {row_id} does not belong to model {model.id}")
+            elif row_id in claimed:
+                errors.append(f"{section}[{index}]: id {row_id} is used twice")
+            else:
+                claimed.add(row_id)
+                pairs.append((by_id[row_id], values))
+        by_key = {}
+        for obj in stored:
+            if obj.id not in claimed:
+                by_key.setdefault(tuple(getattr(obj, f) for f in key), obj)
+        for row_id, values in rows:
+            if row_id is None:
+                target = by_key.pop(tuple(values[f] for f in key), None)
+                if target is not None:
+                    claimed.add(target.id)
+                pairs.append((target, values))
+        matches[section] = (pairs, [obj for obj in stored if obj.id not in claimed])
+    if errors:
+        raise BomError(errors)
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    for section, (pairs, removed) in matches.items():
+        row_class = BOM_SECTIONS[section][0]
+        for obj in removed:
+            db.session.delete(obj)
+            counts["deleted"] += 1
+        for target, values in pairs:
+            if target is None:
+                db.session.add(row_class(model_id=model.id, **values))
+                counts["inserted"] += 1
+            elif any(getattr(target, f) != v for f, v in values.items()):
+                for f, v in values.items():
+                    setattr(target, f, v)
+                counts["updated"] += 1
+    return counts
@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, request
+
+from models import get_catalog_version
+
+
+class CachedResponse:
+    __slots__ = ("body", "mimetype", "etag")
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def to_response(self):
+        response = Response(self.body, mimetype=self.mimetype)
+        response.set_etag(self.etag)
+        # Clients may keep the body but must revalidate; unchanged content answers 304
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+
+# =======================
+# ResponseCache: serialized GET responses for one catalog version. Entries
+# are dropped wholesale when the version moves on, and LRU-evicted beyond
+# max_entries (query strings make the key space open-ended).
+# =======================
+class ResponseCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self._version:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, version, key, entry):
+        with self._lock:
+            if version != self._version:
+                if self._version is not None and version < self._version:
+                    return
+                self._version = version
+                self._entries.clear()
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+def cached_response(fn):
+    """Serve a public catalog GET from the response cache, keyed by path + query string.
+
+    Only 200 responses are stored; the view runs again after any catalog write.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        version = get_catalog_version()
+        key = request.full_path
+        entry = response_cache.get(version, key)
+        if entry is None:
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = CachedResponse(response.get_data(), response.mimetype)
+            response_cache.put(version, key, entry)
+        return entry.to_response()
+    return wrapper
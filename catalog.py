@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import threading
+
+from flask import Response, current_app, request
+
+from models import (
+    db, ShowerType, Model, GlassType, GlassThickness, GlassPricing, Finish,
+    HardwareType, HardwarePricing, SealType, SealPricing, Addon,
+    get_catalog_version
+)
+from readers import read_dicts
+from changelog import latest_change_seq
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+def build_catalog(version):
+    """The full reference catalog, one key per list endpoint, in the same to_dict shapes.
+
+    change_seq is where a client holding this catalog starts polling /api/changes.
+    """
+    return {
+        'version': version,
+        'change_seq': latest_change_seq(db.session),
+        'shower_types': read_dicts(ShowerType),
+        'models': read_dicts(Model),
+        'glass_types': read_dicts(GlassType),
+        'glass_thicknesses': read_dicts(GlassThickness),
+        'finishes': read_dicts(Finish),
+        'hardware_types': read_dicts(HardwareType),
+        'seal_types': read_dicts(SealType),
+        'glass_pricing': read_dicts(GlassPricing),
+        'hardware_pricing': read_dicts(HardwarePricing),
+        'seal_pricing': read_dicts(SealPricing),
+        'addons': read_dicts(Addon),
+    }
+
+
+# =======================
+# CatalogBundle: the serialized catalog plus its gzip and brotli encodings,
+# compressed once per catalog version rather than once per request
+# =======================
+class CatalogBundle:
+    def __init__(self, version, body):
+        self.version = version
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.encodings = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(body, quality=11)
+
+    def choose_encoding(self, accept_encodings):
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encodings and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+    def to_response(self):
+        encoding = self.choose_encoding(request.accept_encodings)
+        response = Response(self.encodings[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        # Each encoding is a different byte sequence, so it gets its own strong ETag
+        response.set_etag(self.etag if encoding == 'identity' else f"{self.etag}-{encoding}")
+        return response.make_conditional(request)
+
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+def get_catalog_bundle():
+    global _bundle
+    version = get_catalog_version()
+    bundle = _bundle
+    if bundle is None or bundle.version != version:
+        with _bundle_lock:
+            if _bundle is None or _bundle.version != version:
+                body = current_app.json.dumps(build_catalog(version), separators=(',', ':')).encode()
+                _bundle = CatalogBundle(version, body)
+            bundle = _bundle
+    return bundle
@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from models import ChangeLog, ChangeLogHorizon, CatalogVersion, CATALOG_MODELS, bump_catalog_version
+from listing import MAX_PAGE_LIMIT, ListArgsError, _int_arg
+
+CHANGE_LOG_TOMBSTONE_DAYS = int(os.getenv("CHANGE_LOG_TOMBSTONE_DAYS", 30))
+CHANGE_LOG_COMPACT_INTERVAL = int(os.getenv("CHANGE_LOG_COMPACT_INTERVAL", 3600))  # seconds
+
+JSON_COLUMNS = ("image_variants",)
+CHUNK = 500
+
+
+class ChangeLogCompacted(Exception):
+    """The requested cursor is older than the log still covers; the client must reload the catalog."""
+    def __init__(self, horizon, latest):
+        super().__init__("Changes before this point have been compacted; reload the catalog")
+        self.horizon = horizon
+        self.latest = latest
+
+
+# =======================
+# Recording: every catalog row written gets a ChangeLog entry in the same
+# transaction, so entries commit (or roll back) with the write itself.
+#
+# ORM writes are collected per flush (plus Query.delete()/update() bulk
+# statements, whose ids are read before they run) and logged at commit,
+# after the last flush, with the row as committed. Core bulk writes call
+# record_changes() themselves.
+#
+# Readers page by seq, so seq order must be commit order or a client past
+# seq n could miss a slower transaction that took a lower seq. SQLite
+# serializes writers; on other backends every writer locks the
+# CatalogVersion row (which it updates anyway) before taking seqs and holds
+# it until commit.
+# =======================
+PENDING_CHANGES = "pending_changes"
+MODELS_BY_TABLE = {model.__table__.name: model for model in CATALOG_MODELS}
+
+
+def mark_changed(session, model, ids, operation):
+    """Queue rows for logging at commit. The first operation per row wins, so insert-then-delete logs nothing."""
+    pending = session.info.setdefault(PENDING_CHANGES, {}).setdefault(model, {})
+    for item_id in ids:
+        if item_id is not None:
+            pending.setdefault(item_id, operation)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    for objects, operation in ((session.new, "insert"), (session.dirty, "update"), (session.deleted, "delete")):
+        for obj in objects:
+            if isinstance(obj, CATALOG_MODELS) and (operation != "update" or session.is_modified(obj)):
+                mark_changed(session, type(obj), (obj.id,), operation)
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    model = MODELS_BY_TABLE.get(getattr(orm_execute_state.statement.table, "name", None))
+    if model is None:
+        return
+    stmt = select(model.id)
+    if orm_execute_state.statement.whereclause is not None:
+        stmt = stmt.where(orm_execute_state.statement.whereclause)
+    session = orm_execute_state.session
+    ids = session.execute(stmt).scalars().all()
+    mark_changed(session, model, ids, "delete" if orm_execute_state.is_delete else "update")
+
+@event.listens_for(Session, "before_commit")
+def _record_changes_on_commit(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pending = session.info.pop(PENDING_CHANGES, None)
+    if pending:
+        conn = session.connection()
+        for model in CATALOG_MODELS:
+            if model in pending:
+                _record(conn, model, pending[model])
+        maybe_compact(conn)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_changes(session):
+    session.info.pop(PENDING_CHANGES, None)
+
+
+def _lock_change_seq(conn):
+    """Hold the CatalogVersion row lock until commit so no other writer takes seqs in between."""
+    if conn.dialect.name == "sqlite":
+        return
+    table = CatalogVersion.__table__
+    if conn.execute(select(table.c.version).where(table.c.id == 1).with_for_update()).scalar() is None:
+        bump_catalog_version(conn)
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK):
+        yield values[start:start + CHUNK]
+
+def _state(row):
+    state = dict(row._mapping)
+    for key in JSON_COLUMNS:
+        if state.get(key):
+            state[key] = json.loads(state[key])
+    return json.dumps(state, separators=(",", ":"))
+
+def _record(conn, model, operations):
+    """Log the current state of each id in operations (id -> first operation seen)."""
+    table = model.__table__
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    entries = []
+    for chunk in _chunks(sorted(operations)):
+        rows = {row.id: row for row in conn.execute(table.select().where(table.c.id.in_(chunk)))}
+        for item_id in chunk:
+            row = rows.get(item_id)
+            if row is None:
+                if operations[item_id] != "insert":  # created and deleted in one transaction: nothing to tell
+                    entries.append({"resource": table.name, "item_id": item_id, "operation": "delete",
+                                    "state": None, "created_at": now})
+            else:
+                entries.append({"resource": table.name, "item_id": item_id,
+                                "operation": "insert" if operations[item_id] == "insert" else "update",
+                                "state": _state(row), "created_at": now})
+    if entries:
+        _lock_change_seq(conn)
+        conn.execute(ChangeLog.__table__.insert(), entries)
+    return len(entries)
+
+def record_changes(conn, model, ids, operation="update"):
+    """Log rows a Core statement wrote on conn; rows that no longer exist are logged as deletes."""
+    written = _record(conn, model, dict.fromkeys(ids, operation))
+    if written:
+        maybe_compact(conn)
+    return written
+
+def reset_change_log(conn):
+    """Invalidate every cursor: for bulk loads too large to log row by row. Clients reload the catalog."""
+    log = ChangeLog.__table__
+    _lock_change_seq(conn)
+    seq = conn.execute(log.insert().values(
+        resource="*", operation="reset", created_at=datetime.now(timezone.utc).replace(tzinfo=None)
+    ).returning(log.c.seq)).scalar_one()
+    _advance_horizon(conn, seq)
+
+
+# =======================
+# Compaction: an entry is dropped once a newer one for the same row exists
+# (the newer state is all a client needs), so the log holds about one entry
+# per catalog row. Deletes and resets are kept CHANGE_LOG_TOMBSTONE_DAYS;
+# dropping them moves the horizon, and older cursors get 410 and resync.
+# =======================
+_next_compaction = 0.0
+_compaction_lock = threading.Lock()
+
+def _advance_horizon(conn, seq):
+    table = ChangeLogHorizon.__table__
+    result = conn.execute(table.update().where(table.c.id == 1, table.c.seq < seq).values(seq=seq))
+    if result.rowcount == 0 and conn.execute(select(table.c.seq).where(table.c.id == 1)).scalar() is None:
+        conn.execute(table.insert().values(id=1, seq=seq))
+
+def compact_change_log(conn, now=None):
+    """Drop superseded entries and expired tombstones on conn. Returns the number of entries removed."""
+    log = ChangeLog.__table__
+    newer = log.alias("newer")
+    superseded = select(newer.c.seq).where(
+        newer.c.resource == log.c.resource, newer.c.item_id == log.c.item_id, newer.c.seq > log.c.seq
+    ).exists()
+    removed = conn.execute(log.delete().where(superseded)).rowcount
+
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    expired = (log.c.operation.in_(("delete", "reset"))) & (log.c.created_at < now - timedelta(days=CHANGE_LOG_TOMBSTONE_DAYS))
+    horizon = conn.execute(select(func.max(log.c.seq)).where(expired)).scalar()
+    if horizon is not None:
+        removed += conn.execute(log.delete().where(expired)).rowcount
+        _advance_horizon(conn, horizon)
+        bump_catalog_version(conn)  # cached /api/changes pages below the new horizon must turn into 410s
+    return removed
+
+def maybe_compact(conn):
+    """Run compact_change_log at most once per CHANGE_LOG_COMPACT_INTERVAL in this process."""
+    global _next_compaction
+    if time.monotonic() < _next_compaction or not _compaction_lock.acquire(blocking=False):
+        return
+    try:
+        _next_compaction = time.monotonic() + CHANGE_LOG_COMPACT_INTERVAL
+        compact_change_log(conn)
+    finally:
+        _compaction_lock.release()
+
+
+# =======================
+# Reading
+# =======================
+def _horizon(session):
+    return session.execute(select(ChangeLogHorizon.seq).where(ChangeLogHorizon.id == 1)).scalar() or 0
+
+def latest_change_seq(session, horizon=None):
+    """The newest seq a client can hold: the last entry, or the horizon if expired tombstones were the newest."""
+    horizon = _horizon(session) if horizon is None else horizon
+    return max(session.execute(select(func.max(ChangeLog.seq))).scalar() or 0, horizon)
+
+def changes_since(session, args):
+    """Entries after ?since=<seq> in seq order, at most ?limit= (default and maximum MAX_PAGE_LIMIT).
+
+    Raises ChangeLogCompacted when since is below the horizon (or past the
+    newest entry, e.g. after a restore), and ListArgsError for bad arguments.
+    """
+    since = _int_arg(args, "since")
+    since = 0 if since is None else since
+    if since < 0:
+        raise ListArgsError("'since' must be zero or more")
+    limit = _int_arg(args, "limit")
+    limit = MAX_PAGE_LIMIT if limit is None else limit
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ListArgsError(f"'limit' must be between 1 and {MAX_PAGE_LIMIT}")
+
+    horizon = _horizon(session)
+    latest = latest_change_seq(session, horizon)
+    if since < horizon or since > latest:
+        raise ChangeLogCompacted(horizon, latest)
+    log = ChangeLog.__table__
+    rows = session.execute(
+        select(log.c.seq, log.c.resource, log.c.item_id, log.c.operation, log.c.state, log.c.created_at)
+        .where(log.c.seq > since).order_by(log.c.seq).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "changes": [{
+            "seq": seq, "resource": resource, "id": item_id, "operation": operation,
+            "state": json.loads(state) if state is not None else None,
+            "changed_at": created_at.isoformat(),
+        } for seq, resource, item_id, operation, state, created_at in rows],
+        "next_since": rows[-1].seq if rows else since,
+        "has_more": has_more,
+        "latest": latest,
+    }
@@ -0,0 +1,152 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from storage import CHUNK_SIZE
+
+# Upload sessions live on disk next to the uploads (<id>.part + <id>.json) so
+# that any worker can accept the next chunk and a dropped client can resume.
+SESSION_DIRNAME = ".chunked"
+SESSION_TTL = 24 * 3600
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessionError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+class UploadSession:
+    def __init__(self, directory, upload_id, meta):
+        self.directory = directory
+        self.id = upload_id
+        self.meta = meta
+
+    @property
+    def part_path(self):
+        return os.path.join(self.directory, f"{self.id}.part")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.directory, f"{self.id}.json")
+
+    @property
+    def offset(self):
+        return os.path.getsize(self.part_path)
+
+    def to_dict(self):
+        return {
+            "upload_id": self.id,
+            "filename": self.meta["filename"],
+            "size": self.meta["size"],
+            "offset": self.offset,
+            "complete": self.offset == self.meta["size"],
+        }
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive flock on the session's meta file, across workers and threads."""
+        try:
+            handle = open(self.meta_path, "rb")
+        except FileNotFoundError:
+            raise UploadSessionError("Unknown upload", status=404)
+        with handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            if not os.path.exists(self.meta_path):
+                raise UploadSessionError("Unknown upload", status=404)  # discarded while we waited
+            yield
+
+    def append(self, stream, offset):
+        """Append the request body at offset, streaming it to disk in fixed-size blocks.
+
+        The offset check and the write happen under the session lock, so of two
+        requests for the same offset the second sees the new offset and gets 409.
+        """
+        with self.locked():
+            current = self.offset
+            if offset != current:
+                raise UploadSessionError("Offset mismatch", status=409, offset=current)
+            written = 0
+            with open(self.part_path, "ab") as part:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    written += len(chunk)
+                    if current + written > self.meta["size"]:
+                        part.truncate(current)
+                        raise UploadSessionError("Chunk extends past the declared size", status=416, offset=current)
+                    part.write(chunk)
+            return current + written
+
+    def verify(self):
+        """Check size and SHA-256 of the assembled file."""
+        if self.offset != self.meta["size"]:
+            raise UploadSessionError("Upload is incomplete", status=409, offset=self.offset)
+        digest = hashlib.sha256()
+        with open(self.part_path, "rb") as part:
+            for chunk in iter(lambda: part.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != self.meta["sha256"]:
+            raise UploadSessionError("Checksum mismatch", status=422)
+
+    def discard(self):
+        for path in (self.part_path, self.meta_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # another worker got there first
+                pass
+
+
+def session_dir(upload_folder):
+    directory = os.path.join(upload_folder, SESSION_DIRNAME)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def purge_expired(directory, now=None):
+    """Drop sessions whose data has not grown for SESSION_TTL seconds."""
+    now = now or time.time()
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        session = UploadSession(directory, name[:-len(".json")], None)
+        try:
+            last_activity = os.path.getmtime(session.part_path)
+        except OSError:
+            try:
+                last_activity = os.path.getmtime(session.meta_path)
+            except FileNotFoundError:  # discarded by a concurrent sweep or request
+                continue
+        if now - last_activity > SESSION_TTL:
+            session.discard()
+
+def create_session(directory, filename, size, sha256, max_size):
+    if not isinstance(size, int) or size <= 0:
+        raise UploadSessionError("'size' must be a positive integer")
+    if size > max_size:
+        raise UploadSessionError(f"File exceeds the {max_size} byte limit", status=413)
+    if not isinstance(sha256, str) or not re.match(r"^[0-9a-fA-F]{64}$", sha256):
+        raise UploadSessionError("'sha256' must be a hex SHA-256 digest")
+    purge_expired(directory)
+    upload_id = uuid.uuid4().hex
+    meta = {"filename": filename, "size": size, "sha256": sha256.lower(), "created": time.time()}
+    session = UploadSession(directory, upload_id, meta)
+    open(session.part_path, "wb").close()
+    with open(session.meta_path, "w") as f:
+        json.dump(meta, f)
+    return session
+
+def load_session(directory, upload_id):
+    if not _SESSION_ID.match(upload_id):
+        raise UploadSessionError("Unknown upload", status=404)
+    path = os.path.join(directory, f"{upload_id}.json")
+    try:
+        with open(path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise UploadSessionError("Unknown upload", status=404)
+    return UploadSession(directory, upload_id, meta)
@@ -0,0 +1,128 @@
+import os
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import OperationalError
+
+READ_BIND = "read"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# Session.info flag: commit() only flushes; the batch endpoint commits once at the end
+DEFER_COMMIT = "defer_commit"
+
+
+# =======================
+# Engine profiles
+#   SQLite: WAL journal, busy timeout, mmap and page cache pragmas on every
+#           new connection, so readers never wait on an admin commit.
+#   Server databases: sized connection pool with pre-ping and recycling.
+# =======================
+def engine_profile(uri):
+    if make_url(uri).get_backend_name() == "sqlite":
+        return {"connect_args": {"timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)) / 1000}}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": True,
+    }
+
+def sqlite_pragmas():
+    return [
+        f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size={-int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))}",
+    ]
+
+@event.listens_for(Engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+def configure_database(app):
+    """Fill the engine settings for the primary and, if enabled, the read bind.
+
+    DATABASE_READ_URI points reads at a replica; without it reads use a second
+    pool on the primary database (query_only for SQLite). DB_READ_ROUTING=false
+    sends everything to the primary.
+    """
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_profile(uri))
+    app.config.setdefault("DB_WRITE_RETRIES", int(os.getenv("DB_WRITE_RETRIES", 3)))
+    app.config.setdefault("DB_WRITE_RETRY_BACKOFF_MS", int(os.getenv("DB_WRITE_RETRY_BACKOFF_MS", 50)))
+    if os.getenv("DB_READ_ROUTING", "true").lower() == "true":
+        read_uri = os.getenv("DATABASE_READ_URI", uri)
+        binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+        binds.setdefault(READ_BIND, {"url": read_uri, **engine_profile(read_uri)})
+
+def init_read_engine(db):
+    """Mark read-bind SQLite connections query_only, so a routing mistake fails loudly. Needs an app context."""
+    engine = db.engines.get(READ_BIND)
+    if engine is not None and engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _query_only(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA query_only=ON")
+
+
+# =======================
+# RoutingSession: statements issued while serving GET/HEAD requests use the
+# read bind; everything else (admin writes, flushes, background jobs) uses
+# the primary
+# =======================
+class RoutingSession(FlaskSession):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and request.method in READ_METHODS:
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        if self.info.get(DEFER_COMMIT):
+            # Expire like a real commit would, so views reload what they return
+            self.flush()
+            self.expire_all()
+            return
+        super().commit()
+
+
+def _is_locked_error(error):
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+def retry_on_locked(fn):
+    """Re-run a write view when SQLite reports the database locked, with jittered exponential backoff.
+
+    Views that received uploaded files are not retried: their streams are already consumed.
+    Neither are views running inside a batch; the batch as a whole is retried instead.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        from models import db
+        attempts = current_app.config["DB_WRITE_RETRIES"]
+        backoff = current_app.config["DB_WRITE_RETRY_BACKOFF_MS"] / 1000
+        for attempt in range(attempts + 1):
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as e:
+                if db.session.info.get(DEFER_COMMIT):
+                    raise
+                db.session.rollback()
+                if attempt == attempts or not _is_locked_error(e) or request.files:
+                    raise
+                time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+    return wrapper
@@ -0,0 +1,208 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+from models import (
+    db, ShowerType, Model, GlassType, GlassThickness, Finish,
+    ModelGlassComponent, ModelHardwareComponent, get_catalog_version
+)
+from listing import MAX_PAGE_LIMIT, ListArgsError, _float_arg, _int_arg
+
+DEFAULT_SEARCH_LIMIT = 50
+PRICE_RANGE_COUNT = 5
+
+
+# =======================
+# FacetIndex: one bitmap (a Python int) per facet value over the models,
+# rebuilt once per catalog version. Bit i is the i-th model in from_price
+# order (unpriced models last), so a price range is a contiguous run of
+# bits and results come out cheapest first. A search is a few ANDs/ORs and
+# popcounts over ints of n/8 bytes, whatever the catalog size.
+#
+# Glass type and thickness are separate facets: a model matches when any of
+# its glass components has the value, not necessarily the same component.
+# =======================
+FACETS = ("shower_type_id", "glass_type_id", "thickness_id", "finish_id")
+
+
+def _bitmap(positions, size):
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class FacetIndex:
+    def __init__(self, version):
+        self.version = version
+        self.ids = []           # bit position -> model id
+        self.prices = []        # from_price of the priced models, ascending
+        self.bitmaps = {facet: {} for facet in FACETS}  # facet -> value -> bitmap (positions while loading)
+        self.names = {facet: {} for facet in FACETS}    # facet -> value -> display name
+        self.price_ranges = []  # [(low, high or None, bitmap)]
+        self.all = 0
+
+    @classmethod
+    def load(cls, version):
+        index = cls(version)
+        q = db.session.query
+        rows = q(Model.id, Model.shower_type_id, Model.from_price).all()
+        rows.sort(key=lambda r: (r.from_price is None, r.from_price or 0, r.id))
+        position = {}
+        for i, (model_id, shower_type_id, price) in enumerate(rows):
+            index.ids.append(model_id)
+            position[model_id] = i
+            if price is not None:
+                index.prices.append(price)
+            index._set("shower_type_id", shower_type_id, i)
+        index.all = (1 << len(rows)) - 1
+
+        for model_id, glass_type_id, thickness_id in q(
+                ModelGlassComponent.model_id, ModelGlassComponent.glass_type_id, ModelGlassComponent.thickness_id):
+            if model_id in position:
+                index._set("glass_type_id", glass_type_id, position[model_id])
+                index._set("thickness_id", thickness_id, position[model_id])
+        for model_id, finish_id in q(ModelHardwareComponent.model_id, ModelHardwareComponent.finish_id):
+            if model_id in position:
+                index._set("finish_id", finish_id, position[model_id])
+
+        for facet, lookup in (
+                ("shower_type_id", q(ShowerType.id, ShowerType.name)),
+                ("glass_type_id", q(GlassType.id, GlassType.name)),
+                ("thickness_id", q(GlassThickness.id, GlassThickness.thickness_mm)),
+                ("finish_id", q(Finish.id, Finish.name))):
+            index.names[facet] = dict(lookup)
+            index.bitmaps[facet] = {value: _bitmap(positions, len(rows))
+                                    for value, positions in index.bitmaps[facet].items()}
+        index._build_price_ranges()
+        return index
+
+    def _set(self, facet, value, position):
+        if value is not None:
+            self.bitmaps[facet].setdefault(value, set()).add(position)
+
+    def price_mask(self, low=None, high=None):
+        """Bitmap of the priced models with low <= from_price <= high."""
+        start = 0 if low is None else bisect_left(self.prices, low)
+        end = len(self.prices) if high is None else bisect_right(self.prices, high)
+        if end <= start:
+            return 0
+        return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    def _build_price_ranges(self):
+        """PRICE_RANGE_COUNT ranges at rounded quantiles of from_price; low inclusive, high exclusive."""
+        if not self.prices:
+            return
+        step = 10 if self.prices[-1] >= 100 else 1
+        edges = []
+        for k in range(PRICE_RANGE_COUNT):
+            edge = self.prices[len(self.prices) * k // PRICE_RANGE_COUNT] // step * step
+            if not edges or edge > edges[-1]:
+                edges.append(edge)
+        for i, low in enumerate(edges):
+            high = edges[i + 1] if i + 1 < len(edges) else None
+            start = bisect_left(self.prices, low)
+            end = len(self.prices) if high is None else bisect_left(self.prices, high)
+            self.price_ranges.append((low, high, ((1 << end) - 1) ^ ((1 << start) - 1)))
+
+    def model_ids(self, mask, offset, limit):
+        """Ids of the set bits of mask in position order, skipping offset of them."""
+        bits = bin(mask)[:1:-1]
+        ids = []
+        position = -1
+        for _ in range(offset + limit):
+            position = bits.find("1", position + 1)
+            if position < 0:
+                break
+            ids.append(self.ids[position])
+        return ids[offset:]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_facet_index():
+    """Return the facet index for the current catalog version, rebuilding it at most once per change."""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = FacetIndex.load(version)
+            index = _index
+    return index
+
+
+# =======================
+# Search
+# =======================
+def _id_list_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return {int(v) for v in value.split(",") if v.strip()}
+    except ValueError:
+        raise ListArgsError(f"'{name}' must be a comma-separated list of ids")
+
+def search_models(index, args):
+    """Filter models by facets and price; returns matching ids plus facet counts.
+
+    ?<facet>=1,2 keeps models having any of the listed values; different
+    facets and ?min_price= / ?max_price= combine with AND. Each facet's counts
+    apply every filter except that facet's own, so they show how many models
+    selecting (or adding) that value would give. Ids are ordered by from_price.
+    """
+    selected = {}
+    for facet in FACETS:
+        values = _id_list_arg(args, facet)
+        if values is not None:
+            mask = 0
+            for value in values:
+                mask |= index.bitmaps[facet].get(value, 0)
+            selected[facet] = mask
+    low, high = _float_arg(args, "min_price"), _float_arg(args, "max_price")
+    if low is not None or high is not None:
+        selected["price"] = index.price_mask(low, high)
+    limit = _int_arg(args, "limit")
+    limit = DEFAULT_SEARCH_LIMIT if limit is None else limit
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ListArgsError(f"'limit' must be between 1 and {MAX_PAGE_LIMIT}")
+    offset = _int_arg(args, "offset") or 0
+    if offset < 0:
+        raise ListArgsError("'offset' must be zero or more")
+
+    def matching(excluded=None):
+        mask = index.all
+        for name, facet_mask in selected.items():
+            if name != excluded:
+                mask &= facet_mask
+        return mask
+
+    result = matching()
+    total = result.bit_count()
+    facets = {}
+    for facet in FACETS:
+        base = matching(facet)
+        names = index.names[facet]
+        facets[facet] = [
+            {"id": value, "name": names.get(value), "count": (base & bitmap).bit_count()}
+            for value, bitmap in sorted(index.bitmaps[facet].items())
+        ]
+    base = matching("price")
+    priced = base & index.price_mask()
+    price = {
+        "min": index.prices[(priced & -priced).bit_length() - 1] if priced else None,
+        "max": index.prices[priced.bit_length() - 1] if priced else None,
+        "ranges": [{"min": low, "max": high, "count": (base & bitmap).bit_count()}
+                   for low, high, bitmap in index.price_ranges],
+    }
+    ids = index.model_ids(result, offset, limit)
+    return {
+        "ids": ids,
+        "total": total,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "facets": facets,
+        "price": price,
+        "catalog_version": index.version,
+    }
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import DEFER_COMMIT
+from models import db, ShowerType, Model, GalleryImage, bump_catalog_version
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; without it uploads are stored as-is
+    Image = None
+
+# Derivative widths; images narrower than a target are never upscaled
+VARIANT_WIDTHS = {'thumb': 320, 'card': 640, 'full': 1600}
+VARIANTS_DIRNAME = 'variants'
+IMAGE_MODELS = (ShowerType, Model, GalleryImage)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('IMAGE_WORKERS', 2)), thread_name_prefix='image-derivatives'
+)
+# Striped locks: a fixed pool shared by hash, so memory stays bounded however
+# many paths are processed (two paths sharing a stripe merely take turns)
+_path_locks = [threading.Lock() for _ in range(64)]
+# Session.info key: jobs queued inside a batch, submitted once it commits
+PENDING_IMAGE_JOBS = "pending_image_jobs"
+
+
+def _path_lock(image_path):
+    return _path_locks[hash(image_path) % len(_path_locks)]
+
+def locate_image(app, image_path):
+    """Map a stored image_path to (directory on disk, URL prefix, filename), or None for foreign paths."""
+    if not image_path:
+        return None
+    if image_path.startswith('/static/uploads/'):
+        directory, prefix = os.path.join(app.root_path, 'static', 'uploads'), '/static/uploads'
+    elif image_path.startswith('/uploads/'):
+        directory, prefix = os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), '/uploads'
+    else:
+        return None
+    filename = image_path[len(prefix) + 1:]
+    if not filename or '/' in filename:
+        return None
+    return directory, prefix, filename
+
+def _manifest_path(directory, filename):
+    return os.path.join(directory, VARIANTS_DIRNAME, os.path.splitext(filename)[0] + '.json')
+
+def read_manifest(app, image_path):
+    located = locate_image(app, image_path)
+    if located is None:
+        return None
+    try:
+        with open(_manifest_path(located[0], located[2])) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def generate_derivatives(app, image_path):
+    """Write the resized variants and a JSON manifest for image_path; returns the manifest."""
+    directory, prefix, filename = locate_image(app, image_path)
+    stem = os.path.splitext(filename)[0]
+    out_dir = os.path.join(directory, VARIANTS_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+    webp = features.check('webp')
+    with Image.open(os.path.join(directory, filename)) as original:
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        if webp:
+            ext, save_kwargs = 'webp', {'format': 'WEBP', 'quality': 80, 'method': 4}
+        elif has_alpha:
+            ext, save_kwargs = 'png', {'format': 'PNG', 'optimize': True}
+        else:
+            ext, save_kwargs = 'jpg', {'format': 'JPEG', 'quality': 82, 'progressive': True}
+        variants = {}
+        for name, target in VARIANT_WIDTHS.items():
+            w = min(target, width)
+            h = max(1, round(height * w / width))
+            variant_name = f"{stem}_{name}.{ext}"
+            resized = image if (w, h) == image.size else image.resize((w, h), Image.LANCZOS)
+            tmp_path = os.path.join(out_dir, variant_name + '.tmp')
+            resized.save(tmp_path, **save_kwargs)
+            os.replace(tmp_path, os.path.join(out_dir, variant_name))
+            variants[name] = {'url': f"{prefix}/{VARIANTS_DIRNAME}/{variant_name}", 'width': w, 'height': h}
+    manifest = {'width': width, 'height': height, 'variants': variants}
+    tmp_path = _manifest_path(directory, filename) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, _manifest_path(directory, filename))
+    return manifest
+
+def _apply_manifest(image_path, manifest):
+    """Copy manifest dimensions/variants onto every row that points at image_path."""
+    variants = json.dumps(manifest['variants'], sort_keys=True)
+    updated = 0
+    for model in IMAGE_MODELS:
+        table = model.__table__
+        result = db.session.execute(
+            table.update()
+            .where(table.c.image_path == image_path)
+            .where((table.c.image_variants.is_(None)) | (table.c.image_variants != variants))
+            .values(image_width=manifest['width'], image_height=manifest['height'], image_variants=variants)
+        )
+        updated += result.rowcount
+    if updated:
+        bump_catalog_version(db.session.connection())
+    db.session.commit()
+
+def _process(app, image_path):
+    with app.app_context():
+        try:
+            with _path_lock(image_path):
+                manifest = read_manifest(app, image_path) or generate_derivatives(app, image_path)
+            _apply_manifest(image_path, manifest)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Image derivative generation failed for %s", image_path)
+
+def schedule_image_derivatives(image_path):
+    """Queue variant generation for image_path on the worker pool.
+
+    Call after the row referencing the image has been committed: the job writes
+    the variants once, then fills image_width/image_height/image_variants on every
+    row with that path. Repeat calls for an already processed image only do the
+    row update.
+
+    Inside a batch, whose commit comes later, the job is held until that commit
+    and dropped if the batch rolls back.
+    """
+    app = current_app._get_current_object()
+    located = locate_image(app, image_path)
+    if Image is None or located is None or not os.path.isfile(os.path.join(located[0], located[2])):
+        return None
+    if db.session.info.get(DEFER_COMMIT):
+        db.session.info.setdefault(PENDING_IMAGE_JOBS, []).append((app, image_path))
+        return None
+    return _executor.submit(_process, app, image_path)
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending_image_jobs(session):
+    for app, image_path in session.info.pop(PENDING_IMAGE_JOBS, ()):
+        _executor.submit(_process, app, image_path)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_image_jobs(session):
+    session.info.pop(PENDING_IMAGE_JOBS, None)
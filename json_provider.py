@@ -0,0 +1,60 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+# The two layouts DefaultJSONProvider.response produces, and their orjson options
+LAYOUTS = (({"separators": (",", ":")}, 0), ({"indent": 2}, 0 if orjson is None else orjson.OPT_INDENT_2))
+
+
+# =======================
+# OrjsonProvider: Flask's default JSON provider with orjson doing the
+# encoding. Output is byte-for-byte what DefaultJSONProvider produces
+# (sorted keys, the same compact or debug-mode indented layout, the same
+# default() for dates, decimals and dataclasses); anything orjson would
+# write differently falls back to the stdlib encoder:
+#   - non-ASCII text (the default provider escapes it as \uXXXX)
+#   - non-str dict keys, ints beyond 64 bits, other types orjson rejects
+#   - dumps() arguments other than the compact or indent=2 layouts
+# Floats print the same except outside [1e-4, 1e16), where the two
+# libraries pick different notations for the same value, and NaN/Infinity
+# (null in orjson); catalog prices and rates never get there.
+# =======================
+class OrjsonProvider(DefaultJSONProvider):
+    options = 0 if orjson is None else (
+        orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def _encode(self, obj, kwargs):
+        """orjson bytes for obj, or None when only the stdlib encoder gives the expected output."""
+        if not (self.sort_keys and self.ensure_ascii):
+            return None
+        for layout, option in LAYOUTS:
+            if kwargs == layout:
+                break
+        else:
+            return None
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self.options | option)
+        except TypeError:
+            return None
+        return data if data.isascii() else None
+
+    def dumps(self, obj, **kwargs):
+        data = self._encode(obj, kwargs)
+        return super().dumps(obj, **kwargs) if data is None else data.decode()
+
+    def response(self, *args, **kwargs):
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        data = self._encode(self._prepare_response_obj(args, kwargs), LAYOUTS[pretty][0])
+        if data is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install OrjsonProvider when orjson is available. Call before anything wraps app.json."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
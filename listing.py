@@ -0,0 +1,159 @@
+from sqlalchemy import and_, or_
+
+from flask import jsonify, request
+
+MAX_PAGE_LIMIT = 500
+
+
+class ListArgsError(ValueError):
+    pass
+
+
+class ListArgs:
+    __slots__ = ("filters", "limit", "cursor", "fields", "sort", "descending", "ranges")
+
+    def __init__(self, filters, limit, cursor, fields, sort=None, descending=False, ranges=None):
+        self.filters = filters
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.sort = sort              # column name, or None for id order
+        self.descending = descending
+        self.ranges = ranges or {}    # column name -> (min, max), either may be None
+
+    @property
+    def paginated(self):
+        return self.limit is not None or self.cursor is not None
+
+
+def _int_arg(args, name):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ListArgsError(f"'{name}' must be an integer")
+
+def _float_arg(args, name):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ListArgsError(f"'{name}' must be a number")
+
+def requested_fields(args=None):
+    """The ?fields=a,b,c projection as a set, or None when every field is wanted."""
+    fields = (request.args if args is None else args).get("fields")
+    if not fields:
+        return None
+    return {f.strip() for f in fields.split(",") if f.strip()}
+
+def parse_list_args(args, filters=(), sorts=None):
+    """Validate the list query string (any mapping); raises ListArgsError.
+
+    sorts maps public sort names to columns: ?sort=<name> or ?sort=-<name>
+    orders by that column (rows where it is NULL are left out) and enables
+    ?min_<name>= / ?max_<name>= range filters. The cursor is then
+    "<value>,<id>" of the last row seen instead of a bare id.
+    """
+    values = {}
+    for name in filters:
+        value = _int_arg(args, name)
+        if value is not None:
+            values[name] = value
+    limit = _int_arg(args, "limit")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ListArgsError(f"'limit' must be between 1 and {MAX_PAGE_LIMIT}")
+    sorts = sorts or {}
+    sort, descending = None, False
+    requested = args.get("sort")
+    if requested:
+        descending = requested.startswith("-")
+        if requested.lstrip("-") not in sorts:
+            raise ListArgsError(f"'sort' must be one of: {', '.join(sorted(sorts)) or 'none'}")
+        sort = sorts[requested.lstrip("-")]
+    ranges = {}
+    for name, column in sorts.items():
+        bounds = (_float_arg(args, f"min_{name}"), _float_arg(args, f"max_{name}"))
+        if bounds != (None, None):
+            ranges[column] = bounds
+    cursor = args.get("cursor")
+    if sort is None:
+        cursor = _int_arg(args, "cursor")
+    elif cursor:
+        try:
+            value, id = cursor.rsplit(",", 1)
+            cursor = (float(value), int(id))
+        except ValueError:
+            raise ListArgsError("'cursor' must be the next_cursor of the previous page")
+    else:
+        cursor = None
+    return ListArgs(values, limit, cursor, requested_fields(args), sort, descending, ranges)
+
+def narrow(query, model, list_args):
+    """Apply filters, ordering and the keyset window to a Query or a select()."""
+    for name, value in list_args.filters.items():
+        query = query.filter(getattr(model, name) == value)
+    for name, (low, high) in list_args.ranges.items():
+        column = getattr(model, name)
+        query = query.filter(column.isnot(None))
+        if low is not None:
+            query = query.filter(column >= low)
+        if high is not None:
+            query = query.filter(column <= high)
+    if list_args.sort is None:
+        query = query.order_by(model.id)
+        if list_args.cursor is not None:
+            query = query.filter(model.id > list_args.cursor)
+    else:
+        column = getattr(model, list_args.sort)
+        query = query.filter(column.isnot(None))
+        if list_args.descending:
+            query = query.order_by(column.desc(), model.id.desc())
+        else:
+            query = query.order_by(column, model.id)
+        if list_args.cursor is not None:
+            value, id = list_args.cursor
+            after = (column < value) if list_args.descending else (column > value)
+            same = and_(column == value, (model.id < id) if list_args.descending else (model.id > id))
+            query = query.filter(or_(after, same))
+    if list_args.limit is not None:
+        query = query.limit(list_args.limit + 1)
+    return query
+
+def list_payload(rows, list_args, serialize):
+    """The response body for rows fetched with narrow()."""
+    fields = list_args.fields
+
+    def project(obj):
+        data = serialize(obj)
+        if fields is not None:
+            data = {k: v for k, v in data.items() if k in fields}
+        return data
+
+    if not list_args.paginated:
+        return [project(obj) for obj in rows]
+    next_cursor = None
+    if list_args.limit is not None and len(rows) > list_args.limit:
+        rows = rows[:list_args.limit]
+        last = rows[-1]
+        next_cursor = last.id if list_args.sort is None else f"{getattr(last, list_args.sort)!r},{last.id}"
+    return {"items": [project(obj) for obj in rows], "next_cursor": next_cursor}
+
+def list_response(query, model, serialize, filters=(), sorts=None):
+    """Serialize query as a list endpoint response.
+
+    Supports ?<filter>=<id> for each name in filters, ?fields= projection,
+    ?sort= and ranges for each name in sorts (see parse_list_args) and keyset
+    pagination via ?limit= and ?cursor= (the last id already seen).
+    Without limit/cursor the response stays a bare JSON list; with them it is
+    {"items": [...], "next_cursor": <id or null>}.
+    """
+    try:
+        list_args = parse_list_args(request.args, filters, sorts)
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(list_payload(narrow(query, model, list_args).all(), list_args, serialize))
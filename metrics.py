@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_app_context, request
+from flask.json.provider import JSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class RequestMetrics:
+    __slots__ = ("started", "sql_count", "sql_time", "serialize_time")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+
+
+def _current():
+    return g.get("_request_metrics") if has_app_context() else None
+
+
+# =======================
+# SQL timing: global cursor events, attributed to the request being served
+# on this thread. Statements outside a request (startup, background image
+# jobs) are ignored.
+# =======================
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info["_metrics_started"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("_metrics_started", None)
+    current = _current()
+    if current is not None and started is not None:
+        current.sql_count += 1
+        current.sql_time += time.perf_counter() - started
+
+
+# =======================
+# Serialization timing: wraps whatever JSON provider the app has installed,
+# so a faster provider can replace the default without losing the metric
+# =======================
+class TimedJSONProvider(JSONProvider):
+    def __init__(self, app, inner):
+        super().__init__(app)
+        self.inner = inner
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.inner.dumps(obj, **kwargs)
+        finally:
+            _add_serialize_time(started)
+
+    def loads(self, s, **kwargs):
+        return self.inner.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.inner.response(*args, **kwargs)
+        finally:
+            _add_serialize_time(started)
+
+def _add_serialize_time(started):
+    current = _current()
+    if current is not None:
+        current.serialize_time += time.perf_counter() - started
+
+
+# =======================
+# Aggregation: one set of histograms per (method, route), in memory per
+# worker process
+# =======================
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class RouteStats:
+    __slots__ = ("duration", "sql_duration", "sql_statements", "serialize_duration", "response_size", "statuses")
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.sql_duration = Histogram(DURATION_BUCKETS)
+        self.sql_statements = Histogram(STATEMENT_BUCKETS)
+        self.serialize_duration = Histogram(DURATION_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    HISTOGRAMS = (
+        ("http_request_duration_seconds", "duration", "Time spent in the app per request"),
+        ("http_request_sql_duration_seconds", "sql_duration", "Time spent executing SQL per request"),
+        ("http_request_sql_statements", "sql_statements", "SQL statements executed per request"),
+        ("http_request_serialize_duration_seconds", "serialize_duration", "Time spent encoding JSON per request"),
+        ("http_response_size_bytes", "response_size", "Response body size (streamed responses excluded)"),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, method, route, status, metrics, duration, size):
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats()
+            stats.duration.observe(duration)
+            stats.sql_duration.observe(metrics.sql_time)
+            stats.sql_statements.observe(metrics.sql_count)
+            stats.serialize_duration.observe(metrics.serialize_time)
+            if size is not None:
+                stats.response_size.observe(size)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def render(self, engines):
+        """Prometheus text exposition of every route plus connection pool gauges."""
+        lines = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines += ["# HELP http_requests_total Requests served", "# TYPE http_requests_total counter"]
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            for name, attr, help_text in self.HISTOGRAMS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), stats in routes:
+                    lines.extend(getattr(stats, attr).lines(name, f'method="{method}",route="{route}"'))
+        lines += ["# HELP db_pool_connections Connection pool state per bind", "# TYPE db_pool_connections gauge"]
+        for bind, engine in engines.items():
+            for state, value in pool_stats(engine.pool).items():
+                lines.append(f'db_pool_connections{{bind="{bind or "default"}",state="{state}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def pool_stats(pool):
+    stats = {}
+    for state, method in (("size", "size"), ("checked_in", "checkedin"),
+                          ("checked_out", "checkedout"), ("overflow", "overflow")):
+        fn = getattr(pool, method, None)
+        if fn is not None:
+            stats[state] = fn()
+    return stats
+
+
+registry = MetricsRegistry()
+
+
+def init_metrics(app):
+    """Time every request and attach a Server-Timing header.
+
+    Call after the app's JSON provider is final: it is wrapped, not replaced.
+    METRICS_ENABLED=false turns collection off; SERVER_TIMING=false keeps the
+    metrics but drops the header.
+    """
+    app.config.setdefault("METRICS_ENABLED", os.getenv("METRICS_ENABLED", "true").lower() == "true")
+    app.config.setdefault("SERVER_TIMING", os.getenv("SERVER_TIMING", "true").lower() == "true")
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.json = TimedJSONProvider(app, app.json)
+
+    # Registered first so the clock starts before any other hook runs
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+
+    @app.after_request
+    def _finish_request(response):
+        metrics = g.pop("_request_metrics", None)
+        if metrics is None:
+            return response
+        duration = time.perf_counter() - metrics.started
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        size = None if response.is_streamed else response.calculate_content_length()
+        registry.record(request.method, route, response.status_code, metrics, duration, size)
+        if app.config["SERVER_TIMING"]:
+            response.headers["Server-Timing"] = (
+                f'app;dur={duration * 1000:.2f}, '
+                f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.sql_count} queries", '
+                f'serialize;dur={metrics.serialize_time * 1000:.2f}'
+            )
+        return response
+
+def _start_request():
+    g._request_metrics = RequestMetrics()
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect
+
+from models import (
+    db, ShowerType, Model, GalleryImage, Addon, SealPricing,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent
+)
+from price_summary import refresh_model_prices
+
+# Applied migrations, one row per version
+schema_migration = db.Table(
+    'schema_migration',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(128), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+# =======================
+# Helpers. Migrations must also be safe on a database that db.create_all()
+# has just built from the current models, so every step checks first.
+# =======================
+def add_column(conn, model, column_name):
+    table = model.__table__
+    existing = {c['name'] for c in inspect(conn).get_columns(table.name)}
+    if column_name not in existing:
+        col_type = table.c[column_name].type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column_name} {col_type}')
+
+def create_index(conn, model, *column_names, name=None):
+    table = model.__table__
+    name = name or f"ix_{table.name}_{'_'.join(column_names)}"
+    existing = {ix['name'] for ix in inspect(conn).get_indexes(table.name)}
+    if name not in existing:
+        db.Index(name, *(table.c[c] for c in column_names)).create(conn)
+
+
+# =======================
+# Migrations, in order. Never edit or renumber one that has shipped; append.
+# =======================
+def _image_metadata_columns(conn):
+    for model in (ShowerType, Model, GalleryImage):
+        for column in ('image_width', 'image_height', 'image_variants'):
+            add_column(conn, model, column)
+
+def _foreign_key_indexes(conn):
+    create_index(conn, Model, 'shower_type_id')
+    create_index(conn, ModelGlassComponent, 'model_id')
+    create_index(conn, ModelHardwareComponent, 'model_id')
+    create_index(conn, ModelSealComponent, 'model_id')
+    create_index(conn, Addon, 'model_id')
+    create_index(conn, SealPricing, 'seal_type_id')
+
+def _model_from_price(conn):
+    add_column(conn, Model, 'from_price')
+    create_index(conn, Model, 'from_price')
+    create_index(conn, ModelGlassComponent, 'glass_type_id', 'thickness_id')
+    create_index(conn, ModelHardwareComponent, 'hardware_type_id', 'finish_id')
+    create_index(conn, ModelSealComponent, 'seal_type_id')
+    refresh_model_prices(conn)
+
+MIGRATIONS = [
+    (1, 'image_metadata_columns', _image_metadata_columns),
+    (2, 'foreign_key_indexes', _foreign_key_indexes),
+    (3, 'model_from_price', _model_from_price),
+]
+
+
+def applied_versions(conn):
+    return {row.version for row in conn.execute(schema_migration.select())}
+
+def prepare_database():
+    """Create missing tables, then apply pending migrations. Needs an app context.
+
+    Run once per deploy (flask db-upgrade), never from app import: workers
+    starting together would race on the same ALTER TABLE and version rows.
+    """
+    db.create_all()
+    return upgrade_database()
+
+def upgrade_database(engine=None):
+    """Apply pending migrations, each in its own transaction. Returns the names applied."""
+    engine = engine or db.engine
+    schema_migration.create(engine, checkfirst=True)
+    applied = []
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migration.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc).replace(tzinfo=None)
+            ))
+        applied.append(name)
+    return applied
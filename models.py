@@ -1,12 +1,39 @@
+import json
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from database import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# =======================
+# ImageMixin: dimensions and resized variants of image_path, filled in by
+# the background derivative pipeline (images.py)
+# =======================
+class ImageMixin:
+    image_width = db.Column(db.Integer)
+    image_height = db.Column(db.Integer)
+    image_variants = db.Column(db.Text)  # JSON: {"thumb": {"url", "width", "height"}, "card": ..., "full": ...}
 
-db = SQLAlchemy()
+    def set_image_path(self, image_path):
+        if image_path != self.image_path:
+            self.image_path = image_path
+            self.image_width = self.image_height = self.image_variants = None
+
+    def image_dict(self):
+        return {
+            'image_width': self.image_width,
+            'image_height': self.image_height,
+            'image_variants': json.loads(self.image_variants) if self.image_variants else None,
+        }
 
 # =======================
 # ShowerType: e.g. Corner, Frontal, Bathtub Screen, CNC-Cut
 # =======================
-class ShowerType(db.Model):
+class ShowerType(ImageMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), unique=True, nullable=False)
     description = db.Column(db.Text)
@@ -26,36 +53,51 @@ class ShowerType(db.Model):
             'vat_rate': self.vat_rate,
             'needs_custom_quote': self.needs_custom_quote,
             'image_path': self.image_path,
+            **self.image_dict(),
         }
 
 # =======================
 # Model: Each shower type can have multiple models
 # =======================
-class Model(db.Model):
+class Model(ImageMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
     description = db.Column(db.String)
     image_path = db.Column(db.String)
-    shower_type_id = db.Column(db.Integer, db.ForeignKey('shower_type.id'), nullable=False)
+    shower_type_id = db.Column(db.Integer, db.ForeignKey('shower_type.id'), nullable=False, index=True)
+    # Starting price, maintained by price_summary.py; never set it directly
+    from_price = db.Column(db.Float, index=True)
 
     glass_components = db.relationship('ModelGlassComponent', backref='model', lazy=True)
     hardware_components = db.relationship('ModelHardwareComponent', backref='model', lazy=True)
     seal_components = db.relationship('ModelSealComponent', backref='model', lazy=True)
     addons = db.relationship('Addon', backref='model', lazy=True)
 
-    def to_dict(self):
-        return {
+    def to_dict(self, fields=None):
+        # fields limits the output to those keys and skips touching unrequested relationships
+        def wanted(key): return fields is None or key in fields
+        data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'image_path': self.image_path,
+            **self.image_dict(),
             'shower_type_id': self.shower_type_id,
-            'shower_type_name': self.shower_type.name if self.shower_type else None,
-            'glass_components': [gc.to_dict() for gc in self.glass_components],
-            'hardware_components': [hc.to_dict() for hc in self.hardware_components],
-            'seal_components': [sc.to_dict() for sc in self.seal_components],
-            'addons': [a.to_dict() for a in self.addons],
+            'from_price': self.from_price,
         }
+        if wanted('shower_type_name'):
+            data['shower_type_name'] = self.shower_type.name if self.shower_type else None
+        if wanted('glass_components'):
+            data['glass_components'] = [gc.to_dict() for gc in self.glass_components]
+        if wanted('hardware_components'):
+            data['hardware_components'] = [hc.to_dict() for hc in self.hardware_components]
+        if wanted('seal_components'):
+            data['seal_components'] = [sc.to_dict() for sc in self.seal_components]
+        if wanted('addons'):
+            data['addons'] = [a.to_dict() for a in self.addons]
+        if fields is not None:
+            data = {k: v for k, v in data.items() if k in fields}
+        return data
 
 # =======================
 # Glass, Hardware, Finish, Pricing Models
@@ -123,7 +165,7 @@ class SealType(db.Model):
 
 class SealPricing(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    seal_type_id = db.Column(db.Integer, db.ForeignKey('seal_type.id'))
+    seal_type_id = db.Column(db.Integer, db.ForeignKey('seal_type.id'), index=True)
     
     unit_price = db.Column(db.Float)
     quantity = db.Column(db.Integer, default=1)
@@ -144,11 +186,13 @@ class SealPricing(db.Model):
 # =======================
 class ModelGlassComponent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False, index=True)
     glass_type_id = db.Column(db.Integer, db.ForeignKey('glass_type.id'), nullable=False)
     thickness_id = db.Column(db.Integer, db.ForeignKey('glass_thickness.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     glass_type = db.relationship('GlassType')
+    # Reverse lookup: models that use a glass price
+    __table_args__ = (db.Index('ix_model_glass_component_glass_type_id_thickness_id', 'glass_type_id', 'thickness_id'),)
     thickness = db.relationship('GlassThickness')
     def to_dict(self):
         return {
@@ -162,11 +206,12 @@ class ModelGlassComponent(db.Model):
 
 class ModelHardwareComponent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False, index=True)
     hardware_type_id = db.Column(db.Integer, db.ForeignKey('hardware_type.id'), nullable=False)
     finish_id = db.Column(db.Integer, db.ForeignKey('finish.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     hardware_type = db.relationship('HardwareType')
+    __table_args__ = (db.Index('ix_model_hardware_component_hardware_type_id_finish_id', 'hardware_type_id', 'finish_id'),)
     finish = db.relationship('Finish')
     def to_dict(self):
         return {
@@ -180,8 +225,8 @@ class ModelHardwareComponent(db.Model):
 
 class ModelSealComponent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False)
-    seal_type_id = db.Column(db.Integer, db.ForeignKey('seal_type.id'), nullable=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False, index=True)
+    seal_type_id = db.Column(db.Integer, db.ForeignKey('seal_type.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     seal_type = db.relationship('SealType')
    
@@ -205,17 +250,176 @@ class Admin(db.Model):
     def check_password(self, password): return check_password_hash(self.password_hash, password)
     def to_dict(self): return {'id': self.id, 'username': self.username}
 
+class RevokedToken(db.Model):
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 class Addon(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     price = db.Column(db.Float, nullable=False)
-    model_id = db.Column(db.Integer, db.ForeignKey('model.id'))
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), index=True)
     def to_dict(self):
         return {'id': self.id, 'name': self.name, 'price': self.price, 'model_id': self.model_id}
 
-class GalleryImage(db.Model):
+class GalleryImage(ImageMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     image_path = db.Column(db.String, nullable=False)
     description = db.Column(db.String)
     def to_dict(self):
-        return {'id': self.id, 'image_path': self.image_path, 'description': self.description}
\ No newline at end of file
+        return {'id': self.id, 'image_path': self.image_path, **self.image_dict(), 'description': self.description}
+
+# =======================
+# Customer quotes: a snapshot of what was priced (names, prices, totals at
+# submit time), so later catalog edits do not rewrite history. Written by
+# the write-behind queue in quotes.py, not through the session.
+# =======================
+class Quote(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    reference = db.Column(db.String(32), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    customer_name = db.Column(db.String(128))
+    customer_email = db.Column(db.String(254))
+    customer_phone = db.Column(db.String(32))
+    notes = db.Column(db.Text)
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), index=True)
+    model_name = db.Column(db.String(128))
+    shower_type_name = db.Column(db.String(128))
+    width_mm = db.Column(db.Float)
+    height_mm = db.Column(db.Float)
+    area_m2 = db.Column(db.Float, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    subtotal = db.Column(db.Float, nullable=False)
+    profit = db.Column(db.Float, nullable=False)
+    vat = db.Column(db.Float, nullable=False)
+    total = db.Column(db.Float, nullable=False)
+    catalog_version = db.Column(db.Integer)
+    lines = db.relationship('QuoteLine', backref='quote', lazy=True, order_by='QuoteLine.id')
+
+    def to_dict(self, with_lines=False):
+        data = {
+            'id': self.id,
+            'reference': self.reference,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'customer_name': self.customer_name,
+            'customer_email': self.customer_email,
+            'customer_phone': self.customer_phone,
+            'notes': self.notes,
+            'model_id': self.model_id,
+            'model_name': self.model_name,
+            'shower_type_name': self.shower_type_name,
+            'width_mm': self.width_mm,
+            'height_mm': self.height_mm,
+            'area_m2': self.area_m2,
+            'quantity': self.quantity,
+            'subtotal': self.subtotal,
+            'profit': self.profit,
+            'vat': self.vat,
+            'total': self.total,
+            'catalog_version': self.catalog_version,
+        }
+        if with_lines:
+            data['lines'] = [line.to_dict() for line in self.lines]
+        return data
+
+class QuoteLine(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quote.id'), nullable=False, index=True)
+    kind = db.Column(db.String(16), nullable=False)  # glass, hardware, seal or addon
+    item_id = db.Column(db.Integer)  # component id, or addon id
+    description = db.Column(db.String(256))
+    quantity = db.Column(db.Float, nullable=False)
+    unit_price = db.Column(db.Float)
+    total = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'kind': self.kind, 'item_id': self.item_id, 'description': self.description,
+            'quantity': self.quantity, 'unit_price': self.unit_price, 'total': self.total,
+        }
+
+# =======================
+# Loader options: fetch everything the matching to_dict touches up front so
+# ORM reads run a fixed number of queries instead of one per row (catalog
+# list endpoints read column rows through readers.py instead). selectinload
+# sends 500 parent ids per IN query, so each collection costs one query per
+# 500 parents rather than exactly one.
+# =======================
+GLASS_COMPONENT_LOAD_OPTIONS = (
+    joinedload(ModelGlassComponent.glass_type),
+    joinedload(ModelGlassComponent.thickness),
+)
+HARDWARE_COMPONENT_LOAD_OPTIONS = (
+    joinedload(ModelHardwareComponent.hardware_type),
+    joinedload(ModelHardwareComponent.finish),
+)
+SEAL_COMPONENT_LOAD_OPTIONS = (
+    joinedload(ModelSealComponent.seal_type),
+)
+MODEL_LOAD_OPTIONS = (
+    joinedload(Model.shower_type),
+    selectinload(Model.glass_components).options(*GLASS_COMPONENT_LOAD_OPTIONS),
+    selectinload(Model.hardware_components).options(*HARDWARE_COMPONENT_LOAD_OPTIONS),
+    selectinload(Model.seal_components).options(*SEAL_COMPONENT_LOAD_OPTIONS),
+    selectinload(Model.addons),
+)
+
+# =======================
+# CatalogVersion: single-row counter bumped on every catalog write, so
+# per-process caches (price tables, responses) know when to rebuild
+# =======================
+class CatalogVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+CATALOG_MODELS = (
+    ShowerType, Model, GlassType, GlassThickness, GlassPricing, Finish,
+    HardwareType, HardwarePricing, SealType, SealPricing,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent,
+    Addon, GalleryImage,
+)
+
+def get_catalog_version():
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
+def bump_catalog_version(connection):
+    """Increment the catalog version inside the caller's transaction.
+
+    Called automatically for ORM flushes; Core bulk writes must call it themselves.
+    """
+    table = CatalogVersion.__table__
+    result = connection.execute(
+        table.update().where(table.c.id == 1).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(id=1, version=1))
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_version_on_flush(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, CATALOG_MODELS) for obj in changed):
+        bump_catalog_version(session.connection())
+
+
+# =======================
+# ChangeLog: one row per catalog row written, in commit order, for clients
+# that mirror the catalog and poll /api/changes?since=<seq>. state is the
+# row's columns as JSON after the write (NULL for deletes). Filled in by
+# changelog.py; compaction drops entries a newer one supersedes.
+# =======================
+class ChangeLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_change_log_resource_item_id_seq', 'resource', 'item_id', 'seq'),
+        {'sqlite_autoincrement': True},  # never reuse a seq, even after compaction
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    resource = db.Column(db.String(32), nullable=False)  # table name, or '*' for a reset
+    item_id = db.Column(db.Integer)
+    operation = db.Column(db.String(8), nullable=False)  # insert, update, delete or reset
+    state = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class ChangeLogHorizon(db.Model):
+    """Single row: changes up to seq are no longer complete in the log; older cursors must resync."""
+    id = db.Column(db.Integer, primary_key=True)
+    seq = db.Column(db.Integer, nullable=False, default=0)
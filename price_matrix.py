@@ -0,0 +1,267 @@
+import csv
+import io
+import math
+
+from sqlalchemy import bindparam, select
+
+from models import (
+    db, GlassType, GlassThickness, GlassPricing, Finish, HardwareType, HardwarePricing,
+    SealType, SealPricing, bump_catalog_version
+)
+from price_summary import mark_dependencies
+from changelog import record_changes
+
+# One CSV layout covers all three matrices:
+#   kind,type,option,price
+#   glass,Clear,8,120          (glass type, thickness_mm, price_per_m2)
+#   hardware,Hinge,Chrome,35   (hardware type, finish, unit_price)
+#   seal,Magnet,,12            (seal type, -, unit_price)
+CSV_COLUMNS = ("kind", "type", "option", "price")
+
+
+class PriceMatrixError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def parse_csv(text):
+    """Turn the CSV layout above into the JSON matrix shape accepted by import_matrix."""
+    matrix = {"glass": [], "hardware": [], "seal": []}
+    errors = []
+    reader = csv.DictReader(io.StringIO(text))
+    if reader.fieldnames is None or [f.strip().lower() for f in reader.fieldnames] != list(CSV_COLUMNS):
+        raise PriceMatrixError([f"CSV header must be: {','.join(CSV_COLUMNS)}"])
+    for line, row in enumerate(reader, start=2):
+        kind = (row["kind"] or "").strip().lower()
+        name = (row["type"] or "").strip()
+        option = (row["option"] or "").strip()
+        price = (row["price"] or "").strip()
+        if kind == "glass":
+            matrix["glass"].append({"glass_type": name, "thickness_mm": option, "price_per_m2": price, "line": line})
+        elif kind == "hardware":
+            matrix["hardware"].append({"hardware_type": name, "finish": option, "unit_price": price, "line": line})
+        elif kind == "seal":
+            matrix["seal"].append({"seal_type": name, "unit_price": price, "line": line})
+        else:
+            errors.append(f"line {line}: unknown kind {row['kind']!r}")
+    if errors:
+        raise PriceMatrixError(errors)
+    return matrix
+
+
+# =======================
+# Import: resolve every name to an id from one lookup per table, then
+# apply the whole matrix as executemany UPDATE/INSERT in the caller's
+# transaction
+# =======================
+def _where(row, index):
+    return f"line {row['line']}" if "line" in row else f"row {index}"
+
+def _price(row, key, index, errors):
+    try:
+        value = row.get(key)
+        if isinstance(value, bool):
+            raise TypeError
+        value = float(value)
+    except (TypeError, ValueError):
+        errors.append(f"{_where(row, index)}: '{key}' must be a number")
+        return None
+    if not math.isfinite(value):
+        errors.append(f"{_where(row, index)}: '{key}' must be a finite number")
+        return None
+    if value < 0:
+        errors.append(f"{_where(row, index)}: '{key}' must not be negative")
+        return None
+    return value
+
+def _rows(matrix, section, errors):
+    """(index, row) for each object in matrix[section]; anything else is reported in errors."""
+    rows = matrix.get(section) or []
+    if not isinstance(rows, list):
+        errors.append(f"'{section}' must be a list")
+        return []
+    valid = []
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            valid.append((i, row))
+        else:
+            errors.append(f"{section}[{i}]: must be an object")
+    return valid
+
+def _resolve(row, index, id_key, name_key, ids_by_name, valid_ids, errors, label):
+    if row.get(id_key) is not None:
+        value = row[id_key]
+        if isinstance(value, bool) or not isinstance(value, int) or value not in valid_ids:
+            errors.append(f"{_where(row, index)}: unknown {id_key} {value!r}")
+            return None
+        return value
+    name = row.get(name_key)
+    if isinstance(name, str):
+        name = name.strip()
+    if isinstance(name, (str, int, float)) and name in ids_by_name:
+        return ids_by_name[name]
+    errors.append(f"{_where(row, index)}: unknown {label} {row.get(name_key)!r}")
+    return None
+
+def _thickness_key(value):
+    """thickness_mm as an int when it is a finite whole number (CSV rows give strings), else None."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, bool) or not math.isfinite(number) or not number.is_integer():
+        return None
+    return int(number)
+
+def import_matrix(matrix):
+    """Upsert glass, hardware and seal prices from a matrix dict.
+
+    Rows may name their lookups (glass_type, thickness_mm, hardware_type, finish,
+    seal_type) or give the ids directly. All rows are validated before anything
+    is written; the caller commits. Returns inserted/updated counts per matrix.
+    """
+    if not isinstance(matrix, dict):
+        raise PriceMatrixError(["Body must be an object with 'glass', 'hardware' and/or 'seal' lists"])
+    q = db.session.query
+    glass_types = dict(q(GlassType.name, GlassType.id))
+    thicknesses = dict(q(GlassThickness.thickness_mm, GlassThickness.id))
+    hardware_types = dict(q(HardwareType.name, HardwareType.id))
+    finishes = dict(q(Finish.name, Finish.id))
+    seal_types = dict(q(SealType.name, SealType.id))
+
+    errors = []
+    glass, hardware, seal = {}, {}, {}
+    for i, row in _rows(matrix, "glass", errors):
+        gt = _resolve(row, i, "glass_type_id", "glass_type", glass_types, set(glass_types.values()), errors, "glass type")
+        th = None
+        if row.get("thickness_id") is None and _thickness_key(row.get("thickness_mm")) is None:
+            errors.append(f"{_where(row, i)}: 'thickness_mm' must be a whole number, not {row.get('thickness_mm')!r}")
+        else:
+            if row.get("thickness_id") is None:
+                row = dict(row, thickness_mm=_thickness_key(row["thickness_mm"]))
+            th = _resolve(row, i, "thickness_id", "thickness_mm", thicknesses, set(thicknesses.values()), errors, "thickness")
+        price = _price(row, "price_per_m2", i, errors)
+        if gt is not None and th is not None and price is not None:
+            glass[(gt, th)] = price
+    for i, row in _rows(matrix, "hardware", errors):
+        ht = _resolve(row, i, "hardware_type_id", "hardware_type", hardware_types, set(hardware_types.values()), errors, "hardware type")
+        fin = _resolve(row, i, "finish_id", "finish", finishes, set(finishes.values()), errors, "finish")
+        price = _price(row, "unit_price", i, errors)
+        if ht is not None and fin is not None and price is not None:
+            hardware[(ht, fin)] = price
+    for i, row in _rows(matrix, "seal", errors):
+        st = _resolve(row, i, "seal_type_id", "seal_type", seal_types, set(seal_types.values()), errors, "seal type")
+        price = _price(row, "unit_price", i, errors)
+        if st is not None and price is not None:
+            seal[st] = price
+    if errors:
+        raise PriceMatrixError(errors)
+
+    existing_glass = {(gt, th): id for id, gt, th in q(GlassPricing.id, GlassPricing.glass_type_id, GlassPricing.thickness_id)}
+    existing_hardware = {(ht, fin): id for id, ht, fin in q(HardwarePricing.id, HardwarePricing.hardware_type_id, HardwarePricing.finish_id)}
+    existing_seal = {st for (st,) in q(SealPricing.seal_type_id).distinct()}
+
+    glass_table, hardware_table, seal_table = GlassPricing.__table__, HardwarePricing.__table__, SealPricing.__table__
+    glass_updates = [{"_id": existing_glass[k], "price_per_m2": p} for k, p in glass.items() if k in existing_glass]
+    glass_inserts = [{"glass_type_id": k[0], "thickness_id": k[1], "price_per_m2": p} for k, p in glass.items() if k not in existing_glass]
+    hardware_updates = [{"_id": existing_hardware[k], "unit_price": p} for k, p in hardware.items() if k in existing_hardware]
+    hardware_inserts = [{"hardware_type_id": k[0], "finish_id": k[1], "unit_price": p} for k, p in hardware.items() if k not in existing_hardware]
+    seal_updates = [{"_seal_type_id": st, "unit_price": p} for st, p in seal.items() if st in existing_seal]
+    seal_inserts = [{"seal_type_id": st, "unit_price": p, "quantity": 1} for st, p in seal.items() if st not in existing_seal]
+
+    conn = db.session.connection()
+    written = []  # (model, ids, operation) for the change log
+    if glass_updates:
+        conn.execute(glass_table.update().where(glass_table.c.id == bindparam("_id")), glass_updates)
+        written.append((GlassPricing, [row["_id"] for row in glass_updates], "update"))
+    if glass_inserts:
+        ids = conn.execute(glass_table.insert().returning(glass_table.c.id), glass_inserts).scalars().all()
+        written.append((GlassPricing, ids, "insert"))
+    if hardware_updates:
+        conn.execute(hardware_table.update().where(hardware_table.c.id == bindparam("_id")), hardware_updates)
+        written.append((HardwarePricing, [row["_id"] for row in hardware_updates], "update"))
+    if hardware_inserts:
+        ids = conn.execute(hardware_table.insert().returning(hardware_table.c.id), hardware_inserts).scalars().all()
+        written.append((HardwarePricing, ids, "insert"))
+    if seal_updates:
+        conn.execute(seal_table.update().where(seal_table.c.seal_type_id == bindparam("_seal_type_id")), seal_updates)
+        ids = conn.execute(select(seal_table.c.id).where(seal_table.c.seal_type_id.in_(
+            [row["_seal_type_id"] for row in seal_updates]))).scalars().all()
+        written.append((SealPricing, ids, "update"))
+    if seal_inserts:
+        ids = conn.execute(seal_table.insert().returning(seal_table.c.id), seal_inserts).scalars().all()
+        written.append((SealPricing, ids, "insert"))
+    if glass or hardware or seal:
+        bump_catalog_version(conn)
+        for model, ids, operation in written:
+            record_changes(conn, model, ids, operation)
+        mark_dependencies(db.session, "glass", glass)
+        mark_dependencies(db.session, "hardware", hardware)
+        mark_dependencies(db.session, "seal", seal)
+
+    return {
+        "glass": {"inserted": len(glass_inserts), "updated": len(glass_updates)},
+        "hardware": {"inserted": len(hardware_inserts), "updated": len(hardware_updates)},
+        "seal": {"inserted": len(seal_inserts), "updated": len(seal_updates)},
+    }
+
+
+# =======================
+# Export: the same layouts, streamed row by row from joined Core selects
+# =======================
+def _glass_rows():
+    q = db.session.query(GlassType.name, GlassThickness.thickness_mm, GlassPricing.price_per_m2) \
+        .join(GlassType, GlassPricing.glass_type_id == GlassType.id) \
+        .join(GlassThickness, GlassPricing.thickness_id == GlassThickness.id) \
+        .order_by(GlassType.name, GlassThickness.thickness_mm)
+    return q.yield_per(1000)
+
+def _hardware_rows():
+    q = db.session.query(HardwareType.name, Finish.name, HardwarePricing.unit_price) \
+        .join(HardwareType, HardwarePricing.hardware_type_id == HardwareType.id) \
+        .join(Finish, HardwarePricing.finish_id == Finish.id) \
+        .order_by(HardwareType.name, Finish.name)
+    return q.yield_per(1000)
+
+def _seal_rows():
+    q = db.session.query(SealType.name, SealPricing.unit_price) \
+        .join(SealType, SealPricing.seal_type_id == SealType.id) \
+        .order_by(SealType.name, SealPricing.id)
+    seen = set()
+    for name, price in q.yield_per(1000):
+        if name not in seen:  # oldest row per seal type, as the quote engine uses
+            seen.add(name)
+            yield name, "", price
+
+EXPORT_SECTIONS = (
+    ("glass", _glass_rows, ("glass_type", "thickness_mm", "price_per_m2")),
+    ("hardware", _hardware_rows, ("hardware_type", "finish", "unit_price")),
+    ("seal", _seal_rows, ("seal_type", None, "unit_price")),
+)
+
+def export_csv():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for kind, rows, _ in EXPORT_SECTIONS:
+        for row in rows():
+            writer.writerow((kind,) + tuple(row))
+            if buffer.tell() > 8192:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+def export_json(dumps):
+    """Stream the JSON matrix accepted by import_matrix; dumps encodes one row."""
+    yield "{"
+    for n, (kind, rows, (name_key, option_key, price_key)) in enumerate(EXPORT_SECTIONS):
+        yield ("," if n else "") + f'"{kind}":['
+        for i, (name, option, price) in enumerate(rows()):
+            row = {name_key: name, price_key: price}
+            if option_key:
+                row[option_key] = option
+            yield ("," if i else "") + dumps(row)
+        yield "]"
+    yield "}"
@@ -0,0 +1,154 @@
+from sqlalchemy import and_, bindparam, event, func, inspect, select, tuple_
+from sqlalchemy.orm import Session
+
+from models import (
+    ShowerType, Model, GlassPricing, HardwarePricing, SealPricing,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent
+)
+from pricing import REFERENCE_AREA_M2
+from changelog import record_changes
+
+# =======================
+# Model.from_price: the model's base configuration (its components at
+# REFERENCE_AREA_M2 of glass, no addons) with margin and VAT, the same
+# figure /api/pricing/what-if reports. NULL when a component has no price
+# or the model has no components.
+#
+# Kept current incrementally: flushes record which pricing rows, shower
+# types and component lists changed, and at commit the affected models are
+# found through the component indexes and recomputed with a few grouped
+# queries. Core bulk writes call mark_dependencies() themselves.
+# =======================
+PRICE_DEPENDENCIES = "price_dependencies"
+CHUNK = 500
+
+
+def mark_dependencies(session, kind, keys):
+    """Record changed price inputs for recompute at commit.
+
+    kind is "glass" ((glass_type_id, thickness_id) keys), "hardware"
+    ((hardware_type_id, finish_id)), "seal" (seal_type_id), "shower_type" (id),
+    "model" (id) or "all" (keys ignored).
+    """
+    deps = session.info.setdefault(PRICE_DEPENDENCIES, {})
+    deps.setdefault(kind, set()).update(keys)
+
+def _key_values(obj, fields):
+    """Current and pre-flush values of an object's key columns."""
+    state = inspect(obj)
+    current = tuple(getattr(obj, f) for f in fields)
+    keys = {current}
+    for i, field in enumerate(fields):
+        for old in state.attrs[field].history.deleted:
+            keys.add(current[:i] + (old,) + current[i + 1:])
+    return keys
+
+_COLLECTORS = (
+    (GlassPricing, "glass", ("glass_type_id", "thickness_id")),
+    (HardwarePricing, "hardware", ("hardware_type_id", "finish_id")),
+    (SealPricing, "seal", ("seal_type_id",)),
+    (ShowerType, "shower_type", ("id",)),
+    (ModelGlassComponent, "model", ("model_id",)),
+    (ModelHardwareComponent, "model", ("model_id",)),
+    (ModelSealComponent, "model", ("model_id",)),
+    (Model, "model", ("id",)),
+)
+
+@event.listens_for(Session, "after_flush")
+def _collect_price_dependencies(session, flush_context):
+    for obj in session.new | session.dirty | session.deleted:
+        for cls, kind, fields in _COLLECTORS:
+            if isinstance(obj, cls):
+                if isinstance(obj, Model) and obj not in session.new and not inspect(obj).attrs.shower_type_id.history.deleted:
+                    continue
+                keys = _key_values(obj, fields)
+                mark_dependencies(session, kind, {k[0] for k in keys} if len(fields) == 1 else keys)
+
+@event.listens_for(Session, "before_commit")
+def _refresh_model_prices_on_commit(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    deps = session.info.pop(PRICE_DEPENDENCIES, None)
+    if deps:
+        conn = session.connection()
+        changed = refresh_model_prices(conn, None if "all" in deps else affected_models(conn, deps))
+        record_changes(conn, Model, changed)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_price_dependencies(session):
+    session.info.pop(PRICE_DEPENDENCIES, None)
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK):
+        yield values[start:start + CHUNK]
+
+def affected_models(conn, deps):
+    """Reverse lookup from changed price inputs to model ids, via the component indexes."""
+    ids = set(deps.get("model", ()))
+    lookups = (
+        ("glass", tuple_(ModelGlassComponent.glass_type_id, ModelGlassComponent.thickness_id), ModelGlassComponent.model_id),
+        ("hardware", tuple_(ModelHardwareComponent.hardware_type_id, ModelHardwareComponent.finish_id), ModelHardwareComponent.model_id),
+        ("seal", ModelSealComponent.seal_type_id, ModelSealComponent.model_id),
+        ("shower_type", Model.shower_type_id, Model.id),
+    )
+    for kind, key_column, model_column in lookups:
+        for chunk in _chunks(deps.get(kind, ())):
+            ids.update(conn.execute(select(model_column).where(key_column.in_(chunk)).distinct()).scalars())
+    ids.discard(None)
+    return ids
+
+def _component_sums(conn, component, price_table, join_on, model_ids):
+    """model_id -> (sum of price x quantity, number of unpriced components)."""
+    stmt = (
+        select(component.model_id, func.sum(price_table.c.price * component.quantity),
+               func.count() - func.count(price_table.c.price))
+        .select_from(component.__table__.outerjoin(price_table, join_on(price_table)))
+        .group_by(component.model_id)
+    )
+    if model_ids is not None:
+        stmt = stmt.where(component.model_id.in_(model_ids))
+    return {model_id: (total or 0.0, missing) for model_id, total, missing in conn.execute(stmt)}
+
+def refresh_model_prices(conn, model_ids=None):
+    """Recompute from_price for model_ids (every model when None) on conn. Returns the ids whose price changed."""
+    if model_ids is not None and not model_ids:
+        return []
+    glass_prices = select(GlassPricing.glass_type_id, GlassPricing.thickness_id,
+                          GlassPricing.price_per_m2.label("price")).subquery()
+    hardware_prices = select(HardwarePricing.hardware_type_id, HardwarePricing.finish_id,
+                             HardwarePricing.unit_price.label("price")).subquery()
+    # SealPricing has no unique constraint; the oldest priced row wins, as in PriceTables
+    oldest_seal = (select(func.min(SealPricing.id)).where(SealPricing.unit_price.isnot(None))
+                   .group_by(SealPricing.seal_type_id))
+    seal_prices = select(SealPricing.seal_type_id, SealPricing.unit_price.label("price")) \
+        .where(SealPricing.id.in_(oldest_seal)).subquery()
+
+    changed = []
+    chunks = [None] if model_ids is None else list(_chunks(model_ids))
+    for chunk in chunks:
+        glass = _component_sums(conn, ModelGlassComponent, glass_prices, lambda p: and_(
+            p.c.glass_type_id == ModelGlassComponent.glass_type_id, p.c.thickness_id == ModelGlassComponent.thickness_id), chunk)
+        hardware = _component_sums(conn, ModelHardwareComponent, hardware_prices, lambda p: and_(
+            p.c.hardware_type_id == ModelHardwareComponent.hardware_type_id, p.c.finish_id == ModelHardwareComponent.finish_id), chunk)
+        seal = _component_sums(conn, ModelSealComponent, seal_prices,
+                               lambda p: p.c.seal_type_id == ModelSealComponent.seal_type_id, chunk)
+        stmt = select(Model.id, Model.from_price, ShowerType.profit_margin, ShowerType.vat_rate).select_from(
+            Model.__table__.outerjoin(ShowerType.__table__, ShowerType.id == Model.shower_type_id))
+        if chunk is not None:
+            stmt = stmt.where(Model.id.in_(chunk))
+        rows = []
+        for model_id, current, margin, vat_rate in conn.execute(stmt):
+            parts = [glass.get(model_id), hardware.get(model_id), seal.get(model_id)]
+            price = None
+            if any(parts) and not any(p[1] for p in parts if p):
+                subtotal = (parts[0] or (0.0, 0))[0] * REFERENCE_AREA_M2 + sum((p or (0.0, 0))[0] for p in parts[1:])
+                price = round(subtotal * (1 + (margin or 0.0)) * (1 + (vat_rate or 0.0)), 2)
+            if price != current:
+                rows.append({"_id": model_id, "from_price": price})
+        if rows:
+            table = Model.__table__
+            conn.execute(table.update().where(table.c.id == bindparam("_id")), rows)
+            changed.extend(row["_id"] for row in rows)
+    return changed
@@ -0,0 +1,455 @@
+import math
+import threading
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only what-if repricing needs it
+    np = None
+
+from models import (
+    db, ShowerType, Model, GlassType, GlassThickness, GlassPricing,
+    Finish, HardwareType, HardwarePricing, SealType, SealPricing,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent, Addon,
+    get_catalog_version
+)
+
+
+class QuoteError(ValueError):
+    """Raised when a configuration cannot be priced (unknown ids, missing prices)."""
+
+
+class RepricingError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _money(value):
+    return round(value, 2)
+
+
+# =======================
+# PriceTables: the whole pricing catalog as plain dict lookups, loaded with
+# one SELECT per table and reused until the catalog version changes
+# =======================
+class PriceTables:
+    def __init__(self, version):
+        self.version = version
+        self.shower_types = {}      # id -> (name, profit_margin, vat_rate, needs_custom_quote)
+        self.models = {}            # id -> (name, shower_type_id)
+        self.glass_types = {}       # id -> name
+        self.thicknesses = {}       # id -> thickness_mm
+        self.finishes = {}          # id -> name
+        self.hardware_types = {}    # id -> name
+        self.seal_types = {}        # id -> name
+        self.glass_prices = {}      # (glass_type_id, thickness_id) -> price_per_m2
+        self.hardware_prices = {}   # (hardware_type_id, finish_id) -> unit_price
+        self.seal_prices = {}       # seal_type_id -> unit_price
+        self.glass_components = defaultdict(list)     # model_id -> [(id, glass_type_id, thickness_id, quantity)]
+        self.hardware_components = defaultdict(list)  # model_id -> [(id, hardware_type_id, finish_id, quantity)]
+        self.seal_components = defaultdict(list)      # model_id -> [(id, seal_type_id, quantity)]
+        self.addons = {}            # id -> (name, price, model_id)
+
+    @classmethod
+    def load(cls, version):
+        t = cls(version)
+        q = db.session.query
+        for id, name, margin, vat, custom in q(
+                ShowerType.id, ShowerType.name, ShowerType.profit_margin,
+                ShowerType.vat_rate, ShowerType.needs_custom_quote):
+            t.shower_types[id] = (name, margin or 0.0, vat or 0.0, bool(custom))
+        for id, name, shower_type_id in q(Model.id, Model.name, Model.shower_type_id):
+            t.models[id] = (name, shower_type_id)
+        t.glass_types = dict(q(GlassType.id, GlassType.name))
+        t.thicknesses = dict(q(GlassThickness.id, GlassThickness.thickness_mm))
+        t.finishes = dict(q(Finish.id, Finish.name))
+        t.hardware_types = dict(q(HardwareType.id, HardwareType.name))
+        t.seal_types = dict(q(SealType.id, SealType.name))
+        for gt, th, price in q(GlassPricing.glass_type_id, GlassPricing.thickness_id, GlassPricing.price_per_m2):
+            t.glass_prices[(gt, th)] = price
+        for ht, fin, price in q(HardwarePricing.hardware_type_id, HardwarePricing.finish_id, HardwarePricing.unit_price):
+            t.hardware_prices[(ht, fin)] = price
+        # SealPricing has no unique constraint; like .first(), the oldest row wins
+        for st, price in q(SealPricing.seal_type_id, SealPricing.unit_price).order_by(SealPricing.id.desc()):
+            if price is not None:
+                t.seal_prices[st] = price
+        for id, model_id, gt, th, qty in q(
+                ModelGlassComponent.id, ModelGlassComponent.model_id, ModelGlassComponent.glass_type_id,
+                ModelGlassComponent.thickness_id, ModelGlassComponent.quantity).order_by(ModelGlassComponent.id):
+            t.glass_components[model_id].append((id, gt, th, qty))
+        for id, model_id, ht, fin, qty in q(
+                ModelHardwareComponent.id, ModelHardwareComponent.model_id, ModelHardwareComponent.hardware_type_id,
+                ModelHardwareComponent.finish_id, ModelHardwareComponent.quantity).order_by(ModelHardwareComponent.id):
+            t.hardware_components[model_id].append((id, ht, fin, qty))
+        for id, model_id, st, qty in q(
+                ModelSealComponent.id, ModelSealComponent.model_id, ModelSealComponent.seal_type_id,
+                ModelSealComponent.quantity).order_by(ModelSealComponent.id):
+            t.seal_components[model_id].append((id, st, qty))
+        for id, name, price, model_id in q(Addon.id, Addon.name, Addon.price, Addon.model_id):
+            t.addons[id] = (name, price, model_id)
+        return t
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+def get_price_tables():
+    """Return the price tables for the current catalog version, rebuilding them at most once per change."""
+    global _tables
+    version = get_catalog_version()
+    tables = _tables
+    if tables is None or tables.version != version:
+        with _tables_lock:
+            if _tables is None or _tables.version != version:
+                _tables = PriceTables.load(version)
+            tables = _tables
+    return tables
+
+
+# =======================
+# Quote computation
+# =======================
+def _positive_number(config, key, default=None):
+    value = config.get(key, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        value = float(value)
+    except (TypeError, ValueError):
+        raise QuoteError(f"'{key}' must be a number")
+    if not math.isfinite(value):
+        raise QuoteError(f"'{key}' must be a finite number")
+    if value <= 0:
+        raise QuoteError(f"'{key}' must be greater than zero")
+    return value
+
+def _positive_integer(config, key, default=None):
+    value = config.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise QuoteError(f"'{key}' must be a positive integer")
+    return value
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _optional_id(config, key):
+    value = config.get(key)
+    if value is not None and not _is_id(value):
+        raise QuoteError(f"'{key}' must be an integer id")
+    return value
+
+def _area_m2(config):
+    if "area_m2" in config:
+        return _positive_number(config, "area_m2")
+    if "width_mm" in config or "height_mm" in config:
+        return _positive_number(config, "width_mm") * _positive_number(config, "height_mm") / 1_000_000
+    raise QuoteError("Provide 'area_m2' or both 'width_mm' and 'height_mm'")
+
+def compute_quote(tables, config):
+    """Price one configuration.
+
+    config keys: model_id (required), area_m2 or width_mm + height_mm (glass area),
+    optional glass_type_id / thickness_id / finish_id overriding the model's defaults,
+    addon_ids and quantity (number of identical units, default 1).
+    Glass lines cost price_per_m2 x area x component quantity; hardware and seal
+    lines cost unit_price x component quantity. Margin and VAT come from the
+    model's ShowerType.
+    """
+    if not isinstance(config, dict):
+        raise QuoteError("Each configuration must be an object")
+    model_id = config.get("model_id")
+    if not _is_id(model_id):
+        raise QuoteError("'model_id' must be an integer id")
+    if model_id not in tables.models:
+        raise QuoteError(f"Unknown model_id {model_id!r}")
+    model_name, shower_type_id = tables.models[model_id]
+    shower_type_name, margin, vat_rate, needs_custom_quote = tables.shower_types.get(
+        shower_type_id, (None, 0.0, 0.0, False))
+    area = _area_m2(config)
+    units = _positive_integer(config, "quantity", 1)
+    glass_type_override = _optional_id(config, "glass_type_id")
+    thickness_override = _optional_id(config, "thickness_id")
+    finish_override = _optional_id(config, "finish_id")
+    addon_ids = config.get("addon_ids") or []
+    if not isinstance(addon_ids, list) or not all(_is_id(addon_id) for addon_id in addon_ids):
+        raise QuoteError("'addon_ids' must be a list of integer ids")
+
+    glass_lines = []
+    for comp_id, gt, th, qty in tables.glass_components.get(model_id, ()):
+        gt = glass_type_override or gt
+        th = thickness_override or th
+        price = tables.glass_prices.get((gt, th))
+        if price is None:
+            raise QuoteError(f"No glass price for glass_type_id={gt}, thickness_id={th}")
+        glass_lines.append({
+            'component_id': comp_id,
+            'glass_type_id': gt,
+            'glass_type': tables.glass_types.get(gt),
+            'thickness_id': th,
+            'thickness': tables.thicknesses.get(th),
+            'quantity': qty,
+            'area_m2': area,
+            'price_per_m2': price,
+            'total': _money(price * area * qty),
+        })
+
+    hardware_lines = []
+    for comp_id, ht, fin, qty in tables.hardware_components.get(model_id, ()):
+        fin = finish_override or fin
+        price = tables.hardware_prices.get((ht, fin))
+        if price is None:
+            raise QuoteError(f"No hardware price for hardware_type_id={ht}, finish_id={fin}")
+        hardware_lines.append({
+            'component_id': comp_id,
+            'hardware_type_id': ht,
+            'hardware_type': tables.hardware_types.get(ht),
+            'finish_id': fin,
+            'finish': tables.finishes.get(fin),
+            'quantity': qty,
+            'unit_price': price,
+            'total': _money(price * qty),
+        })
+
+    seal_lines = []
+    for comp_id, st, qty in tables.seal_components.get(model_id, ()):
+        price = tables.seal_prices.get(st)
+        if price is None:
+            raise QuoteError(f"No seal price for seal_type_id={st}")
+        seal_lines.append({
+            'component_id': comp_id,
+            'seal_type_id': st,
+            'seal_type': tables.seal_types.get(st),
+            'quantity': qty,
+            'unit_price': price,
+            'total': _money(price * qty),
+        })
+
+    addon_lines = []
+    for addon_id in addon_ids:
+        addon = tables.addons.get(addon_id)
+        if addon is None or addon[2] not in (None, model_id):
+            raise QuoteError(f"Addon {addon_id!r} is not available for model {model_id}")
+        addon_lines.append({'id': addon_id, 'name': addon[0], 'price': addon[1]})
+
+    glass_total = sum(line['total'] for line in glass_lines)
+    hardware_total = sum(line['total'] for line in hardware_lines)
+    seal_total = sum(line['total'] for line in seal_lines)
+    addons_total = sum(line['price'] or 0 for line in addon_lines)
+    unit_subtotal = glass_total + hardware_total + seal_total + addons_total
+    subtotal = unit_subtotal * units
+    profit = subtotal * margin
+    net = subtotal + profit
+    vat = net * vat_rate
+
+    return {
+        'model_id': model_id,
+        'model_name': model_name,
+        'shower_type_id': shower_type_id,
+        'shower_type_name': shower_type_name,
+        'needs_custom_quote': needs_custom_quote,
+        'area_m2': area,
+        'quantity': units,
+        'glass': glass_lines,
+        'hardware': hardware_lines,
+        'seal': seal_lines,
+        'addons': addon_lines,
+        'glass_total': _money(glass_total),
+        'hardware_total': _money(hardware_total),
+        'seal_total': _money(seal_total),
+        'addons_total': _money(addons_total),
+        'subtotal': _money(subtotal),
+        'profit_margin': margin,
+        'profit': _money(profit),
+        'net': _money(net),
+        'vat_rate': vat_rate,
+        'vat': _money(vat),
+        'total': _money(net + vat),
+        'catalog_version': tables.version,
+    }
+
+
+# =======================
+# What-if repricing: every model's price at a reference glass area, as
+# array arithmetic over the component lists. Component quantities and
+# price-vector indexes are built once per catalog version; each what-if
+# call only copies the price vectors, applies the overrides and re-sums
+# with np.bincount. Totals are computed before per-line rounding, so they
+# can differ from compute_quote by a cent. Addons are left out: they are
+# optional extras, not part of a model's base price.
+# =======================
+REFERENCE_AREA_M2 = 1.0
+
+class CatalogArrays:
+    def __init__(self, tables):
+        self.model_ids = np.array(sorted(tables.models), dtype=np.int64)
+        model_index = {id: i for i, id in enumerate(self.model_ids.tolist())}
+        self.shower_type_ids = sorted(tables.shower_types)
+        shower_type_index = {id: i for i, id in enumerate(self.shower_type_ids)}
+        # Models whose shower type is missing price with 0 margin/VAT, like compute_quote
+        self.margins = np.array([tables.shower_types[id][1] for id in self.shower_type_ids] + [0.0])
+        self.vat_rates = np.array([tables.shower_types[id][2] for id in self.shower_type_ids] + [0.0])
+        self.model_shower_type = np.array(
+            [shower_type_index.get(tables.models[id][1], len(self.shower_type_ids)) for id in self.model_ids.tolist()],
+            dtype=np.int64)
+
+        def section(components, key_of, prices):
+            # Price keys: every priced key plus every key a component uses (NaN when unpriced)
+            keys = list(prices)
+            index = {key: i for i, key in enumerate(keys)}
+            model_idx, price_idx, quantity = [], [], []
+            for model_id, rows in components.items():
+                if model_id not in model_index:
+                    continue
+                for row in rows:
+                    key = key_of(row)
+                    if key not in index:
+                        index[key] = len(keys)
+                        keys.append(key)
+                    model_idx.append(model_index[model_id])
+                    price_idx.append(index[key])
+                    quantity.append(row[-1])
+            vector = np.array([prices.get(key, np.nan) for key in keys], dtype=np.float64)
+            return (index, vector, np.array(model_idx, dtype=np.int64),
+                    np.array(price_idx, dtype=np.int64), np.array(quantity, dtype=np.float64))
+
+        self.glass = section(tables.glass_components, lambda c: (c[1], c[2]), tables.glass_prices)
+        self.hardware = section(tables.hardware_components, lambda c: (c[1], c[2]), tables.hardware_prices)
+        self.seal = section(tables.seal_components, lambda c: c[1], tables.seal_prices)
+
+    def totals(self, glass_prices, hardware_prices, seal_prices, margins, vat_rates, area):
+        """Gross price per model (NaN where a component has no price)."""
+        n = len(self.model_ids)
+        subtotal = np.zeros(n)
+        for (_, _, model_idx, price_idx, quantity), prices, scale in (
+                (self.glass, glass_prices, area), (self.hardware, hardware_prices, 1.0), (self.seal, seal_prices, 1.0)):
+            if len(model_idx):
+                subtotal += np.bincount(model_idx, weights=prices[price_idx] * quantity * scale, minlength=n)
+        margin = margins[self.model_shower_type]
+        return subtotal * (1 + margin) * (1 + vat_rates[self.model_shower_type])
+
+
+_arrays = None
+_arrays_lock = threading.Lock()
+
+def get_catalog_arrays(tables):
+    global _arrays
+    arrays = _arrays
+    if arrays is None or arrays[0] != tables.version:
+        with _arrays_lock:
+            if _arrays is None or _arrays[0] != tables.version:
+                _arrays = (tables.version, CatalogArrays(tables))
+            arrays = _arrays
+    return arrays[1]
+
+def _number(row, key, errors, where, maximum=None):
+    value = row.get(key) if isinstance(row, dict) else None
+    if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+            or value < 0 or (maximum and value > maximum)):
+        errors.append(f"{where}: '{key}' must be a number" + (f" between 0 and {maximum}" if maximum else " >= 0"))
+        return None
+    return float(value)
+
+def _override_rows(changes, name, errors):
+    rows = changes.get(name)
+    if rows is None:
+        return []
+    if not isinstance(rows, list):
+        errors.append(f"{name}: must be a list")
+        return []
+    return rows
+
+def _apply_price_overrides(changes, name, section, key_fields, price_field, errors):
+    """Copy of the section's price vector with the overrides in changes[name] applied."""
+    index, vector = section[0], section[1].copy()
+    for i, row in enumerate(_override_rows(changes, name, errors)):
+        price = _number(row, price_field, errors, f"{name}[{i}]")
+        if price is None:
+            continue
+        key = tuple(row.get(f) for f in key_fields)
+        if not all(_is_id(k) for k in key):
+            errors.append(f"{name}[{i}]: " + ", ".join(f"'{f}'" for f in key_fields) + " must be integer ids")
+            continue
+        # Keys no component uses cannot move any model's price
+        position = index.get(key[0] if len(key_fields) == 1 else key)
+        if position is not None:
+            vector[position] = price
+    return vector
+
+def what_if(tables, changes, only_changed=True):
+    """Old vs new price of every model under hypothetical pricing changes.
+
+    changes keys (all optional):
+      glass_pricing:    [{glass_type_id, thickness_id, price_per_m2}]
+      hardware_pricing: [{hardware_type_id, finish_id, unit_price}]
+      seal_pricing:     [{seal_type_id, unit_price}]
+      shower_types:     [{id, profit_margin?, vat_rate?}]
+      area_m2:          glass area to price at (default REFERENCE_AREA_M2)
+    Returns per-model rows (only models whose price moved unless only_changed
+    is false) plus aggregates over the whole catalog.
+    """
+    if not isinstance(changes, dict):
+        raise RepricingError(["Body must be a JSON object"])
+    errors = []
+    area = REFERENCE_AREA_M2 if changes.get("area_m2") is None else _number(changes, "area_m2", errors, "area_m2")
+    if area == 0:
+        errors.append("area_m2: must be greater than zero")
+    arrays = get_catalog_arrays(tables)
+    glass = _apply_price_overrides(changes, "glass_pricing", arrays.glass, ("glass_type_id", "thickness_id"), "price_per_m2", errors)
+    hardware = _apply_price_overrides(changes, "hardware_pricing", arrays.hardware, ("hardware_type_id", "finish_id"), "unit_price", errors)
+    seal = _apply_price_overrides(changes, "seal_pricing", arrays.seal, ("seal_type_id",), "unit_price", errors)
+    margins = arrays.margins.copy()
+    vat_rates = arrays.vat_rates.copy()
+    shower_type_index = {id: i for i, id in enumerate(arrays.shower_type_ids)}
+    for i, row in enumerate(_override_rows(changes, "shower_types", errors)):
+        where = f"shower_types[{i}]"
+        if not isinstance(row, dict) or not _is_id(row.get("id")):
+            errors.append(f"{where}: 'id' must be an integer id")
+            continue
+        st = shower_type_index.get(row["id"])
+        if st is None:
+            errors.append(f"{where}: unknown shower type id")
+            continue
+        if row.get("profit_margin") is not None:
+            value = _number(row, "profit_margin", errors, where, maximum=10)
+            margins[st] = margins[st] if value is None else value
+        if row.get("vat_rate") is not None:
+            value = _number(row, "vat_rate", errors, where, maximum=1)
+            vat_rates[st] = vat_rates[st] if value is None else value
+    if errors:
+        raise RepricingError(errors)
+
+    old = arrays.totals(arrays.glass[1], arrays.hardware[1], arrays.seal[1], arrays.margins, arrays.vat_rates, area)
+    new = arrays.totals(glass, hardware, seal, margins, vat_rates, area)
+    priced = ~np.isnan(old) & ~np.isnan(new)
+    delta = np.where(priced, new - old, 0.0)
+    changed = priced & (np.abs(delta) >= 0.005)
+    selected = changed if only_changed else np.ones(len(old), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_pct = np.where(priced & (old != 0), delta / old * 100, 0.0)
+
+    rows = []
+    for i in np.flatnonzero(selected).tolist():
+        model_id = int(arrays.model_ids[i])
+        rows.append({
+            'model_id': model_id,
+            'model_name': tables.models[model_id][0],
+            'shower_type_id': tables.models[model_id][1],
+            'old_total': _money(float(old[i])) if priced[i] else None,
+            'new_total': _money(float(new[i])) if priced[i] else None,
+            'delta': _money(float(delta[i])),
+            'delta_pct': _money(float(delta_pct[i])),
+        })
+    aggregates = {
+        'models': len(old),
+        'priced': int(priced.sum()),
+        'changed': int(changed.sum()),
+        'old_total': _money(float(old[priced].sum())),
+        'new_total': _money(float(new[priced].sum())),
+        'delta': _money(float(delta.sum())),
+        'mean_delta': _money(float(delta[priced].mean())) if priced.any() else 0.0,
+        'mean_delta_pct': _money(float(delta_pct[priced].mean())) if priced.any() else 0.0,
+        'max_increase': _money(float(delta.max())) if len(delta) else 0.0,
+        'max_decrease': _money(float(delta.min())) if len(delta) else 0.0,
+    }
+    return {'catalog_version': tables.version, 'area_m2': area, 'models': rows, 'aggregates': aggregates}
@@ -0,0 +1,89 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+from cache import response_cache
+from models import db
+
+# Tables that grow with the catalog; a full scan of one of these fails the check
+LARGE_TABLES = {
+    'model', 'model_glass_component', 'model_hardware_component', 'model_seal_component',
+    'addon', 'gallery_image', 'quote', 'quote_line', 'change_log',
+}
+
+# Requests that must be answered through indexes. Full-list GETs without
+# limit are deliberately absent: reading every row is what they are for.
+# Filtered lists are also probed without limit, since the LIMIT exemption in
+# _full_scans would let a paged request hide a missing filter index.
+ENDPOINT_PROBES = [
+    '/api/models?limit=50',
+    '/api/models?shower_type_id=1',
+    '/api/models?shower_type_id=1&limit=50',
+    '/api/models?limit=50&cursor=1',
+    '/api/models?sort=price&limit=50',
+    '/api/models?sort=-price&limit=50&cursor=1000.0,1',
+    '/api/models?min_price=100&max_price=200&limit=50',
+    '/api/model-glass-components/1',
+    '/api/model-hardware-components/1',
+    '/api/model-seal-components/1',
+    '/api/addons?model_id=1',
+    '/api/gallery?limit=50',
+    '/api/glass-pricing?glass_type_id=1',
+    '/api/seal-pricing?seal_type_id=1',
+    '/api/changes?since=1&limit=50',
+]
+
+
+def _full_scans(statement, plan_rows):
+    details = [row[-1] for row in plan_rows]
+    # A LIMIT query whose rows already come out in order stops early, so its scan is bounded;
+    # with a filter it is bounded only if matches turn up early, hence the unlimited probes
+    bounded = 'LIMIT' in statement.upper() and not any('TEMP B-TREE' in d for d in details)
+    scans = []
+    for detail in details:
+        words = detail.split()
+        # "SCAN <table>" is a full table scan; "SCAN <table> USING [COVERING] INDEX"
+        # walks a whole index, which is just as linear
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] in LARGE_TABLES and not bounded:
+            scans.append(detail)
+    return scans
+
+def check_query_plans(app, probes=ENDPOINT_PROBES):
+    """Run each probe through the app and EXPLAIN QUERY PLAN every SELECT it issued.
+
+    Returns a list of (url, sql, plan detail) for statements that fully scan a
+    large table. SQLite only. Run it against a populated database: relationship
+    loads are only issued when parent rows exist.
+    """
+    engine = db.engines[None]
+    if engine.dialect.name != 'sqlite':
+        raise RuntimeError('Query plan checks need SQLite (EXPLAIN QUERY PLAN)')
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    # Its own connection: a pooled one may reuse cached EXPLAIN statements that
+    # SQLite planned against an older schema (e.g. before an index was dropped)
+    explain_engine = create_engine(engine.url, poolclass=NullPool)
+    engines = list(db.engines.values())
+    for e in engines:
+        event.listen(e, 'before_cursor_execute', capture)
+    failures = []
+    try:
+        client = app.test_client()
+        for url in probes:
+            captured.clear()
+            response_cache.clear()
+            client.get(url)
+            statements = list(captured)
+            with explain_engine.connect() as conn:
+                for statement, parameters in statements:
+                    plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+                    for detail in _full_scans(statement, plan):
+                        failures.append((url, statement, detail))
+    finally:
+        for e in engines:
+            event.remove(e, 'before_cursor_execute', capture)
+        explain_engine.dispose()
+    return failures
@@ -0,0 +1,274 @@
+import atexit
+import csv
+import fcntl
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from database import _is_locked_error
+from models import db, Quote, QuoteLine
+from pricing import QuoteError
+
+QUOTE_BATCH_SIZE = int(os.getenv("QUOTE_BATCH_SIZE", 200))
+QUOTE_BATCH_WAIT_MS = int(os.getenv("QUOTE_BATCH_WAIT_MS", 50))
+QUOTE_QUEUE_MAX = int(os.getenv("QUOTE_QUEUE_MAX", 10000))
+QUOTE_WRITE_RETRIES = int(os.getenv("QUOTE_WRITE_RETRIES", 8))
+QUOTE_DEAD_LETTER_FILE = os.getenv("QUOTE_DEAD_LETTER_FILE")  # default: <instance>/quote_dead_letters.jsonl
+
+CUSTOMER_FIELDS = {"customer_name": 128, "customer_email": 254, "customer_phone": 32, "notes": 2000}
+
+
+class QuoteQueueFull(Exception):
+    pass
+
+
+def _dimension(data, field):
+    value = data.get(field)
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def build_quote_record(breakdown, data):
+    """Turn a compute_quote breakdown plus the customer's details into quote and line rows."""
+    quote = {
+        "reference": uuid.uuid4().hex,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "model_id": breakdown["model_id"],
+        "model_name": breakdown["model_name"],
+        "shower_type_name": breakdown["shower_type_name"],
+        "width_mm": _dimension(data, "width_mm"),
+        "height_mm": _dimension(data, "height_mm"),
+        "area_m2": breakdown["area_m2"],
+        "quantity": breakdown["quantity"],
+        "subtotal": breakdown["subtotal"],
+        "profit": breakdown["profit"],
+        "vat": breakdown["vat"],
+        "total": breakdown["total"],
+        "catalog_version": breakdown["catalog_version"],
+    }
+    for field, max_length in CUSTOMER_FIELDS.items():
+        value = data.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > max_length):
+            raise QuoteError(f"'{field}' must be a string of at most {max_length} characters")
+        quote[field] = value.strip() if value else None
+    if quote["customer_email"] and "@" not in quote["customer_email"]:
+        raise QuoteError("'customer_email' is not a valid email address")
+
+    lines = []
+    for line in breakdown["glass"]:
+        lines.append({"kind": "glass", "item_id": line["component_id"], "quantity": line["quantity"],
+                      "description": f"{line['glass_type']} {line['thickness']}mm, {line['area_m2']} m2",
+                      "unit_price": line["price_per_m2"], "total": line["total"]})
+    for line in breakdown["hardware"]:
+        lines.append({"kind": "hardware", "item_id": line["component_id"], "quantity": line["quantity"],
+                      "description": f"{line['hardware_type']} ({line['finish']})",
+                      "unit_price": line["unit_price"], "total": line["total"]})
+    for line in breakdown["seal"]:
+        lines.append({"kind": "seal", "item_id": line["component_id"], "quantity": line["quantity"],
+                      "description": line["seal_type"], "unit_price": line["unit_price"], "total": line["total"]})
+    for line in breakdown["addons"]:
+        lines.append({"kind": "addon", "item_id": line["id"], "quantity": 1,
+                      "description": line["name"], "unit_price": line["price"], "total": line["price"] or 0})
+    return {"quote": quote, "lines": lines}
+
+
+def _insert_records(records):
+    """Insert quote records (build_quote_record output) and their lines in one transaction."""
+    quote_table, line_table = Quote.__table__, QuoteLine.__table__
+    with db.engine.begin() as conn:
+        ids = conn.execute(
+            quote_table.insert().returning(quote_table.c.id, sort_by_parameter_order=True),
+            [record["quote"] for record in records],
+        ).scalars().all()
+        lines = [dict(line, quote_id=quote_id) for quote_id, record in zip(ids, records) for line in record["lines"]]
+        if lines:
+            conn.execute(line_table.insert(), lines)
+
+
+# =======================
+# QuoteWriter: write-behind queue for customer quotes. Submissions return
+# as soon as the record is queued; one background thread per process
+# drains the queue, inserting up to QUOTE_BATCH_SIZE quotes per
+# transaction, so a spike costs one commit per batch rather than one per
+# customer. Pending quotes are written out at interpreter exit; a hard
+# kill loses at most the queue's contents. A batch that cannot be saved
+# goes to the dead-letter file for replay_dead_letters (flask replay-quotes):
+# every customer in it already holds a reference.
+# =======================
+class QuoteWriter:
+    def __init__(self, batch_size=QUOTE_BATCH_SIZE, batch_wait=QUOTE_BATCH_WAIT_MS / 1000, max_pending=QUOTE_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, record):
+        self._ensure_started(app)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            raise QuoteQueueFull("Too many quotes waiting to be saved, retry shortly")
+
+    def _ensure_started(self, app):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, args=(app,), name="quote-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def flush(self, timeout=10):
+        """Wait until everything queued so far is written (or timeout seconds pass)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def _run(self, app):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with app.app_context():
+                    self._write(app, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, app, batch):
+        attempt = 0
+        while True:
+            try:
+                _insert_records(batch)
+                return
+            except OperationalError as e:
+                # Locked database: keep the batch and retry with backoff, a bounded number of
+                # times so a stuck batch cannot block the queue. Anything else is permanent.
+                attempt += 1
+                if _is_locked_error(e) and attempt <= QUOTE_WRITE_RETRIES:
+                    app.logger.warning("Saving %d quotes failed (attempt %d), retrying", len(batch), attempt, exc_info=True)
+                    time.sleep(min(0.05 * 2 ** attempt, 5))
+                    continue
+                self._give_up(app, batch)
+                return
+            except Exception:
+                self._give_up(app, batch)
+                return
+
+    def _give_up(self, app, batch):
+        app.logger.exception("Saving %d quotes failed, moving them to %s: %s", len(batch),
+                             dead_letter_path(app), ", ".join(r["quote"]["reference"] for r in batch))
+        write_dead_letters(app, batch)
+
+
+quote_writer = QuoteWriter()
+
+
+# =======================
+# Dead letters: one JSON record per line, appended under an exclusive
+# lock so several worker processes can share the file
+# =======================
+def dead_letter_path(app):
+    return QUOTE_DEAD_LETTER_FILE or os.path.join(app.instance_path, "quote_dead_letters.jsonl")
+
+def write_dead_letters(app, records):
+    path = dead_letter_path(app)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            for record in records:
+                handle.write(json.dumps(record, default=datetime.isoformat) + "\n")
+    except OSError:
+        app.logger.exception("Could not write %d quotes to %s", len(records), path)
+
+def replay_dead_letters(app):
+    """Insert the dead-lettered quotes, one transaction each. Returns (saved, skipped, failed).
+
+    Quotes whose reference is already stored are skipped; failed ones stay in
+    the file for the next run.
+    """
+    path = dead_letter_path(app)
+    if not os.path.exists(path):
+        return 0, 0, 0
+    saved = skipped = 0
+    remaining = []
+    with open(path, "r+", encoding="utf-8") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record["quote"]["created_at"] = datetime.fromisoformat(record["quote"]["created_at"])
+            if db.session.query(Quote.id).filter_by(reference=record["quote"]["reference"]).first():
+                skipped += 1
+                continue
+            try:
+                _insert_records([record])
+                saved += 1
+            except Exception:
+                app.logger.exception("Replaying quote %s failed", record["quote"]["reference"])
+                remaining.append(line)
+        handle.seek(0)
+        handle.truncate()
+        handle.writelines(remaining)
+    return saved, skipped, len(remaining)
+
+
+# =======================
+# CSV export, streamed in keyset-ordered chunks of quotes plus their lines
+# =======================
+EXPORT_COLUMNS = (
+    "reference", "created_at", "customer_name", "customer_email", "customer_phone", "notes",
+    "model_id", "model_name", "shower_type_name", "width_mm", "height_mm", "area_m2", "quantity",
+    "subtotal", "profit", "vat", "total",
+)
+EXPORT_CHUNK = 1000
+
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_cell(value):
+    """Quote text a spreadsheet would run as a formula; customers fill in these fields."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def export_csv():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS + ("lines",))
+    columns = [Quote.__table__.c[name] for name in EXPORT_COLUMNS]
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Quote.id, *columns).where(Quote.id > last_id).order_by(Quote.id).limit(EXPORT_CHUNK)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        lines = {}
+        for quote_id, kind, description, quantity, total in db.session.execute(
+                select(QuoteLine.quote_id, QuoteLine.kind, QuoteLine.description, QuoteLine.quantity, QuoteLine.total)
+                .where(QuoteLine.quote_id.in_([row.id for row in rows])).order_by(QuoteLine.id)):
+            lines.setdefault(quote_id, []).append(f"{kind}: {description} x{quantity:g} = {total}")
+        for row in rows:
+            writer.writerow([_csv_cell(value) for value in row[1:]] + [_csv_cell("; ".join(lines.get(row.id, ())))])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,200 @@
+import json
+from collections import defaultdict
+
+from flask import jsonify, request
+from sqlalchemy import select
+
+from listing import ListArgsError, list_payload, narrow, parse_list_args
+from models import (
+    db, ShowerType, Model, GlassType, GlassThickness, GlassPricing, Finish,
+    HardwareType, HardwarePricing, SealType, SealPricing,
+    ModelGlassComponent, ModelHardwareComponent, ModelSealComponent, Addon, GalleryImage
+)
+
+CHUNK = 500
+
+
+# =======================
+# RowReader: the column-tuple counterpart of a model's to_dict. Reads plain
+# rows (no ORM objects, identity map or relationship loading) and zips them
+# with the to_dict keys, so list endpoints skip object hydration entirely.
+# Child collections take one query each, by id list or (past CHUNK rows)
+# through the parent statement, so a list runs 1 + children queries however
+# long it is (tests/test_query_counts.py).
+# Each reader must produce exactly what to_dict does for the same row;
+# change both together.
+# =======================
+class RowReader:
+    def __init__(self, model, columns, joins=(), json_keys=(), defaults=None, children=None):
+        self.model = model
+        self.keys = tuple(column.key for column in columns)
+        self.columns = columns
+        self.joins = joins                  # [(table, onclause)], outer joined for related names
+        self.json_keys = json_keys          # keys holding JSON text, decoded on output
+        self.defaults = defaults or {}      # key -> value used when the row has NULL
+        self.children = children or {}     # key -> RowReader whose rows are grouped by model_id
+
+    def select(self):
+        stmt = select(*self.columns).select_from(self.model)
+        for target, onclause in self.joins:
+            stmt = stmt.outerjoin(target, onclause)
+        return stmt
+
+    def child_statements(self, rows, parents, fields=None):
+        """(key, statement) pairs loading the children of rows, one statement per child collection.
+
+        Up to CHUNK rows are matched by id; beyond that the children are
+        selected through parents, the statement that read rows, so a long
+        list costs no more queries than a short one. Each child row carries
+        its parent's id as the last column.
+        """
+        ids = [row.id for row in rows]
+        if not ids:
+            return
+        if len(ids) > CHUNK:
+            ids = select(parents.subquery().c.id)
+        for key, child in self.children.items():
+            if fields is None or key in fields:
+                parent = child.model.model_id
+                yield key, child.select().add_columns(parent).where(parent.in_(ids)).order_by(child.model.id)
+
+    def to_dict(self, row):
+        data = dict(zip(self.keys, row))
+        for key in self.json_keys:
+            if data[key]:
+                data[key] = json.loads(data[key])
+            else:
+                data[key] = None
+        for key, default in self.defaults.items():
+            if data[key] is None:
+                data[key] = default
+        return data
+
+    def serializer(self, child_results=(), fields=None):
+        """Per-row function for list_payload; child_results are the (key, rows) of child_statements."""
+        if not self.children:
+            return self.to_dict
+        grouped = {key: defaultdict(list) for key in self.children if fields is None or key in fields}
+        for key, rows in child_results:
+            child = self.children[key]
+            for row in rows:
+                grouped[key][row[-1]].append(child.to_dict(row[:-1]))
+
+        def serialize(row):
+            data = self.to_dict(row)
+            for key, by_parent in grouped.items():
+                data[key] = by_parent.get(row.id, [])
+            return data
+        return serialize
+
+
+IMAGE_COLUMNS = ("image_width", "image_height", "image_variants")
+
+def _columns(model, *names):
+    return [getattr(model, name) for name in names]
+
+def _name_reader(model, *names):
+    return RowReader(model, _columns(model, "id", *names))
+
+
+GLASS_COMPONENT_READER = RowReader(
+    ModelGlassComponent,
+    _columns(ModelGlassComponent, "id", "glass_type_id") + [GlassType.name.label("glass_type")]
+    + [ModelGlassComponent.thickness_id, GlassThickness.thickness_mm.label("thickness"), ModelGlassComponent.quantity],
+    joins=[(GlassType, GlassType.id == ModelGlassComponent.glass_type_id),
+           (GlassThickness, GlassThickness.id == ModelGlassComponent.thickness_id)],
+)
+HARDWARE_COMPONENT_READER = RowReader(
+    ModelHardwareComponent,
+    _columns(ModelHardwareComponent, "id", "hardware_type_id") + [HardwareType.name.label("hardware_type")]
+    + [ModelHardwareComponent.finish_id, Finish.name.label("finish"), ModelHardwareComponent.quantity],
+    joins=[(HardwareType, HardwareType.id == ModelHardwareComponent.hardware_type_id),
+           (Finish, Finish.id == ModelHardwareComponent.finish_id)],
+)
+SEAL_COMPONENT_READER = RowReader(
+    ModelSealComponent,
+    _columns(ModelSealComponent, "id", "seal_type_id") + [SealType.name.label("seal_type"), ModelSealComponent.quantity],
+    joins=[(SealType, SealType.id == ModelSealComponent.seal_type_id)],
+)
+ADDON_READER = _name_reader(Addon, "name", "price", "model_id")
+
+READERS = {
+    ShowerType: RowReader(
+        ShowerType,
+        _columns(ShowerType, "id", "name", "description", "profit_margin", "vat_rate", "needs_custom_quote",
+                 "image_path", *IMAGE_COLUMNS),
+        json_keys=("image_variants",),
+    ),
+    Model: RowReader(
+        Model,
+        _columns(Model, "id", "name", "description", "image_path", *IMAGE_COLUMNS, "shower_type_id", "from_price")
+        + [ShowerType.name.label("shower_type_name")],
+        joins=[(ShowerType, ShowerType.id == Model.shower_type_id)],
+        json_keys=("image_variants",),
+        children={
+            "glass_components": GLASS_COMPONENT_READER,
+            "hardware_components": HARDWARE_COMPONENT_READER,
+            "seal_components": SEAL_COMPONENT_READER,
+            "addons": ADDON_READER,
+        },
+    ),
+    GlassType: _name_reader(GlassType, "name"),
+    GlassThickness: _name_reader(GlassThickness, "thickness_mm"),
+    Finish: _name_reader(Finish, "name"),
+    HardwareType: _name_reader(HardwareType, "name"),
+    SealType: _name_reader(SealType, "name"),
+    GlassPricing: RowReader(
+        GlassPricing,
+        _columns(GlassPricing, "id", "glass_type_id") + [GlassType.name.label("glass_type")]
+        + [GlassPricing.thickness_id, GlassThickness.thickness_mm, GlassPricing.price_per_m2],
+        joins=[(GlassType, GlassType.id == GlassPricing.glass_type_id),
+               (GlassThickness, GlassThickness.id == GlassPricing.thickness_id)],
+    ),
+    HardwarePricing: RowReader(
+        HardwarePricing,
+        _columns(HardwarePricing, "id", "hardware_type_id") + [HardwareType.name.label("hardware_type")]
+        + [HardwarePricing.finish_id, Finish.name.label("finish"), HardwarePricing.unit_price],
+        joins=[(HardwareType, HardwareType.id == HardwarePricing.hardware_type_id),
+               (Finish, Finish.id == HardwarePricing.finish_id)],
+    ),
+    SealPricing: RowReader(
+        SealPricing,
+        _columns(SealPricing, "id", "seal_type_id") + [SealType.name.label("seal_type")]
+        + _columns(SealPricing, "unit_price", "quantity"),
+        joins=[(SealType, SealType.id == SealPricing.seal_type_id)],
+        defaults={"seal_type": ""},
+    ),
+    Addon: ADDON_READER,
+    GalleryImage: RowReader(
+        GalleryImage, _columns(GalleryImage, "id", "image_path", *IMAGE_COLUMNS, "description"),
+        json_keys=("image_variants",),
+    ),
+}
+
+
+# =======================
+# Synchronous helpers for the Flask routes (asgi.py runs the same
+# statements on its async session)
+# =======================
+def read_dicts(model, stmt=None, fields=None):
+    """Every row of stmt (default: the whole table) as model.to_dict() would return it."""
+    reader = READERS[model]
+    stmt = reader.select().order_by(model.id) if stmt is None else stmt
+    rows = db.session.execute(stmt).all()
+    children = [(key, db.session.execute(child).all()) for key, child in reader.child_statements(rows, stmt, fields)]
+    serialize = reader.serializer(children, fields)
+    return [serialize(row) for row in rows]
+
+def read_list_response(model, filters=(), sorts=None):
+    """list_response for model, read through its RowReader."""
+    reader = READERS[model]
+    try:
+        list_args = parse_list_args(request.args, filters, sorts)
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
+    stmt = narrow(reader.select(), model, list_args)
+    rows = db.session.execute(stmt).all()
+    # narrow() reads one row past the page to detect more; that row's children are never sent
+    children = [(key, db.session.execute(child).all())
+                for key, child in reader.child_statements(rows[:list_args.limit], stmt, list_args.fields)]
+    return jsonify(list_payload(rows, list_args, reader.serializer(children, list_args.fields)))
@@ -0,0 +1,88 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename, send_file
+
+CHUNK_SIZE = 64 * 1024
+# store_content_addressed names: the SHA-256 of the bytes plus the extension
+CONTENT_ADDRESSED_NAME = re.compile(r"[0-9a-f]{64}(\.[a-z0-9]+)?")
+
+
+def file_extension(filename):
+    filename = secure_filename(filename or "")
+    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+
+def store_content_addressed(stream, directory, original_filename):
+    """Stream an upload into directory under its SHA-256 name and return the filename.
+
+    The digest is computed while the bytes are written to a temp file, so the
+    upload is read exactly once. If an object with that digest already exists
+    the temp file is discarded and the existing name is returned, so identical
+    uploads share one file (and one URL).
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+        os.chmod(tmp_path, 0o644)
+        ext = file_extension(original_filename)
+        filename = digest.hexdigest() + (f".{ext}" if ext else "")
+        final_path = os.path.join(directory, filename)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+        return filename
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# =======================
+# Serving stored uploads. Only content-addressed names are marked immutable:
+# their bytes can never change. Other files (legacy uploads, derived
+# variants) may be replaced under the same name, so clients revalidate them
+# with the ETag. Dot-prefixed paths (chunked upload sessions, in-progress
+# temp files) are never served. With UPLOAD_SENDFILE set, the body transfer
+# is handed to the front proxy:
+#   x-sendfile        Apache/lighttpd; X-Sendfile carries the absolute path
+#   x-accel-redirect  nginx; X-Accel-Redirect carries UPLOAD_ACCEL_PREFIX/<url path>,
+#                     e.g. location /_uploads_internal/ { internal; alias /srv/app/; }
+# =======================
+def send_stored_file(directory, filename, url_path):
+    config = current_app.config
+    if any(part.startswith(".") for part in filename.split("/")):
+        abort(404)
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    max_age = config['UPLOAD_CACHE_MAX_AGE']
+    mode = config['UPLOAD_SENDFILE']
+
+    if mode == 'x-accel-redirect':
+        # nginx serves the body itself, including Range and conditional requests
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = config['UPLOAD_ACCEL_PREFIX'].rstrip('/') + url_path
+    else:
+        response = send_file(
+            path, request.environ, conditional=True, etag=True, max_age=max_age,
+            use_x_sendfile=(mode == 'x-sendfile'), response_class=current_app.response_class
+        )
+    response.cache_control.public = True
+    if CONTENT_ADDRESSED_NAME.fullmatch(filename):
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = None
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATALOG_MODELS = 1200
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """The Flask app on a fresh SQLite database. app.py reads DATABASE_URI at import, so import it here."""
+    os.environ["DATABASE_URI"] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    import app as application
+    from migrations import prepare_database
+    with application.app.app_context():
+        prepare_database()
+    return application.app
+
+
+@pytest.fixture(scope="session")
+def catalog(app):
+    """A synthetic catalog of CATALOG_MODELS models, seeded once for the whole run."""
+    from admin import bulk_seed, generate_fixture
+    with app.app_context():
+        bulk_seed(generate_fixture(shower_types=5, models=CATALOG_MODELS, components=4000, gallery=600))
+
+
+@pytest.fixture(scope="session")
+def priced_model(app):
+    """Ids of one fully priced model: 2 x 100/m2 glass, 3 x 10 hardware, 1 x 5 seal, a 25 addon.
+
+    The shower type adds a 20% margin and 18% VAT.
+    """
+    from models import (
+        db, ShowerType, Model, GlassType, GlassThickness, GlassPricing, Finish, HardwareType, HardwarePricing,
+        SealType, SealPricing, ModelGlassComponent, ModelHardwareComponent, ModelSealComponent, Addon,
+    )
+    with app.app_context():
+        shower_type = ShowerType(name="Priced corner", profit_margin=0.2, vat_rate=0.18)
+        glass, thickness, finish = GlassType(name="Priced clear"), GlassThickness(thickness_mm=99), Finish(name="Priced chrome")
+        hardware, seal = HardwareType(name="Priced hinge"), SealType(name="Priced seal")
+        model = Model(name="Priced model", shower_type=shower_type)
+        addon = Addon(name="Towel bar", price=25, model=model)
+        db.session.add_all([
+            model, addon,
+            GlassPricing(glass_type=glass, thickness=thickness, price_per_m2=100),
+            HardwarePricing(hardware_type=hardware, finish=finish, unit_price=10),
+            SealPricing(seal_type=seal, unit_price=5),
+            ModelGlassComponent(model=model, glass_type=glass, thickness=thickness, quantity=2),
+            ModelHardwareComponent(model=model, hardware_type=hardware, finish=finish, quantity=3),
+            ModelSealComponent(model=model, seal_type=seal, quantity=1),
+        ])
+        db.session.commit()
+        return {"shower_type_id": shower_type.id, "model_id": model.id, "addon_id": addon.id,
+                "glass_type_id": glass.id, "thickness_id": thickness.id, "finish_id": finish.id,
+                "hardware_type_id": hardware.id, "seal_type_id": seal.id}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(app):
+    """Authorization headers for a freshly created admin."""
+    from models import db, Admin
+    with app.app_context():
+        admin = Admin(username="test-admin")
+        admin.set_password("test-password")
+        db.session.add(admin)
+        db.session.commit()
+    response = app.test_client().post("/api/login", json={"username": "test-admin", "password": "test-password"})
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries(fn) -> number of SQL statements fn() executed on any engine."""
+    from models import db
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def run(fn):
+        counter = QueryCounter()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", counter)
+        try:
+            fn()
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", counter)
+        return counter.count
+    return run
@@ -0,0 +1,34 @@
+"""The ASGI read endpoints serve the same database, and the same bytes, as the Flask app."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def asgi_client(app):
+    from starlette.testclient import TestClient
+    import asgi
+    with TestClient(asgi.app) as client:
+        yield client
+
+
+def test_read_engine_uses_the_resolved_flask_engine(app, monkeypatch):
+    import asgi
+    from models import db
+    # The repo default: Flask-SQLAlchemy resolves it under instance/, the raw string would not be
+    monkeypatch.setitem(app.config, "SQLALCHEMY_DATABASE_URI", "sqlite:///shower_quote.db")
+    engine = asgi.create_read_engine()
+    with app.app_context():
+        assert engine.url.database == db.engine.url.database
+
+def test_models_list_matches_flask(app, asgi_client):
+    from cache import response_cache
+    from models import db, Model, ShowerType
+    with app.app_context():
+        shower_type = ShowerType(name="ASGI shower type")
+        db.session.add_all([shower_type, Model(name="ASGI model", shower_type=shower_type)])
+        db.session.commit()
+    response_cache.clear()
+    response = asgi_client.get("/api/models")
+    assert response.status_code == 200
+    assert "ASGI model" in {model["name"] for model in response.json()}
+    response_cache.clear()
+    assert response.content == app.test_client().get("/api/models").get_data()
@@ -0,0 +1,76 @@
+"""Login throttling, refresh tokens and refresh-token revocation on logout."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def admin(app):
+    from models import db, Admin
+    with app.app_context():
+        admin = Admin(username="auth-admin")
+        admin.set_password("auth-password")
+        db.session.add(admin)
+        db.session.commit()
+    return {"username": "auth-admin", "password": "auth-password"}
+
+@pytest.fixture
+def client(app):
+    # Own address, so the per-IP failure count cannot throttle other modules' logins
+    client = app.test_client()
+    client.environ_base["REMOTE_ADDR"] = "192.0.2.10"
+    return client
+
+
+def _login(client, credentials):
+    return client.post("/api/login", json=credentials)
+
+
+def test_login_returns_access_and_refresh_tokens(client, admin):
+    response = _login(client, admin)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["success"] and body["access_token"] and body["refresh_token"]
+
+def test_wrong_password_is_401(client, admin):
+    response = _login(client, dict(admin, password="wrong"))
+    assert response.status_code == 401
+    assert response.get_json()["success"] is False
+
+def test_repeated_failures_are_throttled(client):
+    from auth import login_throttle
+    credentials = {"username": "auth-throttled", "password": "wrong"}
+    statuses = [_login(client, credentials).status_code for _ in range(login_throttle.max_per_user + 1)]
+    assert statuses == [401] * login_throttle.max_per_user + [429]
+    response = _login(client, credentials)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+def test_refresh_token_issues_an_access_token(client, admin):
+    tokens = _login(client, admin).get_json()
+    response = client.post("/api/token/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 200
+    assert response.get_json()["access_token"]
+
+def test_access_token_cannot_refresh(client, admin):
+    tokens = _login(client, admin).get_json()
+    response = client.post("/api/token/refresh", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 422
+
+def test_logout_revokes_the_refresh_token(client, admin):
+    tokens = _login(client, admin).get_json()
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.post("/api/logout", headers=refresh).status_code == 200
+    assert client.post("/api/token/refresh", headers=refresh).status_code == 401
+
+def test_logout_with_access_token_revokes_the_refresh_token_in_the_body(client, admin):
+    tokens = _login(client, admin).get_json()
+    response = client.post("/api/logout", json={"refresh_token": tokens["refresh_token"]},
+                           headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.post("/api/token/refresh", headers=refresh).status_code == 401
+
+def test_logout_rejects_an_invalid_refresh_token(client, admin):
+    tokens = _login(client, admin).get_json()
+    response = client.post("/api/logout", json={"refresh_token": "not-a-token"},
+                           headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 400
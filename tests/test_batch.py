@@ -0,0 +1,61 @@
+"""POST /api/batch: several catalog writes in one transaction, with $n.field references."""
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shower_type_names(app, *names):
+    from models import ShowerType
+    with app.app_context():
+        return [t.name for t in ShowerType.query.filter(ShowerType.name.in_(names))]
+
+
+def test_operations_share_one_transaction_and_references(app, client, admin_headers):
+    operations = [
+        {"method": "POST", "path": "/api/shower-types", "body": {"name": "Batch walk-in"}},
+        {"method": "POST", "path": "/api/models", "body": {"name": "Batch model", "shower_type_id": "$0.id"}},
+        {"method": "PUT", "path": "/api/shower-types/$0.id", "body": {"description": "Added in a batch"}},
+    ]
+    response = client.post("/api/batch", json={"operations": operations}, headers=admin_headers)
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 200]
+    assert results[1]["body"]["shower_type_id"] == results[0]["body"]["id"]
+    assert results[2]["body"]["description"] == "Added in a batch"
+    assert _shower_type_names(app, "Batch walk-in") == ["Batch walk-in"]
+
+def test_failed_operation_rolls_back_the_batch(app, client, admin_headers):
+    operations = [
+        {"method": "POST", "path": "/api/shower-types", "body": {"name": "Batch rolled back"}},
+        {"method": "PUT", "path": "/api/shower-types/999999", "body": {"name": "Missing"}},
+    ]
+    response = client.post("/api/batch", json=operations, headers=admin_headers)
+    assert response.status_code == 404
+    body = response.get_json()
+    assert body["failed"] == 1
+    assert [r["status"] for r in body["results"]] == [201, 404]
+    assert _shower_type_names(app, "Batch rolled back") == []
+
+@pytest.mark.parametrize("body, failed", [
+    ({"operations": []}, None),
+    ({"operations": "POST /api/shower-types"}, None),
+    ([{"method": "GET", "path": "/api/shower-types"}], 0),
+    ([{"method": "POST"}], 0),
+    ([{"method": "POST", "path": "/api/login", "body": {}}], 0),
+    ([{"method": "POST", "path": "/api/models/1/upload-image"}], 0),
+    ([{"method": "POST", "path": "/api/shower-types", "body": {"name": "Batch bad ref"}},
+      {"method": "POST", "path": "/api/models", "body": {"shower_type_id": "$1.id"}}], 1),
+    ([{"method": "POST", "path": "/api/shower-types", "body": {"name": "Batch bad field"}},
+      {"method": "POST", "path": "/api/models", "body": {"shower_type_id": "$0.missing"}}], 1),
+])
+def test_invalid_batches_are_rejected(app, client, admin_headers, body, failed):
+    response = client.post("/api/batch", json=body, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()["failed"] == failed
+    assert _shower_type_names(app, "Batch bad ref", "Batch bad field") == []
+
+def test_requires_admin(client):
+    assert client.post("/api/batch", json=[]).status_code == 401
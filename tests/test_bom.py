@@ -0,0 +1,75 @@
+"""PUT /api/models/<id>/bom: atomic replacement of a model's components and addons."""
+import pytest
+
+
+@pytest.fixture
+def bom_model(app, priced_model):
+    """A fresh model with one glass component and one addon, using priced_model's lookups."""
+    from models import db, Model, ModelGlassComponent, Addon
+    with app.app_context():
+        model = Model(name="BOM model", shower_type_id=priced_model["shower_type_id"])
+        db.session.add(model)
+        db.session.flush()
+        glass = ModelGlassComponent(model_id=model.id, glass_type_id=priced_model["glass_type_id"],
+                                    thickness_id=priced_model["thickness_id"], quantity=1)
+        db.session.add_all([glass, Addon(name="Shelf", price=10, model_id=model.id)])
+        db.session.commit()
+        return {"id": model.id, "glass_component_id": glass.id}
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_replace_updates_matches_and_deletes_the_rest(client, admin_headers, priced_model, bom_model):
+    bom = {
+        "glass_components": [{"id": bom_model["glass_component_id"], "glass_type_id": priced_model["glass_type_id"],
+                              "thickness_id": priced_model["thickness_id"], "quantity": 2}],
+        "hardware_components": [{"hardware_type_id": priced_model["hardware_type_id"],
+                                 "finish_id": priced_model["finish_id"], "quantity": 4}],
+        "addons": [{"name": "Towel bar", "price": 30}],
+    }
+    response = client.put(f"/api/models/{bom_model['id']}/bom", json=bom, headers=admin_headers)
+    assert response.status_code == 200
+    model = response.get_json()
+    assert [(c["id"], c["quantity"]) for c in model["glass_components"]] == [(bom_model["glass_component_id"], 2)]
+    assert [c["quantity"] for c in model["hardware_components"]] == [4]
+    assert [(a["name"], a["price"]) for a in model["addons"]] == [("Towel bar", 30)]
+
+def test_absent_sections_are_left_alone(client, admin_headers, bom_model):
+    response = client.put(f"/api/models/{bom_model['id']}/bom", json={"addons": []}, headers=admin_headers)
+    assert response.status_code == 200
+    model = response.get_json()
+    assert model["addons"] == [] and len(model["glass_components"]) == 1
+
+@pytest.mark.parametrize("bom, error", [
+    ({"addons": [{"id": [1], "name": "Shelf", "price": 10}]}, "'id' must be an integer"),
+    ({"addons": [{"id": "1", "name": "Shelf", "price": 10}]}, "'id' must be an integer"),
+    ({"addons": [{"id": 10 ** 9, "name": "Shelf", "price": 10}]}, "does not belong to model"),
+    ({"addons": [{"name": "Shelf", "price": -1}]}, "'price' must be a non-negative number"),
+    ({"addons": [{"name": "Shelf", "price": 1}, {"name": "Shelf", "price": 2}]}, "duplicate"),
+    ({"seal_components": [{"seal_type_id": 10 ** 9}]}, "does not exist"),
+    ({"seal_components": [{"seal_type_id": "1"}]}, "must be an integer id"),
+    ({"seal_components": [{"seal_type_id": 1, "quantity": 0}]}, "'quantity' must be a positive integer"),
+    ({"seal_components": {"seal_type_id": 1}}, "must be a list"),
+    ({"doors": []}, "Unknown section"),
+    ([], "must be a JSON object"),
+])
+def test_invalid_bom_is_a_400_and_changes_nothing(app, client, admin_headers, bom_model, bom, error):
+    before = client.get("/api/models").get_data()
+    response = client.put(f"/api/models/{bom_model['id']}/bom", json=bom, headers=admin_headers)
+    assert response.status_code == 400
+    assert any(error in message for message in response.get_json()["errors"])
+    assert client.get("/api/models").get_data() == before
+
+def test_non_finite_price_is_a_400(client, admin_headers, bom_model):
+    body = '{"addons": [{"name": "Shelf", "price": NaN}]}'
+    response = client.put(f"/api/models/{bom_model['id']}/bom", data=body, content_type="application/json",
+                          headers=admin_headers)
+    assert response.status_code == 400
+
+def test_unknown_model_is_a_404(client, admin_headers):
+    assert client.put("/api/models/999999999/bom", json={}, headers=admin_headers).status_code == 404
+
+def test_replace_requires_admin(client, bom_model):
+    assert client.put(f"/api/models/{bom_model['id']}/bom", json={"addons": []}).status_code == 401
@@ -0,0 +1,84 @@
+"""GET /api/changes: the catalog change feed, its paging and the 410 resync signal."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def latest(app):
+    """latest() -> the newest seq a client can currently hold."""
+    from changelog import latest_change_seq
+    from models import db
+
+    def run():
+        with app.app_context():
+            return latest_change_seq(db.session)
+    return run
+
+
+def _create_shower_type(client, headers, name):
+    response = client.post("/api/shower-types", json={"name": name}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_feed_lists_writes_after_the_cursor(client, admin_headers, latest):
+    since = latest()
+    created = _create_shower_type(client, admin_headers, "Changes niche")
+    client.put(f"/api/shower-types/{created}", json={"description": "Updated"}, headers=admin_headers)
+    body = client.get(f"/api/changes?since={since}").get_json()
+    entries = [(c["resource"], c["id"], c["operation"]) for c in body["changes"]]
+    assert entries == [("shower_type", created, "insert"), ("shower_type", created, "update")]
+    assert body["changes"][-1]["state"]["description"] == "Updated"
+    assert body["has_more"] is False and body["next_since"] == body["latest"] == latest()
+
+def test_limit_pages_through_the_feed(client, admin_headers, latest):
+    since = latest()
+    ids = [_create_shower_type(client, admin_headers, f"Changes page {i}") for i in range(3)]
+    seen = []
+    while True:
+        body = client.get(f"/api/changes?since={since}&limit=2").get_json()
+        seen += [c["id"] for c in body["changes"]]
+        since = body["next_since"]
+        if not body["has_more"]:
+            break
+    assert seen == ids
+
+def test_deletes_are_tombstones(client, admin_headers, latest):
+    created = _create_shower_type(client, admin_headers, "Changes deleted")
+    since = latest()
+    client.delete(f"/api/shower-types/{created}", headers=admin_headers)
+    change, = client.get(f"/api/changes?since={since}").get_json()["changes"]
+    assert (change["id"], change["operation"], change["state"]) == (created, "delete", None)
+
+@pytest.mark.parametrize("query", ["since=-1", "since=abc", "limit=0", "limit=100000"])
+def test_invalid_arguments_are_400(client, query, latest):
+    response = client.get(f"/api/changes?{query}" + ("" if "since" in query else f"&since={latest()}"))
+    assert response.status_code == 400
+
+def test_cursor_past_the_latest_entry_is_410(client, latest):
+    response = client.get(f"/api/changes?since={latest() + 1000}")
+    assert response.status_code == 410
+    body = response.get_json()
+    assert body["resync"] is True and body["latest"] == latest()
+
+def test_cursor_below_the_compaction_horizon_is_410(app, client, admin_headers, latest):
+    from changelog import compact_change_log
+    from models import db
+    since = latest()
+    created = _create_shower_type(client, admin_headers, "Changes expired")
+    client.delete(f"/api/shower-types/{created}", headers=admin_headers)
+    with app.app_context():
+        # Far enough ahead that every tombstone has expired
+        later = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=36500)
+        compact_change_log(db.session.connection(), now=later)
+        db.session.commit()
+    response = client.get(f"/api/changes?since={since}")
+    assert response.status_code == 410
+    horizon = response.get_json()["horizon"]
+    assert horizon > since
+    assert client.get(f"/api/changes?since={horizon}").status_code == 200
@@ -0,0 +1,68 @@
+"""GET /api/models/search: faceted model search over the in-memory bitmaps."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def alcove(app):
+    """A shower type with a clear (100/m2) model, a frosted (200/m2) model and an unpriced one."""
+    from models import db, ShowerType, Model, GlassType, GlassThickness, GlassPricing, ModelGlassComponent
+    with app.app_context():
+        shower_type = ShowerType(name="Facet alcove", profit_margin=0, vat_rate=0)
+        thickness = GlassThickness(thickness_mm=55)
+        clear, frosted = GlassType(name="Facet clear"), GlassType(name="Facet frosted")
+        models = [Model(name=name, shower_type=shower_type) for name in ("Facet cheap", "Facet dear", "Facet unpriced")]
+        db.session.add_all(models + [
+            GlassPricing(glass_type=clear, thickness=thickness, price_per_m2=100),
+            GlassPricing(glass_type=frosted, thickness=thickness, price_per_m2=200),
+            ModelGlassComponent(model=models[0], glass_type=clear, thickness=thickness, quantity=1),
+            ModelGlassComponent(model=models[1], glass_type=frosted, thickness=thickness, quantity=1),
+        ])
+        db.session.commit()
+        return {"shower_type_id": shower_type.id, "clear_id": clear.id, "frosted_id": frosted.id,
+                "model_ids": [m.id for m in models]}
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _counts(body, facet):
+    return {entry["id"]: entry["count"] for entry in body["facets"][facet]}
+
+
+def test_facet_filter_orders_by_price_with_unpriced_last(client, alcove):
+    body = client.get(f"/api/models/search?shower_type_id={alcove['shower_type_id']}").get_json()
+    assert body["ids"] == alcove["model_ids"]
+    assert body["total"] == 3 and body["next_offset"] is None
+    assert body["price"]["min"] < body["price"]["max"]
+
+def test_facet_counts_ignore_their_own_filter(client, alcove):
+    url = f"/api/models/search?shower_type_id={alcove['shower_type_id']}&glass_type_id={alcove['frosted_id']}"
+    body = client.get(url).get_json()
+    assert body["ids"] == [alcove["model_ids"][1]]
+    counts = _counts(body, "glass_type_id")
+    assert counts[alcove["clear_id"]] == 1 and counts[alcove["frosted_id"]] == 1
+    assert _counts(body, "shower_type_id")[alcove["shower_type_id"]] == 1
+
+def test_values_of_one_facet_combine_with_or(client, alcove):
+    body = client.get(f"/api/models/search?glass_type_id={alcove['clear_id']},{alcove['frosted_id']}").get_json()
+    assert body["ids"] == alcove["model_ids"][:2]
+
+def test_price_range_and_paging(client, alcove):
+    cheap, dear, _ = alcove["model_ids"]
+    base = f"/api/models/search?shower_type_id={alcove['shower_type_id']}"
+    prices = client.get(base).get_json()["price"]
+    body = client.get(f"{base}&min_price={prices['max']}").get_json()
+    assert body["ids"] == [dear]
+    body = client.get(f"{base}&max_price={prices['min']}").get_json()
+    assert body["ids"] == [cheap]
+    body = client.get(f"{base}&limit=1&offset=1").get_json()
+    assert body["ids"] == [dear] and body["next_offset"] == 2
+
+@pytest.mark.parametrize("query", [
+    "glass_type_id=clear", "limit=0", "limit=100000", "offset=-1", "min_price=cheap",
+])
+def test_invalid_arguments_are_400(client, query):
+    response = client.get(f"/api/models/search?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["error"]
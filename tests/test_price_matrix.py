@@ -0,0 +1,88 @@
+"""POST /api/pricing/import and GET /api/pricing/export: bulk price matrix round trips and validation."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def lookups(app):
+    from models import db, GlassType, GlassThickness, Finish, HardwareType, SealType
+    with app.app_context():
+        rows = [GlassType(name="Matrix clear"), GlassThickness(thickness_mm=77), Finish(name="Matrix brass"),
+                HardwareType(name="Matrix hinge"), SealType(name="Matrix magnet")]
+        db.session.add_all(rows)
+        db.session.commit()
+        return {type(row).__name__: row.id for row in rows}
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _prices(client, admin_headers):
+    body = client.get("/api/pricing/export?format=json", headers=admin_headers).get_json()
+    return {
+        "glass": {(r["glass_type"], r["thickness_mm"]): r["price_per_m2"] for r in body["glass"]},
+        "hardware": {(r["hardware_type"], r["finish"]): r["unit_price"] for r in body["hardware"]},
+        "seal": {r["seal_type"]: r["unit_price"] for r in body["seal"]},
+    }
+
+def test_json_import_inserts_then_updates(client, admin_headers, lookups):
+    matrix = {
+        "glass": [{"glass_type": "Matrix clear", "thickness_mm": 77, "price_per_m2": 120}],
+        "hardware": [{"hardware_type_id": lookups["HardwareType"], "finish": "Matrix brass", "unit_price": 35}],
+        "seal": [{"seal_type": "Matrix magnet", "unit_price": 12}],
+    }
+    response = client.post("/api/pricing/import", json=matrix, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()["glass"] == {"inserted": 1, "updated": 0}
+
+    matrix["glass"][0]["price_per_m2"] = 130
+    response = client.post("/api/pricing/import", json=matrix, headers=admin_headers)
+    assert response.get_json()["glass"] == {"inserted": 0, "updated": 1}
+    prices = _prices(client, admin_headers)
+    assert prices["glass"][("Matrix clear", 77)] == 130
+    assert prices["hardware"][("Matrix hinge", "Matrix brass")] == 35
+    assert prices["seal"]["Matrix magnet"] == 12
+
+def test_csv_import(client, admin_headers, lookups):
+    csv = "kind,type,option,price\nglass,Matrix clear,77.0,140\nseal,Matrix magnet,,14\n"
+    response = client.post("/api/pricing/import", data=csv, content_type="text/csv", headers=admin_headers)
+    assert response.status_code == 200
+    prices = _prices(client, admin_headers)
+    assert prices["glass"][("Matrix clear", 77)] == 140
+    assert prices["seal"]["Matrix magnet"] == 14
+
+def test_csv_export_lists_every_kind(client, admin_headers, lookups):
+    client.post("/api/pricing/import", json={"seal": [{"seal_type": "Matrix magnet", "unit_price": 14}]}, headers=admin_headers)
+    lines = client.get("/api/pricing/export", headers=admin_headers).get_data(as_text=True).splitlines()
+    assert lines[0] == "kind,type,option,price"
+    assert "seal,Matrix magnet,,14.0" in lines
+
+@pytest.mark.parametrize("matrix, error", [
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": 77, "price_per_m2": "nan"}]}, "finite"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": 77, "price_per_m2": "inf"}]}, "finite"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": 77, "price_per_m2": -1}]}, "negative"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": 77, "price_per_m2": True}]}, "number"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": "inf", "price_per_m2": 1}]}, "whole number"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": 8.9, "price_per_m2": 1}]}, "whole number"),
+    ({"glass": [{"glass_type": "Matrix clear", "thickness_mm": [8], "price_per_m2": 1}]}, "whole number"),
+    ({"glass": [{"glass_type": "No such glass", "thickness_mm": 77, "price_per_m2": 1}]}, "unknown glass type"),
+    ({"hardware": [{"hardware_type_id": [1], "finish": "Matrix brass", "unit_price": 1}]}, "unknown hardware_type_id"),
+    ({"seal": {"seal_type": "Matrix magnet"}}, "must be a list"),
+    ({"seal": ["Matrix magnet"]}, "must be an object"),
+])
+def test_invalid_rows_are_reported_and_nothing_is_written(client, admin_headers, lookups, matrix, error):
+    before = _prices(client, admin_headers)
+    response = client.post("/api/pricing/import", json=matrix, headers=admin_headers)
+    assert response.status_code == 400
+    assert any(error in message for message in response.get_json()["errors"])
+    assert _prices(client, admin_headers) == before
+
+def test_invalid_csv_reports_line_numbers(client, admin_headers, lookups):
+    csv = "kind,type,option,price\nglass,Matrix clear,inf,1\nglass,Matrix clear,77,nan\n"
+    response = client.post("/api/pricing/import", data=csv, content_type="text/csv", headers=admin_headers)
+    assert response.status_code == 400
+    errors = response.get_json()["errors"]
+    assert [message.split(":")[0] for message in errors] == ["line 2", "line 3"]
+
+def test_import_requires_admin(client, lookups):
+    assert client.post("/api/pricing/import", json={"glass": []}).status_code == 401
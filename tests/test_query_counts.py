@@ -0,0 +1,74 @@
+"""Catalog GETs run a fixed number of queries per request, whatever the catalog size.
+
+Child collections (a model's components and addons) take one query each:
+by id list for up to CHUNK models, through the parent statement beyond
+that. The catalog here is larger than two chunks so the full /api/models
+list exercises the second path rather than assuming it.
+"""
+import pytest
+
+from conftest import CATALOG_MODELS as MODELS
+from readers import CHUNK
+
+CHILD_COLLECTIONS = 4  # glass, hardware and seal components, addons
+
+
+@pytest.fixture(scope="module")
+def client(app, catalog):
+    return app.test_client()
+
+
+# path -> queries for an uncached request; every cached view first reads the catalog version
+CATALOG_VERSION = 1
+EXPECTED = {
+    "/api/shower-types": CATALOG_VERSION + 1,
+    "/api/glass-types": CATALOG_VERSION + 1,
+    "/api/glass-thicknesses": CATALOG_VERSION + 1,
+    "/api/finishes": CATALOG_VERSION + 1,
+    "/api/hardware-types": CATALOG_VERSION + 1,
+    "/api/seal-types": CATALOG_VERSION + 1,
+    "/api/glass-pricing": CATALOG_VERSION + 1,
+    "/api/hardware-pricing": CATALOG_VERSION + 1,
+    "/api/seal-pricing": CATALOG_VERSION + 1,
+    "/api/prices": CATALOG_VERSION + 3,
+    "/api/addons": CATALOG_VERSION + 1,
+    "/api/gallery": CATALOG_VERSION + 1,
+    "/api/model-glass-components/1": CATALOG_VERSION + 1,
+    "/api/model-hardware-components/1": CATALOG_VERSION + 1,
+    "/api/model-seal-components/1": CATALOG_VERSION + 1,
+    f"/api/models?limit={CHUNK}": CATALOG_VERSION + 1 + CHILD_COLLECTIONS,
+    "/api/models?limit=50&fields=id,name": CATALOG_VERSION + 1,
+    "/api/models": CATALOG_VERSION + 1 + CHILD_COLLECTIONS,
+}
+
+
+@pytest.mark.parametrize("path", EXPECTED)
+def test_catalog_endpoint_query_count(client, count_queries, path):
+    from cache import response_cache
+    response_cache.clear()
+    responses = []
+    assert count_queries(lambda: responses.append(client.get(path))) == EXPECTED[path]
+    assert responses[0].status_code == 200
+
+def test_cached_response_reads_only_the_catalog_version(client, count_queries):
+    client.get("/api/models")
+    assert count_queries(lambda: client.get("/api/models")) == CATALOG_VERSION
+
+def test_model_list_queries_do_not_grow_with_the_page(client, count_queries):
+    from cache import response_cache
+    response_cache.clear()
+    counts = [count_queries(lambda: client.get(f"/api/models?limit={limit}")) for limit in (1, 50, CHUNK)]
+    counts.append(count_queries(lambda: client.get("/api/models")))
+    assert len(set(counts)) == 1
+
+def test_full_model_list_has_the_same_children_as_its_pages(client):
+    full = client.get("/api/models").get_json()
+    assert len(full) >= MODELS
+    paged, since = [], ""
+    while True:
+        page = client.get(f"/api/models?limit={CHUNK}{since}").get_json()
+        paged += page["items"]
+        if not page["next_cursor"]:
+            break
+        since = f"&cursor={page['next_cursor']}"
+    assert paged == full
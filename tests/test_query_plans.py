@@ -0,0 +1,27 @@
+"""flask check-query-plans passes on the migrated schema and catches a missing filter index."""
+import pytest
+from sqlalchemy import text
+
+from query_plans import check_query_plans
+
+
+def test_endpoint_probes_are_answered_through_indexes(app, catalog):
+    with app.app_context():
+        assert check_query_plans(app) == []
+
+@pytest.mark.parametrize("index, table", [
+    ("ix_model_shower_type_id", "model"),
+    ("ix_addon_model_id", "addon"),
+])
+def test_dropping_a_filter_index_fails_the_check(app, catalog, index, table):
+    from models import db
+    with app.app_context():
+        with db.engine.begin() as conn:
+            ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": index}).scalar_one()
+            conn.execute(text(f"DROP INDEX {index}"))
+        try:
+            failures = check_query_plans(app)
+        finally:
+            with db.engine.begin() as conn:
+                conn.execute(text(ddl))
+    assert f"SCAN {table}" in {detail for url, statement, detail in failures}
@@ -0,0 +1,68 @@
+"""POST /api/quote: server-side pricing of a configuration, and rejection of malformed input."""
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_quote_prices_every_component(client, priced_model):
+    response = client.post("/api/quote", json={
+        "model_id": priced_model["model_id"], "area_m2": 1.5, "addon_ids": [priced_model["addon_id"]], "quantity": 2,
+    })
+    assert response.status_code == 200
+    quote = response.get_json()
+    assert quote["glass_total"] == 300.0        # 100/m2 x 1.5 m2 x 2 panels
+    assert quote["hardware_total"] == 30.0
+    assert quote["seal_total"] == 5.0
+    assert quote["addons_total"] == 25.0
+    assert quote["subtotal"] == 720.0           # (300 + 30 + 5 + 25) x 2 units
+    assert quote["total"] == round(720 * 1.2 * 1.18, 2)
+
+def test_quote_from_width_and_height(client, priced_model):
+    response = client.post("/api/quote", json={"model_id": priced_model["model_id"], "width_mm": 1000, "height_mm": 2000})
+    assert response.status_code == 200
+    assert response.get_json()["area_m2"] == 2.0
+
+def test_quote_list_reports_errors_per_configuration(client, priced_model):
+    response = client.post("/api/quote", json=[{"model_id": priced_model["model_id"], "area_m2": 1}, {"model_id": -1}])
+    assert response.status_code == 200
+    first, second = response.get_json()
+    assert "total" in first and "error" in second
+
+@pytest.mark.parametrize("changes", [
+    {"model_id": [1]},
+    {"model_id": "1"},
+    {"model_id": True},
+    {"model_id": None},
+    {"model_id": 10 ** 9},
+    {"addon_ids": 5},
+    {"addon_ids": "12"},
+    {"addon_ids": [[1]]},
+    {"addon_ids": [True]},
+    {"glass_type_id": [1]},
+    {"finish_id": {"id": 1}},
+    {"area_m2": "nan"},
+    {"area_m2": "inf"},
+    {"area_m2": True},
+    {"area_m2": 0},
+    {"area_m2": None, "width_mm": 1000},
+    {"quantity": 1.5},
+    {"quantity": 0},
+    {"quantity": True},
+])
+def test_malformed_quote_is_a_400(client, priced_model, changes):
+    config = {"model_id": priced_model["model_id"], "area_m2": 1, **changes}
+    if config.get("area_m2") is None:
+        config.pop("area_m2")
+    response = client.post("/api/quote", json=config)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+def test_addon_of_another_model_is_rejected(client, priced_model, catalog):
+    from models import Addon
+    with client.application.app_context():
+        other = Addon.query.filter(Addon.model_id != priced_model["model_id"]).first()
+    response = client.post("/api/quote", json={"model_id": priced_model["model_id"], "area_m2": 1, "addon_ids": [other.id]})
+    assert response.status_code == 400
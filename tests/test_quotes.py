@@ -0,0 +1,110 @@
+"""POST /api/quotes: customer quotes saved through the write-behind queue, exported as CSV."""
+import csv
+import io
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import quotes
+from quotes import QuoteWriter, quote_writer, replay_dead_letters
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def dead_letters(tmp_path, monkeypatch):
+    path = tmp_path / "dead_letters.jsonl"
+    monkeypatch.setattr(quotes, "QUOTE_DEAD_LETTER_FILE", str(path))
+    return path
+
+
+def _submit(client, priced_model, **customer):
+    response = client.post("/api/quotes", json={"model_id": priced_model["model_id"], "area_m2": 1, **customer})
+    assert response.status_code == 202
+    return response.get_json()["reference"]
+
+def _stored(app, reference):
+    from models import Quote
+    with app.app_context():
+        return Quote.query.filter_by(reference=reference).first() is not None
+
+
+def test_quote_is_queued_then_saved_with_its_lines(app, client, admin_headers, priced_model):
+    reference = _submit(client, priced_model, customer_name="Ada", customer_email="ada@example.com")
+    assert quote_writer.flush()
+    listed = client.get(f"/api/quotes?model_id={priced_model['model_id']}", headers=admin_headers).get_json()
+    quote = next(q for q in listed if q["reference"] == reference)
+    detail = client.get(f"/api/quotes/{quote['id']}", headers=admin_headers).get_json()
+    assert detail["customer_name"] == "Ada"
+    assert {line["kind"] for line in detail["lines"]} == {"glass", "hardware", "seal"}
+
+@pytest.mark.parametrize("body", [
+    [],
+    {"model_id": [1], "area_m2": 1},
+    {"area_m2": 1, "customer_email": "not an email"},
+    {"area_m2": 1, "customer_name": "x" * 129},
+    {"area_m2": 1, "notes": 5},
+])
+def test_invalid_quote_is_a_400(client, priced_model, body):
+    if isinstance(body, dict):
+        body = {"model_id": priced_model["model_id"], **body}
+    response = client.post("/api/quotes", json=body)
+    assert response.status_code == 400
+
+def test_full_queue_is_a_503(app, client, priced_model, monkeypatch):
+    import app as application
+    writer = QuoteWriter(max_pending=1)
+    monkeypatch.setattr(writer, "_ensure_started", lambda app: None)  # nothing drains the queue
+    monkeypatch.setattr(application, "quote_writer", writer)
+    _submit(client, priced_model)
+    response = client.post("/api/quotes", json={"model_id": priced_model["model_id"], "area_m2": 1})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_export_neutralises_spreadsheet_formulas(app, client, admin_headers, priced_model):
+    reference = _submit(client, priced_model, customer_name='=HYPERLINK("http://evil.example","x")',
+                        customer_phone="+1 555 0100", notes="@SUM(A1)")
+    assert quote_writer.flush()
+    body = client.get("/api/quotes/export", headers=admin_headers).get_data(as_text=True)
+    row = next(r for r in csv.DictReader(io.StringIO(body)) if r["reference"] == reference)
+    assert row["customer_name"] == '\'=HYPERLINK("http://evil.example","x")'
+    assert row["customer_phone"] == "'+1 555 0100"
+    assert row["notes"] == "'@SUM(A1)"
+    assert row["total"] and not row["total"].startswith("'")
+
+def test_failed_batch_is_dead_lettered_and_replayed(app, client, priced_model, dead_letters, monkeypatch):
+    calls = []
+    def broken(records):
+        calls.append(records)
+        raise OperationalError("INSERT", {}, Exception("no such table: quote"))
+    monkeypatch.setattr(quotes, "_insert_records", broken)
+    reference = _submit(client, priced_model, customer_name="Grace")
+    assert quote_writer.flush()
+    assert len(calls) == 1  # a permanent error is not retried
+    assert reference in dead_letters.read_text()
+    assert not _stored(app, reference)
+
+    monkeypatch.undo()
+    monkeypatch.setattr(quotes, "QUOTE_DEAD_LETTER_FILE", str(dead_letters))
+    with app.app_context():
+        assert replay_dead_letters(app) == (1, 0, 0)
+        assert replay_dead_letters(app) == (0, 0, 0)
+    assert _stored(app, reference)
+    assert dead_letters.read_text() == ""
+
+def test_locked_database_is_retried(app, client, priced_model, dead_letters, monkeypatch):
+    insert = quotes._insert_records
+    attempts = []
+    def locked_twice(records):
+        attempts.append(records)
+        if len(attempts) <= 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        insert(records)
+    monkeypatch.setattr(quotes, "_insert_records", locked_twice)
+    reference = _submit(client, priced_model)
+    assert quote_writer.flush()
+    assert len(attempts) == 3
+    assert _stored(app, reference)
+    assert not dead_letters.exists()
@@ -0,0 +1,98 @@
+"""Resumable chunked uploads (/api/uploads) and Range requests on stored uploads."""
+import hashlib
+import os
+
+import pytest
+
+DATA = b"0123456789" * 10
+
+
+@pytest.fixture
+def upload_root(app, tmp_path, monkeypatch):
+    """Point the upload folder and the static uploads at tmp_path, so nothing lands in the tree."""
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+    monkeypatch.setitem(app.config, "UPLOAD_FOLDER", str(tmp_path / "uploads"))
+    return tmp_path
+
+@pytest.fixture
+def client(app, upload_root):
+    return app.test_client()
+
+@pytest.fixture
+def upload(client, admin_headers):
+    body = {"filename": "door.png", "size": len(DATA), "sha256": hashlib.sha256(DATA).hexdigest()}
+    response = client.post("/api/uploads", json=body, headers=admin_headers)
+    assert response.status_code == 201
+    return response.get_json()["upload_id"]
+
+
+def _put(client, headers, upload_id, start, chunk):
+    content_range = f"bytes {start}-{start + len(chunk) - 1}/{len(DATA)}"
+    return client.put(f"/api/uploads/{upload_id}", data=chunk, headers=dict(headers, **{"Content-Range": content_range}))
+
+
+def test_chunks_resume_from_the_offset_and_finalize(client, admin_headers, upload, upload_root):
+    assert _put(client, admin_headers, upload, 0, DATA[:40]).get_json()["offset"] == 40
+    assert client.get(f"/api/uploads/{upload}", headers=admin_headers).get_json()["offset"] == 40
+    session = _put(client, admin_headers, upload, 40, DATA[40:]).get_json()
+    assert session["offset"] == len(DATA) and session["complete"]
+    response = client.post(f"/api/uploads/{upload}/finalize", headers=admin_headers)
+    assert response.status_code == 200
+    image_path = response.get_json()["image_path"]
+    with open(os.path.join(upload_root, image_path.lstrip("/")), "rb") as stored:
+        assert stored.read() == DATA
+    assert client.get(f"/api/uploads/{upload}", headers=admin_headers).status_code == 404
+
+def test_wrong_offset_is_409_with_the_current_offset(client, admin_headers, upload):
+    _put(client, admin_headers, upload, 0, DATA[:40])
+    response = _put(client, admin_headers, upload, 60, DATA[60:])
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == 40
+
+def test_chunk_past_the_declared_size_is_416(client, admin_headers, upload):
+    response = _put(client, admin_headers, upload, 0, DATA + b"extra")
+    assert response.status_code == 416
+
+def test_finalize_before_the_last_chunk_is_409(client, admin_headers, upload):
+    _put(client, admin_headers, upload, 0, DATA[:40])
+    response = client.post(f"/api/uploads/{upload}/finalize", headers=admin_headers)
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == 40
+
+def test_checksum_mismatch_is_422(client, admin_headers):
+    body = {"filename": "door.png", "size": len(DATA), "sha256": "0" * 64}
+    upload_id = client.post("/api/uploads", json=body, headers=admin_headers).get_json()["upload_id"]
+    _put(client, admin_headers, upload_id, 0, DATA)
+    assert client.post(f"/api/uploads/{upload_id}/finalize", headers=admin_headers).status_code == 422
+
+def test_deleted_and_unknown_sessions_are_404(client, admin_headers, upload):
+    assert client.delete(f"/api/uploads/{upload}", headers=admin_headers).status_code == 200
+    assert client.get(f"/api/uploads/{upload}", headers=admin_headers).status_code == 404
+    assert client.get("/api/uploads/../secrets", headers=admin_headers).status_code == 404
+
+@pytest.mark.parametrize("body, status", [
+    ({"filename": "door.exe", "size": 10, "sha256": "0" * 64}, 400),
+    ({"filename": "door.png", "size": 0, "sha256": "0" * 64}, 400),
+    ({"filename": "door.png", "size": 10, "sha256": "not-a-digest"}, 400),
+    ({"filename": "door.png", "size": 10 ** 12, "sha256": "0" * 64}, 413),
+])
+def test_invalid_sessions_are_rejected(client, admin_headers, body, status):
+    assert client.post("/api/uploads", json=body, headers=admin_headers).status_code == status
+
+def test_requires_admin(client):
+    assert client.post("/api/uploads", json={}).status_code == 401
+
+
+def test_stored_uploads_serve_ranges(client, upload_root):
+    os.makedirs(upload_root / "uploads", exist_ok=True)
+    (upload_root / "uploads" / "range.png").write_bytes(DATA)
+    response = client.get("/uploads/range.png", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.data == DATA[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(DATA)}"
+    response = client.get("/uploads/range.png", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+
+def test_session_files_are_never_served(client, admin_headers, upload):
+    from chunked_uploads import SESSION_DIRNAME
+    assert client.get(f"/uploads/{SESSION_DIRNAME}/{upload}.json").status_code == 404
@@ -0,0 +1,50 @@
+"""POST /api/pricing/what-if: old vs new model prices under hypothetical pricing changes."""
+import pytest
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_glass_price_override_moves_the_model(client, admin_headers, priced_model):
+    changes = {"glass_pricing": [{"glass_type_id": priced_model["glass_type_id"],
+                                  "thickness_id": priced_model["thickness_id"], "price_per_m2": 200}]}
+    response = client.post("/api/pricing/what-if", json=changes, headers=admin_headers)
+    assert response.status_code == 200
+    rows = {row["model_id"]: row for row in response.get_json()["models"]}
+    assert rows[priced_model["model_id"]]["delta"] > 0
+
+def test_unchanged_prices_move_nothing(client, admin_headers):
+    response = client.post("/api/pricing/what-if", json={}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()["models"] == []
+
+@pytest.mark.parametrize("changes", [
+    [],
+    {"area_m2": -1},
+    {"area_m2": 0},
+    {"glass_pricing": {"glass_type_id": 1}},
+    {"glass_pricing": [{"glass_type_id": [1], "thickness_id": 1, "price_per_m2": 10}]},
+    {"glass_pricing": [{"glass_type_id": {"id": 1}, "thickness_id": 1, "price_per_m2": 10}]},
+    {"hardware_pricing": [{"hardware_type_id": 1, "finish_id": [1], "unit_price": 10}]},
+    {"seal_pricing": [{"seal_type_id": True, "unit_price": 10}]},
+    {"seal_pricing": [{"seal_type_id": 1, "unit_price": "10"}]},
+    {"shower_types": [{"id": [1], "vat_rate": 0.1}]},
+    {"shower_types": [{"id": 999999, "vat_rate": 0.1}]},
+    {"shower_types": ["corner"]},
+])
+def test_invalid_changes_are_rejected(client, admin_headers, changes):
+    response = client.post("/api/pricing/what-if", json=changes, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()["errors"]
+
+def test_nan_price_is_rejected(client, admin_headers, priced_model):
+    body = ('{"seal_pricing": [{"seal_type_id": %d, "unit_price": NaN}]}' % priced_model["seal_type_id"])
+    response = client.post("/api/pricing/what-if", data=body, content_type="application/json", headers=admin_headers)
+    assert response.status_code == 400
+
+def test_requires_admin(client):
+    assert client.post("/api/pricing/what-if", json={}).status_code == 401